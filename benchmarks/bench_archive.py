@@ -0,0 +1,110 @@
+"""Bulk archive upload: an issue as one zip (or tar.gz) plus a URL CSV, vs the same issue as a batch manifest.
+
+    python -m benchmarks.bench_archive --articles 60
+
+The archive names half the PDFs after their XML and half after their DOI, and the CSV lists
+the rows shuffled with only doi, article_url and pdf_link, so every article is paired
+automatically. Outputs must match the batch run byte for byte.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from benchmarks.fixtures import article_path, issue_pages, make_issue, serve_pages
+from jatsgen.archive import ARTICLE_SET_SUFFIX, run_archive
+from jatsgen.batch import run_batch
+
+
+def archive_members(directory, count, base_url):
+    """(name, bytes) of the upload: XMLs, PDFs named by XML or DOI, the template and a shuffled URL CSV"""
+    members = [("issue/template.xml", (directory / "template.xml").read_bytes())]
+    rows = []
+    for index in range(1, count + 1):
+        members.append((f"issue/xml/article{index}.xml", (directory / f"article{index}.xml").read_bytes()))
+        pdf_name = f"article{index}.pdf" if index % 2 else f"jiwe.2024.3.2.{index}.pdf"
+        members.append((f"issue/pdf/{pdf_name}", (directory / f"article{index}.pdf").read_bytes()))
+        url = base_url + article_path(index)
+        rows.append([f"10.33093/jiwe.2024.3.2.{index}", url, f"{url}/pdf"])
+    random.Random(0).shuffle(rows)
+    text = io.StringIO()
+    csv.writer(text).writerows([["doi", "article_url", "pdf_link"]] + rows)
+    return members, text.getvalue().encode("utf-8")
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for name, data in members:
+            bundle.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tar(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as bundle:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            bundle.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in journal site delay per request (s)")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(args.articles), args.latency) as base_url:
+        os.chdir(tmp)  # Fresh HTTP and result caches
+        try:
+            directory = Path(tmp) / "issue"
+            manifest = make_issue(directory, base_url, args.articles)
+            members, csv_data = archive_members(directory, args.articles, base_url)
+            uploads = {"zip": make_zip(members), "tar.gz": make_tar(members)}
+
+            batch, batch_seconds = timed(lambda: run_batch(manifest, Path(tmp) / "batch", workers=args.workers, cache=False))
+            expected = {Path(result["output"]).name: Path(result["output"]).read_bytes() for result in batch}
+
+            runs = {}
+            for kind, data in uploads.items():
+                for workers in (1, args.workers):
+                    out = io.BytesIO()
+                    (results, _, name), seconds = timed(
+                        lambda: run_archive(data, out, csv_data=csv_data, workers=workers, cache=False))
+                    with zipfile.ZipFile(out) as bundle:
+                        outputs = {entry: bundle.read(entry) for entry in bundle.namelist()
+                                   if entry.endswith(".xml") and not entry.endswith(ARTICLE_SET_SUFFIX)}
+                    runs[kind, workers] = (results, name, seconds, outputs == expected, len(out.getvalue()))
+        finally:
+            os.chdir(cwd)
+
+    mb = 1024 * 1024
+    print(f"articles={args.articles} upload zip {len(uploads['zip']) / mb:.1f} MB, tar.gz {len(uploads['tar.gz']) / mb:.1f} MB")
+    print(f"batch manifest (files on disk)  {batch_seconds:>7.2f}s")
+    ok = True
+    for (kind, workers), (results, name, seconds, identical, size) in runs.items():
+        generated = sum(result["status"] == "ok" for result in results)
+        print(f"{kind:<7} workers={workers or 'cpu':<4}         {seconds:>7.2f}s  {generated}/{len(results)} paired and generated,"
+              f" {name} {size / mb:.1f} MB, identical to batch: {identical}")
+        ok = ok and identical and generated == args.articles
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+"""Issue-wide ArticleSet: peak memory of streaming <Article>s vs parsing the whole file.
+
+    python -m benchmarks.bench_articleset --counts 100 400 1600
+"""
+import xml.etree.ElementTree as ET
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fixtures import issue_pages, make_articleset, make_issue, make_issue_articleset, serve_pages
+from jatsgen.articleset import article_document, iter_articles
+from jatsgen.batch import run_batch, run_issue
+
+
+def whole_tree(path):
+    for article in ET.parse(path).getroot().iter("Article"):
+        article_document(article)
+
+
+def streamed(path):
+    for article in iter_articles(path):
+        article_document(article)
+
+
+def measure(read, path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    read(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def check_outputs(tmp, count=6):
+    """Issue mode must produce exactly what per-article batch mode produces"""
+    with serve_pages(issue_pages(count)) as base_url:
+        manifest = make_issue(os.path.join(tmp, "batch"), base_url, count)
+        articleset, issue_manifest = make_issue_articleset(os.path.join(tmp, "issue"), base_url, count)
+        batch = run_batch(manifest, os.path.join(tmp, "out_batch"), workers=2)
+        issue = run_issue(articleset, issue_manifest, os.path.join(tmp, "out_issue"), workers=2,
+                          template=os.path.join(tmp, "batch", "template.xml"))
+    for expected, got in zip(batch, issue):
+        with open(expected["output"], "rb") as a, open(got["output"], "rb") as b:
+            if a.read() != b.read():
+                return False
+    return len(batch) == len(issue) == count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 400, 1600])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'articles':>8} {'file MB':>8} {'reader':<10} {'seconds':>8} {'peak MB':>8}")
+        for count in args.counts:
+            path = os.path.join(tmp, f"articleset{count}.xml")
+            make_articleset(path, count)
+            megabytes = os.path.getsize(path) / 1e6
+            for name, read in [("whole", whole_tree), ("streamed", streamed)]:
+                elapsed, peak = measure(read, path)
+                print(f"{count:>8} {megabytes:>8.1f} {name:<10} {elapsed:>8.3f} {peak / 1e6:>8.2f}")
+        print(f"issue outputs identical to batch outputs: {check_outputs(tmp)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Batch throughput: 1 worker vs N workers over a synthetic issue.
+
+    python -m benchmarks.bench_batch --articles 40 --workers 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import issue_pages, make_issue, serve_pages
+from jatsgen.batch import run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated article page latency (s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(args.articles), args.latency) as base_url:
+        manifest = make_issue(os.path.join(tmp, "issue"), base_url, args.articles)
+        for workers in sorted({1, args.workers}):
+            started = time.perf_counter()
+            results = run_batch(manifest, os.path.join(tmp, f"out{workers}"), workers=workers)
+            elapsed = time.perf_counter() - started
+            ok = sum(result["status"] == "ok" for result in results)
+            print(f"workers={workers:<3} articles={ok}/{len(results)} "
+                  f"seconds={elapsed:.2f} articles/s={len(results) / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
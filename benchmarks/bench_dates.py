@@ -0,0 +1,114 @@
+"""Date normalizer: corpus correctness against the old strptime parse_date, plus timings.
+
+    python -m benchmarks.bench_dates
+
+Every string the old function parsed must normalize to the same value; the extra formats
+(abbreviations with a dot, ordinals, ISO dates, stray whitespace) must now parse too.
+"""
+import argparse
+import itertools
+import time
+from datetime import datetime
+
+from jatsgen.dates import NULL_DATE, normalize_date, normalize_dates
+
+# Dates as they appear in the journal's PDFs and article pages
+EXPECTED = {
+    "14 June 2024": ("2024", "06", "14"),
+    "June 14, 2024": ("2024", "06", "14"),
+    "Sept. 3, 2024": ("2024", "09", "03"),
+    "Sep 3, 2024": ("2024", "09", "03"),
+    "3rd March 2024": ("2024", "03", "03"),
+    "21st Jan 2023": ("2023", "01", "21"),
+    "2024-03-03": ("2024", "03", "03"),
+    " 14  June\n2024 ": ("2024", "06", "14"),
+    "14 June, 2024": ("2024", "06", "14"),
+    "June 14,2024": ("2024", "06", "14"),
+    "Friday, 14 June 2024": ("2024", "06", "14"),
+    "14-Jun-2024": ("2024", "06", "14"),
+    "31 February 2024": NULL_DATE,
+    "June 2024": NULL_DATE,
+    "14/06/2024": NULL_DATE,
+    "Published: soon": NULL_DATE,
+    "": NULL_DATE,
+}
+
+
+def legacy_parse_date(date_str):
+    for fmt in ["%d %B %Y", "%B %d, %Y", "%d %b %Y", "%b %d, %Y"]:
+        try:
+            dt = datetime.strptime(date_str, fmt)
+            return str(dt.year), f"{dt.month:02d}", f"{dt.day:02d}"
+        except:
+            continue
+    return "null", "null", "null"
+
+
+def month_spellings():
+    names = [datetime(2024, month, 1).strftime("%B") for month in range(1, 13)]
+    for name in names:
+        for spelling in {name, name[:3], name[:3] + "."}:
+            yield from {spelling, spelling.lower(), spelling.upper()}
+    yield from ["Sept", "Sept.", "Mayo", "Junly"]
+
+
+def corpus():
+    days = [f"{day}" for day in range(0, 33)] + [f"{day:02d}" for day in range(1, 10)] + [" 5", "3rd", "1st", "22nd"]
+    layouts = [
+        "{d} {m} {y}", "{m} {d}, {y}", "{m} {d},{y}", "{d} {m}, {y}", "{m} {d} {y}",
+        "  {d}  {m} {y} ", "{d}\n{m} {y}", "{d} {m} {y}.", "{m} {d}, {y} extra",
+    ]
+    for day, month, year, layout in itertools.product(days, month_spellings(), ["2024", "1999", "0999", "24"], layouts):
+        yield layout.format(d=day, m=month, y=year)
+    for year, month, day in itertools.product(["2024", "1999"], range(0, 14), range(0, 33)):
+        yield f"{year}-{month:02d}-{day:02d}"
+    yield from EXPECTED
+
+
+def time_it(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--issue-size", type=int, default=200, help="History lines in the simulated issue run")
+    args = parser.parse_args()
+
+    strings = list(dict.fromkeys(corpus()))
+    old = [legacy_parse_date(text) for text in strings]
+    normalize_date.cache_clear()
+    new = normalize_dates(strings)
+
+    mismatches = [(text, o, n) for text, o, n in zip(strings, old, new) if o != NULL_DATE and o != n]
+    recovered = sum(o == NULL_DATE and n != NULL_DATE for o, n in zip(old, new))
+    wrong = {text: normalize_date(text) for text, value in EXPECTED.items() if normalize_date(text) != value}
+
+    print(f"corpus strings          {len(strings)}")
+    print(f"parsed by old           {sum(o != NULL_DATE for o in old)}")
+    print(f"old/new mismatches      {len(mismatches)}")
+    for text, o, n in mismatches[:10]:
+        print(f"    {text!r}: old {o} new {n}")
+    print(f"recovered by new        {recovered}")
+    print(f"expected formats wrong  {len(wrong)} {wrong if wrong else ''}")
+
+    # Per-call cost, every string distinct
+    sample = strings[:20000]
+    old_seconds = time_it(lambda: [legacy_parse_date(text) for text in sample])
+    normalize_date.cache_clear()
+    new_seconds = time_it(lambda: [normalize_date(text) for text in sample])
+    print(f"distinct strings        old {old_seconds / len(sample) * 1e6:.1f} us  new {new_seconds / len(sample) * 1e6:.1f} us")
+
+    # An issue run: received/accepted/published for every article, mostly repeated dates
+    issue = [f"{day % 28 + 1} {month} 2024" for day, month in
+             zip(range(args.issue_size * 3), itertools.cycle(["January", "March", "June"]))]
+    old_seconds = time_it(lambda: [legacy_parse_date(text) for text in issue])
+    normalize_date.cache_clear()
+    new_seconds = time_it(lambda: normalize_dates(issue))
+    print(f"issue run ({len(issue)} dates)  old {old_seconds * 1000:.2f} ms  new {new_seconds * 1000:.2f} ms")
+    return 1 if mismatches or wrong else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
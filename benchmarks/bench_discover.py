@@ -0,0 +1,101 @@
+"""Issue discovery from the TOC page vs fetching article pages one at a time, as the form-driven pipeline does.
+
+    python -m benchmarks.bench_discover --articles 60 --latency 0.05
+
+Runs against the local stand-in for the journal site (OJS TOC and article page markup), which
+counts the connections it accepts, so connection reuse shows up as connections << requests.
+The discovered URLs then drive a bulk archive run with no CSV, checked against a batch run.
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from benchmarks.bench_archive import archive_members, make_zip
+from benchmarks.fixtures import TOC_PATH, article_path, issue_pages, make_issue, serve_pages
+from jatsgen.archive import ARTICLE_SET_SUFFIX, run_archive
+from jatsgen.article_page import ArticlePage
+from jatsgen.batch import run_batch
+from jatsgen.client import HttpClient
+from jatsgen.fetch import PageFetcher
+from jatsgen.scrape import PER_HOST
+from jatsgen.toc import discover_issue
+
+
+def fresh_fetcher():
+    # Its own pooled session, so each run's connections are counted from zero
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16))
+    return PageFetcher(cache_dir=None, client=HttpClient(session=session))
+
+
+def one_at_a_time(urls):
+    fetcher = fresh_fetcher()
+    return {url: fetcher.article_page(url) for url in urls}
+
+
+def measure(fn, stats):
+    stats.update(connections=0, requests=0)
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started, dict(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in journal site delay per request (s)")
+    parser.add_argument("--per-host", type=int, default=PER_HOST)
+    args = parser.parse_args()
+
+    stats = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(args.articles), args.latency, stats) as base_url:
+        os.chdir(tmp)  # Fresh HTTP and result caches
+        try:
+            urls = [base_url + article_path(index) for index in range(1, args.articles + 1)]
+            _, serial_seconds, serial = measure(lambda: one_at_a_time(urls), stats)
+            (entries, pages), discover_seconds, discovered = measure(
+                lambda: discover_issue(base_url + TOC_PATH, fresh_fetcher(), per_host=args.per_host), stats)
+
+            found_ok = (
+                [entry.article_url for entry in entries] == urls
+                and all(entry.pdf_link == f"{url}/pdf" for entry, url in zip(entries, urls))
+                and all(entry.first_page == str(index * 12 + 1) for index, entry in enumerate(entries, start=1))
+                and all(isinstance(pages[url], ArticlePage) for url in urls)
+            )
+
+            # End to end: PDFs and XMLs in an archive, URLs from the TOC instead of a CSV
+            directory = Path(tmp) / "issue"
+            manifest = make_issue(directory, base_url, args.articles)
+            members, _ = archive_members(directory, args.articles, base_url)
+            batch = run_batch(manifest, Path(tmp) / "batch", cache=False)
+            expected = {Path(result["output"]).name: Path(result["output"]).read_bytes() for result in batch}
+            out = io.BytesIO()
+            (results, unpaired, _), archive_seconds, _ = measure(
+                lambda: run_archive(make_zip(members), out, toc_url=base_url + TOC_PATH, cache=False), stats)
+            with zipfile.ZipFile(out) as bundle:
+                outputs = {entry: bundle.read(entry) for entry in bundle.namelist()
+                           if entry.endswith(".xml") and not entry.endswith(ARTICLE_SET_SUFFIX)}
+        finally:
+            os.chdir(cwd)
+
+    print(f"articles={args.articles} latency={args.latency}s per-host={args.per_host}")
+    print(f"{'':<28}{'seconds':>9}{'requests':>10}{'connections':>13}")
+    print(f"{'one page at a time':<28}{serial_seconds:>9.2f}{serial['requests']:>10}{serial['connections']:>13}")
+    print(f"{'TOC discovery + prefetch':<28}{discover_seconds:>9.2f}{discovered['requests']:>10}{discovered['connections']:>13}")
+    print(f"entries match the TOC: {found_ok}")
+    generated = sum(result["status"] == "ok" for result in results)
+    print(f"archive run from the TOC {archive_seconds:.2f}s: {generated}/{len(results)} generated, {len(unpaired)} unpaired,"
+          f" identical to batch: {outputs == expected}")
+    return 0 if found_ok and outputs == expected and not unpaired else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
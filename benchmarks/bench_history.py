@@ -0,0 +1,94 @@
+"""History-date scanner micro-benchmark: legacy page-by-page scan vs the single-pass scanner.
+
+    python -m benchmarks.bench_history --pages 40 --docs 5
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from benchmarks.fixtures import make_pdf
+from jatsgen.history import combined_date, scan_history
+
+LEGACY_PATTERNS = [
+    re.compile(rf"(?i)Received\s*[:\-]?\s*({combined_date}),\s*Accepted\s*[:\-]?\s*({combined_date})"),
+    re.compile(rf"(?i)Received\s+({combined_date})\s+Accepted\s+({combined_date})"),
+    re.compile(rf"(?i)Received\s+on\s+({combined_date})\s*;\s*Accepted\s+on\s+({combined_date})"),
+    re.compile(rf"(?i)Received[:\-]?\s*({combined_date})\s*\|\s*(?:Revised[:\-]?\s*{combined_date}\s*\|\s*)?Accepted[:\-]?\s*({combined_date})"),
+    re.compile(rf"(?i)Received\s*[:\-]?\s*({combined_date})\s*;\s*Accepted\s*[:\-]?\s*({combined_date})"),
+]
+
+LINES = [
+    "Received: 3 January 2024, Accepted: 9 March 2024",
+    "Received 3 January 2024 Accepted 9 March 2024",
+    "Received on January 3, 2024; Accepted on March 9, 2024",
+    "Received: 3 Jan 2024 | Revised: 1 Feb 2024 | Accepted: 9 Mar 2024",
+    "Received - 3 January 2024; Accepted - 9 March 2024",
+]
+
+
+def legacy_scan(doc):
+    pages = 0
+    for page in doc:
+        pages += 1
+        text = page.get_text()
+        for pattern in LEGACY_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                return (match.group(1).strip(), match.group(2).strip()), pages
+    return None, pages
+
+
+def placements(pages):
+    return {
+        "first": (0, False),
+        "first-footer": (0, True),
+        "last": (pages - 1, False),
+        "middle": (pages // 2, False),
+        "none": (None, False),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--docs", type=int, default=5, help="Documents per placement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'placement':<13} {'scanner':<8} {'pages/doc':>9} {'ms/doc':>8} identical")
+        for name, (history_page, footer) in placements(args.pages).items():
+            paths = []
+            for n in range(args.docs):
+                path = os.path.join(tmp, f"{name}{n}.pdf")
+                make_pdf(path, pages=args.pages, history_page=history_page, line=LINES[n % len(LINES)], footer=footer)
+                paths.append(path)
+
+            timings = {"legacy": [0.0, 0], "single": [0.0, 0], "clip": [0.0, 0]}
+            identical = True
+            for path in paths:
+                with fitz.open(path) as doc:
+                    started = time.perf_counter()
+                    expected, pages = legacy_scan(doc)
+                    timings["legacy"][0] += time.perf_counter() - started
+                    timings["legacy"][1] += pages
+
+                for scanner, clip in [("single", False), ("clip", True)]:
+                    with fitz.open(path) as doc:
+                        started = time.perf_counter()
+                        scan = scan_history(doc, clip=clip)
+                        timings[scanner][0] += time.perf_counter() - started
+                        timings[scanner][1] += scan.pages_scanned
+                    found = (scan.received, scan.accepted) if scan.received else None
+                    identical = identical and found == expected
+
+            for scanner, (seconds, pages) in timings.items():
+                print(f"{name:<13} {scanner:<8} {pages / args.docs:>9.1f} {seconds * 1000 / args.docs:>8.2f} "
+                      f"{identical if scanner != 'legacy' else ''}")
+
+
+if __name__ == "__main__":
+    main()
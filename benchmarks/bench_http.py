@@ -0,0 +1,101 @@
+"""HTTP client behaviour against a misbehaving stand-in site: retries, timeouts, circuit breaker, offline snapshots.
+
+    python -m benchmarks.bench_http
+"""
+import argparse
+import socket
+import tempfile
+import time
+
+from benchmarks.fixtures import article_path, issue_pages, serve_pages
+from jatsgen.client import HostUnavailable, HttpClient, SnapshotClient
+from jatsgen.fetch import PageFetcher
+from jatsgen.metrics import track
+from jatsgen.scrape import prefetch_pages, save_snapshot
+
+
+def flaky(page, failures):
+    calls = []
+
+    def respond():
+        calls.append(1)
+        return (503, "busy") if len(calls) <= failures else (200, page)
+    return respond
+
+
+def hanging(seconds):
+    def respond():
+        time.sleep(seconds)
+        return 200, "<html></html>"
+    return respond
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def timed_fetch(client, url):
+    started = time.perf_counter()
+    with track() as metrics:
+        try:
+            outcome = PageFetcher(cache_dir=None, client=client).article_page(url).published
+        except Exception as e:
+            outcome = type(e).__name__
+    return outcome, time.perf_counter() - started, metrics.counters
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--read-timeout", type=float, default=0.5)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--dead-urls", type=int, default=20)
+    args = parser.parse_args()
+
+    def client(**kwargs):
+        options = dict(timeout=(1.0, args.read_timeout), retries=args.retries, backoff=0.05, failures=3, cooldown=60)
+        return HttpClient(**dict(options, **kwargs))
+
+    pages = issue_pages(4)
+    ok = True
+    with serve_pages(dict(pages, **{
+        "/flaky": flaky(pages[article_path(1)], args.retries),
+        "/down": flaky(pages[article_path(1)], 100),
+        "/hang": hanging(args.read_timeout * 4),
+    })) as base:
+        for name, path in [("healthy", article_path(1)), ("flaky", "/flaky"), ("5xx", "/down"), ("hanging", "/hang")]:
+            outcome, seconds, counters = timed_fetch(client(), base + path)
+            print(f"{name:<9} {seconds * 1000:>8.1f} ms  {outcome}  {counters}")
+        ok &= timed_fetch(client(), base + "/flaky")[0] != "null"
+        # Worst case per page: every attempt times out, plus the backoff sleeps
+        bound = (args.retries + 1) * args.read_timeout + sum(0.05 * 2 ** attempt for attempt in range(args.retries)) + 0.5
+        hang_seconds = timed_fetch(client(), base + "/hang")[1]
+        print(f"hanging page took {hang_seconds:.2f}s (bound {bound:.2f}s)")
+        ok &= hang_seconds <= bound
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            urls = [base + article_path(index) for index in range(1, 5)]
+            live = prefetch_pages(urls, PageFetcher(cache_dir=None, client=client()))
+            saved = save_snapshot(urls, snapshot_dir)
+            offline = prefetch_pages(urls, PageFetcher(cache_dir=None, client=SnapshotClient(snapshot_dir)))
+            identical = live == saved == offline
+            print(f"offline snapshot identical to live pages: {identical}")
+            ok &= identical
+
+    # A dead host: once the circuit opens, the remaining rows fail without touching the network
+    dead = f"http://127.0.0.1:{closed_port()}"
+    shared = client()
+    started = time.perf_counter()
+    with track() as metrics:
+        results = prefetch_pages([f"{dead}/{index}" for index in range(args.dead_urls)],
+                                 PageFetcher(cache_dir=None, client=shared), per_host=1)
+    rejected = sum(isinstance(result, HostUnavailable) for result in results.values())
+    print(f"dead host: {len(results)} pages in {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"{rejected} rejected by the open circuit  {metrics.counters}")
+    ok &= rejected >= args.dead_urls - 3
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
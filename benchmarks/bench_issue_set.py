@@ -0,0 +1,111 @@
+"""Issue ArticleSet assembly: spooled and written in page order vs holding every article block until the end.
+
+    python -m benchmarks.bench_issue_set --articles 60 --workers 4
+
+The manifest lists the articles shuffled and every third PDF is five times longer, so workers
+finish out of order. The spooled ArticleSet must match the collected one byte for byte and list
+all articles by ascending FirstPage; `issue --article-set` over the same articles must give the
+same file. Peak memory is the parent process's (tracemalloc).
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from benchmarks.fixtures import history_line, issue_pages, make_issue, make_issue_articleset, make_pdf, serve_pages
+from jatsgen.articleset import ARTICLE_SET_FOOTER, ARTICLE_SET_HEADER
+from jatsgen.batch import read_manifest, run_assembled, run_issue, run_jobs
+
+
+def shuffled_issue(directory, base_url, count):
+    manifest = make_issue(directory, base_url, count)
+    for index in range(3, count + 1, 3):
+        make_pdf(directory / f"article{index}.pdf", pages=40, history_page=0, line=history_line(index))
+    with open(manifest, encoding="utf-8", newline="") as f:
+        header, *rows = list(csv.reader(f))
+    random.Random(0).shuffle(rows)
+    with open(manifest, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([header] + rows)
+    return manifest
+
+
+def collected(jobs, out_dir, workers, path):
+    """The naive assembly: every block held until the last article is done, then sorted"""
+    results = run_jobs([dict(job, assemble=True) for job in jobs], out_dir, workers)
+    blocks = sorted((result["first_page"] == 0, result["first_page"], result["row"], result.pop("block"))
+                    for result in results if "block" in result)
+    with open(path, "wb") as out:
+        out.write(ARTICLE_SET_HEADER)
+        for *_, block in blocks:
+            out.write(b"  " + block.encode("utf-8") + b"\n")
+        out.write(ARTICLE_SET_FOOTER)
+    return results
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def first_pages(path):
+    return [int(article.findtext(".//FirstPage")) for article in ET.parse(path).getroot().iter("Article")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(args.articles)) as base_url:
+        os.chdir(tmp)  # Fresh HTTP and result caches
+        try:
+            tmp = Path(tmp)
+            manifest = shuffled_issue(tmp / "batch", base_url, args.articles)
+            runs = {}
+            for name, assemble in (("collect and sort", collected), ("spooled", run_assembled)):
+                jobs = read_manifest(manifest)
+                for job in jobs:
+                    job["cache"] = False
+                path = tmp / f"{name.split()[0]}.xml"
+                os.makedirs(tmp / name)
+                results, seconds, peak = measure(lambda: assemble(jobs, tmp / name, args.workers, path))
+                runs[name] = (results, seconds, peak, path.read_bytes())
+
+            articleset, issue_manifest = make_issue_articleset(tmp / "issue", base_url, args.articles)
+            path = tmp / "issue.xml"
+            results, seconds, peak = measure(lambda: run_issue(
+                articleset, issue_manifest, tmp / "out_issue", workers=args.workers, template=tmp / "batch" / "template.xml",
+                prefetch=False, cache=False, article_set=path))
+            runs["issue --article-set"] = (results, seconds, peak, path.read_bytes())
+            pages = first_pages(tmp / "spooled.xml")
+        finally:
+            os.chdir(cwd)
+
+    expected = sorted(index * 12 + 1 for index in range(1, args.articles + 1))
+    mb = 1024 * 1024
+    print(f"articles={args.articles} workers={args.workers}")
+    print(f"{'':<22}{'seconds':>9}{'peak MB':>9}{'ArticleSet MB':>15}{'generated':>11}{'identical':>11}")
+    naive = runs["collect and sort"][3]
+    ok = pages == expected
+    for name, (results, seconds, peak, data) in runs.items():
+        generated = sum(result["status"] == "ok" for result in results)
+        print(f"{name:<22}{seconds:>9.2f}{peak / mb:>9.2f}{len(data) / mb:>15.2f}{generated:>11}{str(data == naive):>11}")
+        ok = ok and data == naive and generated == args.articles
+    print(f"all articles by ascending FirstPage: {pages == expected}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
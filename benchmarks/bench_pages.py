@@ -0,0 +1,61 @@
+"""Article page extraction: full BeautifulSoup parse vs the targeted scanner, with identical results.
+
+    python -m benchmarks.bench_pages --repeat 20
+    python -m benchmarks.bench_pages --pages-dir saved_pages/   # *.html pages saved from the journal site
+"""
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import make_article_page
+from jatsgen.article_page import scan_article_page, soup_article_page
+
+
+def variants():
+    """Synthetic pages covering the markup quirks seen on the journal site"""
+    page = make_article_page(1)
+    yield "plain", page
+    yield "nested", page.replace("<strong>Published:</strong> 14 June 2024",
+                                 "<strong>Published:</strong>\n  <span class='value'>\n  14 June 2024\n  </span>")
+    yield "entities", page.replace("Web Engineering", "Web &amp; Mobile Engineering").replace("14 June", "14&nbsp;June")
+    yield "spacing", page.replace('class="list-group-item date-published"', 'class="list-group-item   date-published"')
+    yield "no-date", page.replace('date-published', 'date-submitted')
+    yield "no-keywords", page.replace('name="citation_keywords"', 'name="citation_subject"')
+    yield "decoy", page.replace('<div class="list-group">',
+                                '<div class="list-group"><div class="date-published-note">Published: 1 May 2020</div>')
+    yield "latin-1", page.replace('<meta charset="utf-8">', '<meta charset="iso-8859-1">').replace(
+        "Machine Learning", "Réseaux").encode("iso-8859-1")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--pages-dir", default=None)
+    args = parser.parse_args()
+
+    pages = [(name, page if isinstance(page, bytes) else page.encode("utf-8")) for name, page in variants()]
+    if args.pages_dir:
+        pages += [(path.name, path.read_bytes()) for path in sorted(Path(args.pages_dir).glob("*.html"))]
+
+    print(f"{'page':<16} {'KB':>6} {'soup ms':>8} {'fast ms':>8} {'speedup':>8} identical")
+    total = {"soup": 0.0, "fast": 0.0}
+    all_identical = True
+    for name, content in pages:
+        timings = {}
+        results = {}
+        for engine, parse in [("soup", soup_article_page), ("fast", scan_article_page)]:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                results[engine] = parse(content)
+            timings[engine] = (time.perf_counter() - started) / args.repeat
+            total[engine] += timings[engine]
+        identical = results["soup"] == results["fast"]
+        all_identical = all_identical and identical
+        print(f"{name:<16} {len(content) / 1024:>6.0f} {timings['soup'] * 1000:>8.2f} {timings['fast'] * 1000:>8.2f} "
+              f"{timings['soup'] / timings['fast']:>7.1f}x {identical}")
+    print(f"{'total':<16} {'':>6} {total['soup'] * 1000:>8.2f} {total['fast'] * 1000:>8.2f} "
+          f"{total['soup'] / total['fast']:>7.1f}x {all_identical}")
+
+
+if __name__ == "__main__":
+    main()
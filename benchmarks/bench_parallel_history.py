@@ -0,0 +1,52 @@
+"""Long-PDF history scan: serial vs page ranges across worker processes.
+
+    python -m benchmarks.bench_parallel_history --pages 200 --workers 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import make_pdf
+from jatsgen.history import get_pool, scan_history
+from jatsgen.pipeline import open_pdf
+
+
+def scan(source, workers):
+    with open_pdf(source) as doc:
+        started = time.perf_counter()
+        result = scan_history(doc, workers=workers, source=source)
+        return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=max(os.cpu_count() or 2, 2))
+    args = parser.parse_args()
+
+    placements = {"first": 0, "deep": args.pages * 3 // 4, "near-end": args.pages - 5, "none": None}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for name, history_page in placements.items():
+            paths[name] = os.path.join(tmp, f"{name}.pdf")
+            make_pdf(paths[name], pages=args.pages, history_page=history_page)
+
+        # Pool start-up is paid once per process; time it on its own
+        started = time.perf_counter()
+        get_pool(args.workers).submit(os.getpid).result()
+        print(f"pool start-up ({args.workers} workers): {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        print(f"{'placement':<10} {'serial ms':>9} {'parallel ms':>11} {'speedup':>8} {'page':>5} identical")
+        for name, path in paths.items():
+            serial, serial_seconds = scan(path, 0)
+            with open(path, "rb") as f:
+                data = f.read()
+            parallel, parallel_seconds = scan(data, args.workers)  # In-memory upload, as in the app
+            identical = serial[:3] == parallel[:3]
+            print(f"{name:<10} {serial_seconds * 1000:>9.1f} {parallel_seconds * 1000:>11.1f} "
+                  f"{serial_seconds / parallel_seconds:>7.1f}x {str(serial.page):>5} {identical}")
+
+
+if __name__ == "__main__":
+    main()
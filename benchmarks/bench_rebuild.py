@@ -0,0 +1,70 @@
+"""Incremental rebuild of an issue folder: full build, no-op rebuild and a one-file fix, vs one article alone.
+
+    python -m benchmarks.bench_rebuild --articles 60
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import history_line, issue_pages, make_issue, make_pdf, serve_pages
+from jatsgen.batch import run_batch
+from jatsgen.rebuild import rebuild
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in journal site delay per request (s)")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(args.articles), args.latency) as base_url:
+        os.chdir(tmp)  # Fresh HTTP and result caches
+        try:
+            manifest = make_issue(Path(tmp) / "issue", base_url, args.articles)
+            out = Path(tmp) / "out"
+            options = dict(workers=args.workers, cache=False)
+
+            _, full = timed(lambda: rebuild(manifest, out, **options))
+            noop, noop_seconds = timed(lambda: rebuild(manifest, out, **options))
+            noop_pages, noop_pages_seconds = timed(lambda: rebuild(manifest, out, check_pages=False, **options))
+
+            # Correct one article's PDF: a new history line
+            make_pdf(Path(tmp) / "issue" / "article7.pdf", line=history_line(7).replace("2024", "2023", 1))
+            fixed, fixed_seconds = timed(lambda: rebuild(manifest, out, check_pages=False, **options))
+            fixed_checked, _ = timed(lambda: rebuild(manifest, out, **options))
+
+            # The same article generated on its own, as the reference for "one article"
+            single = Path(tmp) / "single.csv"
+            with open(manifest, encoding="utf-8", newline="") as f:
+                rows = list(csv.reader(f))
+            with open(single, "w", encoding="utf-8", newline="") as f:
+                csv.writer(f).writerows([rows[0], [str(Path(tmp) / "issue" / cell) if cell.endswith((".pdf", ".xml")) else cell
+                                                   for cell in rows[7]]])
+            _, single_seconds = timed(lambda: run_batch(single, Path(tmp) / "single", workers=1, cache=False))
+        finally:
+            os.chdir(cwd)
+
+    rebuilt = lambda results: sum(result["status"] != "unchanged" for result in results)
+    print(f"articles={args.articles}")
+    print(f"full build                     {full:>7.2f}s")
+    print(f"no-op rebuild (pages checked)  {noop_seconds:>7.2f}s  rebuilt {rebuilt(noop)}")
+    print(f"no-op rebuild (files only)     {noop_pages_seconds:>7.2f}s  rebuilt {rebuilt(noop_pages)}")
+    print(f"one PDF fixed (files only)     {fixed_seconds:>7.2f}s  rebuilt {rebuilt(fixed)} (row {[r['row'] for r in fixed if r['status'] != 'unchanged']})")
+    print(f"one article on its own         {single_seconds:>7.2f}s")
+    print(f"after the fix, pages checked   rebuilt {rebuilt(fixed_checked)}")
+    return 0 if rebuilt(noop) == 0 and rebuilt(fixed) == 1 and rebuilt(fixed_checked) == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+"""Serial vs concurrent article page scraping against a local stand-in with artificial latency.
+
+    python -m benchmarks.bench_scrape --articles 40 --latency 0.2 --per-host 8
+"""
+import argparse
+import time
+
+from benchmarks.fixtures import article_path, issue_pages, serve_pages
+from jatsgen.fetch import PageFetcher
+from jatsgen.scrape import PER_HOST, prefetch_pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--per-host", type=int, default=PER_HOST)
+    parser.add_argument("--rate", type=float, default=None)
+    args = parser.parse_args()
+
+    with serve_pages(issue_pages(args.articles), args.latency) as base_url:
+        urls = [base_url + article_path(index) for index in range(1, args.articles + 1)]
+
+        started = time.perf_counter()
+        fetcher = PageFetcher(cache_dir=None)
+        serial = {url: fetcher.article_page(url) for url in urls}
+        serial_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        concurrent = prefetch_pages(urls, PageFetcher(cache_dir=None), per_host=args.per_host, rate=args.rate)
+        concurrent_seconds = time.perf_counter() - started
+
+    print(f"serial     pages={len(serial)} seconds={serial_seconds:.2f}")
+    print(f"concurrent pages={len(concurrent)} seconds={concurrent_seconds:.2f} "
+          f"per_host={args.per_host} rate={args.rate} speedup={serial_seconds / concurrent_seconds:.1f}x")
+    print(f"identical={serial == concurrent}")
+
+
+if __name__ == "__main__":
+    main()
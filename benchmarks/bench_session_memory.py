@@ -0,0 +1,89 @@
+"""Server memory per session for the app's results: strings in session state vs the per-session disk store.
+
+    python -m benchmarks.bench_session_memory --sessions 24 --template-refs 20000
+
+Each simulated session holds what the app keeps after Generate XML + Combine: the processed
+XML and the combined document. "Retained" is the Python heap still held once every session has
+its results (what stays resident while the sessions are open). Before the store, the eager
+download buttons also registered the whole document with Streamlit's in-memory media store
+on every rerun; deferred downloads don't, and that copy is not counted here.
+"""
+import xml.etree.ElementTree as ET
+import argparse
+import io
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.fixtures import make_input_xml, make_template
+from jatsgen.article_page import ArticlePage
+from jatsgen.fetch import PageFetcher
+from jatsgen.pipeline import combine_template, find_article, process_article
+from jatsgen.results import SessionStore
+
+DATES = (("2024", "01", "02"), ("2024", "03", "02"))
+
+
+def processed_xml():
+    # Page data seeded so no request is made; only the size of the result matters here
+    fetcher = PageFetcher(cache_dir=None, pages={"": ArticlePage(("2024", "06", "14"), ["Keyword"])})
+    return process_article(find_article(ET.fromstring(make_input_xml(1))), "", "", DATES, fetcher=fetcher)
+
+
+def inline_session(template, processed):
+    combined = io.BytesIO()
+    combine_template(template, processed, combined)
+    return {"processed_xml": processed, "final_combined_xml": combined.getvalue()}
+
+
+def stored_session(template, processed, root, index):
+    store = SessionStore(f"session{index}", root=root)
+    combined = store.writer("combined")
+    encoding = combine_template(template, processed, combined)
+    return {"processed_xml": store.put("processed", processed), "final_combined_xml": combined.result(encoding)}
+
+
+def measure(build, sessions):
+    tracemalloc.start()
+    try:
+        state = [build(index) for index in range(sessions)]
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return state, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=24)
+    parser.add_argument("--template-refs", type=int, default=20000, help="References in the template (20000 is ~7 MB)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path = os.path.join(tmp, "template.xml")
+        make_template(template_path, references=args.template_refs)
+        with open(template_path, "rb") as f:
+            template = f.read()
+        processed = processed_xml()
+
+        inline, inline_retained, inline_peak = measure(lambda index: inline_session(template, processed), args.sessions)
+        root = os.path.join(tmp, "results")
+        stored, stored_retained, stored_peak = measure(
+            lambda index: stored_session(template, processed, root, index), args.sessions)
+
+        identical = all(
+            old["final_combined_xml"] == new["final_combined_xml"].read() for old, new in zip(inline, stored)
+        )
+        disk = sum(entry.stat().st_size for session in os.scandir(root) for entry in os.scandir(session.path))
+
+    mb = 1024 * 1024
+    print(f"sessions={args.sessions} combined document {len(inline[0]['final_combined_xml']) / mb:.2f} MB")
+    print(f"{'':<16}{'retained MB':>12}{'per session':>13}{'peak MB':>9}")
+    for name, retained, peak in [("session state", inline_retained, inline_peak), ("disk store", stored_retained, stored_peak)]:
+        print(f"{name:<16}{retained / mb:>12.2f}{retained / args.sessions / mb:>13.3f}{peak / mb:>9.2f}")
+    print(f"on disk {disk / mb:.1f} MB, results identical: {identical}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+"""Concurrent in-memory sessions: several uploads processed at once must not see each other's data.
+
+    python -m benchmarks.bench_sessions --sessions 16
+"""
+import xml.etree.ElementTree as ET
+import argparse
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import article_path, history_line, issue_pages, make_input_xml, make_pdf, make_template, serve_pages
+from jatsgen.fetch import PageFetcher
+from jatsgen.pipeline import (
+    build_article,
+    build_front,
+    extract_history_from_pdf,
+    find_article,
+    generate_filename,
+    serialize_article,
+    splice_template,
+)
+
+
+def run_session(pdf_data, xml_data, template_data, article_url):
+    """What generate_article + combine_with_template do for one browser session, minus the UI"""
+    root = ET.fromstring(memoryview(xml_data))
+    fetcher = PageFetcher(cache_dir=None)
+    filename = generate_filename(article_url, root, fetcher=fetcher)
+    dates = extract_history_from_pdf(memoryview(pdf_data))
+    processed_xml = serialize_article(build_article(find_article(root), article_url, "", dates, fetcher=fetcher))
+    combined = io.BytesIO()
+    splice_template(memoryview(template_data), build_front(processed_xml), combined)
+    return filename, combined.getvalue().decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(args.sessions), 0.05) as base_url:
+        template_path = os.path.join(tmp, "template.xml")
+        make_template(template_path)
+        with open(template_path, "rb") as f:
+            template_data = f.read()
+
+        inputs = []
+        for index in range(1, args.sessions + 1):
+            pdf_path = os.path.join(tmp, f"{index}.pdf")
+            make_pdf(pdf_path, line=history_line(index))
+            with open(pdf_path, "rb") as f:
+                pdf_data = f.read()
+            inputs.append((pdf_data, make_input_xml(index).encode("utf-8"), template_data, base_url + article_path(index)))
+
+        started = time.perf_counter()
+        expected = [run_session(*session) for session in inputs]
+        serial_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            results = list(pool.map(lambda session: run_session(*session), inputs))
+        concurrent_seconds = time.perf_counter() - started
+
+    crosstalk = [index + 1 for index, (result, serial) in enumerate(zip(results, expected)) if result != serial]
+    own_doi = all(f"10.33093/jiwe.2024.3.2.{index + 1}<" in xml for index, (_, xml) in enumerate(results))
+    print(f"sessions={args.sessions} serial={serial_seconds:.2f}s concurrent={concurrent_seconds:.2f}s")
+    print(f"cross-talk={crosstalk or 'none'} own-doi={own_doi}")
+    return 1 if crosstalk or not own_doi else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,45 @@
+"""App cold start: import time and first render of the Streamlit script, each in a fresh interpreter.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --script old_test.py   # compare against another revision
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import jatsgen.pipeline, jatsgen.fetch, jatsgen.cache
+imported = time.perf_counter() - started
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+started = time.perf_counter()
+app.run()
+rendered = time.perf_counter() - started
+heavy = [name for name in ("fitz", "pymupdf", "bs4", "requests") if name in sys.modules]
+print(json.dumps({"import": imported, "render": rendered, "heavy": heavy, "errors": len(app.exception)}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--script", default="test.py")
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, "-c", PROBE, args.script], capture_output=True, text=True, check=True)
+        samples.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    for field in ("import", "render"):
+        values = [sample[field] * 1000 for sample in samples]
+        print(f"{field:<7} median={statistics.median(values):8.1f}ms  min={min(values):8.1f}ms")
+    print(f"heavy modules loaded by first render: {samples[-1]['heavy'] or 'none'}; errors={samples[-1]['errors']}")
+
+
+if __name__ == "__main__":
+    main()
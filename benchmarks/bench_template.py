@@ -0,0 +1,65 @@
+"""Peak memory of the template splice: whole-string legacy combine vs the streaming splice.
+
+    python -m benchmarks.bench_template --sizes 1 8 32
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fixtures import make_template
+
+FRONT = "<front>\n  <Article>\n    <article-meta/>\n  </Article>\n</front>"
+
+
+def legacy_combine(template_path, out_path):
+    with open(template_path, "r", encoding="utf-8") as f:
+        template_content = f.read()
+    front_start = template_content.find("<front>")
+    front_end = template_content.find("</front>")
+    combined_content = template_content[:front_start] + FRONT + template_content[front_end + len("</front>"):]
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(combined_content)
+
+
+def streaming_combine(template_path, out_path):
+    from jatsgen.pipeline import splice_template
+
+    with open(template_path, "rb") as template, open(out_path, "wb") as out:
+        splice_template(template, FRONT, out)
+
+
+def measure(combine, template_path, out_path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    combine(template_path, out_path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 8, 32], help="Template sizes in MB")
+    args = parser.parse_args()
+
+    import jatsgen.pipeline  # Keep import cost out of the measurements
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'template':>9} {'combine':<10} {'seconds':>8} {'peak MB':>8}")
+        for size in args.sizes:
+            template_path = os.path.join(tmp, f"template{size}.xml")
+            make_template(template_path, references=size * 1024 * 1024 // 330)
+            megabytes = os.path.getsize(template_path) / 1e6
+            for name, combine in [("legacy", legacy_combine), ("streaming", streaming_combine)]:
+                out_path = os.path.join(tmp, f"{name}{size}.xml")
+                elapsed, peak = measure(combine, template_path, out_path)
+                print(f"{megabytes:>7.1f}MB {name:<10} {elapsed:>8.3f} {peak / 1e6:>8.2f}")
+            with open(os.path.join(tmp, f"legacy{size}.xml"), "rb") as a, open(os.path.join(tmp, f"streaming{size}.xml"), "rb") as b:
+                print(f"{'':>9} identical={a.read() == b.read()}")
+
+
+if __name__ == "__main__":
+    main()
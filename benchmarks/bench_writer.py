@@ -0,0 +1,145 @@
+"""Output writer: the old indent()/copy_element round-trip vs the single-pass writer, byte for byte.
+
+    python -m benchmarks.bench_writer --authors 400 --abstract-words 20000
+"""
+import xml.etree.ElementTree as ET
+import argparse
+import time
+
+from benchmarks.fixtures import make_input_xml
+from jatsgen.article_page import ArticlePage
+from jatsgen.fetch import PageFetcher
+from jatsgen.pipeline import build_article, build_front, find_article, serialize_article
+
+ARTICLE_URL = "https://journals.mmupress.com/index.php/jiwe/article/view/1"
+PAGE = ArticlePage(("2024", "06", "14"), ["Machine Learning", "R&D <pilot>", "Web \"Engineering\""])
+DATES = (("2024", "01", "05"), ("2024", "03", "20"))
+
+
+def legacy_indent(elem, level=0):
+    indent_str = "  "
+    newline = "\n"
+
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = newline + indent_str * (level + 1)
+
+        for i, child in enumerate(elem):
+            legacy_indent(child, level + 1)
+
+            if i < len(elem) - 1:
+                if not child.tail or not child.tail.strip():
+                    child.tail = newline + indent_str * (level + 1)
+            else:
+                if not child.tail or not child.tail.strip():
+                    child.tail = newline + indent_str * level
+
+    else:
+        if level > 0 and (not elem.tail or not elem.tail.strip()):
+            elem.tail = newline + indent_str * level
+
+
+def legacy_serialize(article_out):
+    legacy_indent(article_out)
+    return ET.tostring(article_out, encoding='utf-8', method='xml').decode()
+
+
+def legacy_front(processed_xml):
+    processed_root = ET.fromstring(processed_xml)
+    front = ET.Element("front")
+    front.text = "\n  "
+    article = ET.SubElement(front, "Article")
+    article.text = "\n    "
+
+    def copy_element(source, target, indent_level):
+        indent = "  " * indent_level
+        for elem in source:
+            new_elem = ET.SubElement(target, elem.tag)
+            if elem.text:
+                new_elem.text = elem.text
+            if elem.attrib:
+                new_elem.attrib.update(elem.attrib)
+            new_elem.tail = f"\n{indent}"
+            if len(elem) > 0:
+                new_elem.text = f"\n{indent}  "
+                copy_element(elem, new_elem, indent_level + 1)
+                new_elem[-1].tail = f"\n{indent}"
+
+    journal_meta = processed_root.find("Journal-meta")
+    if journal_meta is not None:
+        new_journal_meta = ET.SubElement(article, "Journal-meta")
+        new_journal_meta.text = "\n      "
+        copy_element(journal_meta, new_journal_meta, 3)
+        new_journal_meta[-1].tail = "\n    "
+        new_journal_meta.tail = "\n    "
+
+    article_meta = processed_root.find("article-meta")
+    if article_meta is not None:
+        new_article_meta = ET.SubElement(article, "article-meta")
+        new_article_meta.text = "\n      "
+        copy_element(article_meta, new_article_meta, 3)
+        new_article_meta[-1].tail = "\n    "
+        new_article_meta.tail = "\n  "
+
+    article.tail = "\n"
+    return ET.tostring(front, encoding='utf-8').decode()
+
+
+def variants(authors, abstract_words):
+    """Input XMLs covering the markup the writer has to reproduce exactly"""
+    plain = make_input_xml(1, authors=authors, abstract_words=abstract_words)
+    yield "plain", plain
+    yield "mixed", plain.replace(
+        "<Affiliation>Faculty of Computing, Multimedia University</Affiliation>",
+        "<Affiliation>Faculty of <i>Computing</i>, Multimedia <sup>1</sup> University</Affiliation>")
+    yield "escapes", plain.replace("word1 ", "R&amp;D &lt;x&gt; \"quoted\" 'single' ").replace(
+        "<Author>", '<Author ValidYN="Y" Note="a &amp; &quot;b&quot;&#10;c&#9;d" xml:lang="en">')
+    yield "multiline", plain.replace("word2 ", "first line\n    second line\n\n").replace(
+        "<FirstName>Author0</FirstName>", "<FirstName>  </FirstName><Initials></Initials><Suffix/>")
+    yield "unicode", plain.replace("Synthetic Article", "Sintesis Artikel é中文 \U0001f4d8")
+    yield "no-authors", plain.replace("<AuthorList>", "<AuthorList-removed>").replace("</AuthorList>", "</AuthorList-removed>")
+
+
+def time_best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--authors", type=int, default=400)
+    parser.add_argument("--abstract-words", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fetcher = PageFetcher(cache_dir=None, pages={ARTICLE_URL: PAGE})
+
+    def build(xml):
+        return build_article(find_article(ET.fromstring(xml)), ARTICLE_URL, "", DATES, fetcher=fetcher)
+
+    # "direct" builds <front> from the Article element itself, skipping the parse of the serialized string
+    print(f"{'input':<12} {'old ms':>8} {'new ms':>8} {'speedup':>8} {'direct ms':>9} identical")
+    all_identical = True
+    for name, xml in variants(args.authors, args.abstract_words):
+        old_xml = legacy_serialize(build(xml))
+        new_xml = serialize_article(build(xml))
+        identical = (old_xml == new_xml and legacy_front(old_xml) == build_front(new_xml)
+                     and build_front(new_xml) == build_front(build(xml)))
+        all_identical = all_identical and identical
+
+        # Serialize + <front> rebuild, the work between a built Article and the template splice
+        article_out = build(xml)
+        old = time_best(lambda: legacy_front(legacy_serialize(article_out)), args.repeat)
+        new = time_best(lambda: build_front(serialize_article(article_out)), args.repeat)
+        direct = time_best(lambda: (serialize_article(article_out), build_front(article_out)), args.repeat)
+        print(f"{name:<12} {old * 1000:>8.1f} {new * 1000:>8.1f} {old / new:>7.1f}x {direct * 1000:>9.1f} {identical}")
+    print(f"all identical: {all_identical}")
+
+
+if __name__ == "__main__":
+    main()
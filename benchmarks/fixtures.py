@@ -0,0 +1,264 @@
+"""Synthetic issue fixtures: PDFs, input XML, article pages and Vertopal-style templates."""
+import csv
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+JOURNAL_TITLE = "Journal of Informatics and Web Engineering"
+ISSN = "2821-370X"
+FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore. " * 6
+
+
+def history_line(index):
+    day = index % 27 + 1
+    return f"Received: {day} January 2024, Accepted: {day} March 2024"
+
+
+def make_pdf(path, pages=8, history_page=0, line=None, footer=False):
+    """Write a PDF with filler text; the history line goes on history_page (None for no line)"""
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"Page {number + 1}\n" + "\n".join(FILLER[i:i + 90] for i in range(0, len(FILLER), 90))
+        if number == history_page and footer:
+            page.insert_text((72, page.rect.height - 48), line or history_line(0), fontsize=8)
+        elif number == history_page:
+            text = f"{line or history_line(0)}\n{text}"
+        page.insert_text((72, 72), text, fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+def make_article_xml(index, first_page=None, authors=3, abstract_words=250):
+    first_page = first_page or index * 12 + 1
+    author_xml = "".join(
+        f"<Author><FirstName>Author{n}</FirstName><LastName>Surname{index}x{n}</LastName>"
+        f"<Affiliation>Faculty of Computing, Multimedia University</Affiliation></Author>"
+        for n in range(authors)
+    )
+    abstract = " ".join(f"word{n}" for n in range(abstract_words))
+    return f"""  <Article>
+    <Journal>
+      <PublisherName>MMU Press</PublisherName>
+      <JournalTitle>{JOURNAL_TITLE}</JournalTitle>
+      <Issn>{ISSN}</Issn>
+      <Volume>3</Volume>
+      <Issue>2</Issue>
+      <PubDate PubStatus="epublish"><Year>2024</Year><Month>06</Month><Day>14</Day></PubDate>
+    </Journal>
+    <ArticleTitle>Synthetic Article {index}</ArticleTitle>
+    <FirstPage>{first_page}</FirstPage>
+    <LastPage>{first_page + 11}</LastPage>
+    <ELocationID EIdType="doi">10.33093/jiwe.2024.3.2.{index}</ELocationID>
+    <Language>EN</Language>
+    <AuthorList>{author_xml}</AuthorList>
+    <Abstract>{abstract}</Abstract>
+  </Article>
+"""
+
+
+def make_input_xml(index, **kwargs):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<ArticleSet>
+{make_article_xml(index, **kwargs)}</ArticleSet>
+"""
+
+
+def make_articleset(path, count, **kwargs):
+    """Issue-wide ArticleSet, written article by article"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<ArticleSet>\n')
+        for index in range(1, count + 1):
+            f.write(make_article_xml(index, **kwargs))
+        f.write("</ArticleSet>\n")
+
+
+def make_article_page(index, references=200):
+    refs = "".join(f"<li class='reference'>Reference {n} for article {index}. {FILLER[:200]}</li>" for n in range(references))
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Synthetic Article {index}</title>
+<meta name="citation_title" content="Synthetic Article {index}">
+<meta name="citation_keywords" content="Machine Learning; Web Engineering">
+<meta name="citation_keywords" content="Benchmark {index}, Synthetic Data">
+</head>
+<body>
+<div class="page">
+<div class="list-group">
+<div class="list-group-item date-published"><strong>Published:</strong> 14 June 2024</div>
+</div>
+<ol class="references">{refs}</ol>
+<footer>{FILLER * 20}</footer>
+</div>
+</body>
+</html>
+"""
+
+
+def make_template(path, references=500):
+    refs = "\n".join(
+        f'      <ref id="ref{n}"><mixed-citation>{FILLER[:300]}</mixed-citation></ref>' for n in range(references)
+    )
+    Path(path).write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<article xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+        "<front>\n  <article-meta/>\n</front>\n"
+        f"<body>\n  <sec><p>{FILLER}</p></sec>\n</body>\n"
+        f"<back>\n  <ref-list>\n{refs}\n  </ref-list>\n</back>\n"
+        "</article>\n",
+        encoding="utf-8",
+    )
+
+
+@contextmanager
+def serve_pages(pages, latency=0.0, stats=None):
+    """Serve {path: html} from a local stand-in for the journal site; yields the base URL.
+
+    A value may also be a callable returning (status, html), e.g. to simulate a flaky server.
+    Connections are kept alive like the real site's; with a stats dict, the connections
+    opened and requests served are counted into it.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(connections=0, requests=0)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with lock:
+                stats["connections"] += 1
+
+        def do_GET(self):
+            with lock:
+                stats["requests"] += 1
+            time.sleep(latency)
+            body = pages.get(self.path)
+            status = 200
+            if callable(body):
+                status, body = body()
+            if body is None or status != 200:
+                self.send_error(404 if body is None else status)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client timed out first (the "hanging" pages)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def article_path(index):
+    return f"/index.php/jiwe/article/view/{1000 + index}"
+
+
+def make_issue(directory, base_url, count, pdf_pages=8, template_refs=500):
+    """Write PDFs, XMLs, templates and a batch manifest for a synthetic issue"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    make_template(directory / "template.xml", references=template_refs)
+
+    manifest = directory / "manifest.csv"
+    with open(manifest, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["pdf", "xml", "article_url", "pdf_link", "template"])
+        for index in range(1, count + 1):
+            make_pdf(directory / f"article{index}.pdf", pages=pdf_pages, history_page=0, line=history_line(index))
+            (directory / f"article{index}.xml").write_text(make_input_xml(index), encoding="utf-8")
+            url = base_url + article_path(index)
+            writer.writerow([f"article{index}.pdf", f"article{index}.xml", url, f"{url}/pdf", "template.xml"])
+    return manifest
+
+
+def make_issue_articleset(directory, base_url, count, pdf_pages=8, template_refs=500):
+    """ArticleSet, PDFs, template and an issue manifest matching rows by DOI (odd) or first page (even)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    make_template(directory / "template.xml", references=template_refs)
+    make_articleset(directory / "articleset.xml", count)
+
+    manifest = directory / "issue_manifest.csv"
+    with open(manifest, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["doi", "first_page", "pdf", "article_url", "pdf_link"])
+        for index in range(1, count + 1):
+            make_pdf(directory / f"article{index}.pdf", pages=pdf_pages, history_page=0, line=history_line(index))
+            url = base_url + article_path(index)
+            doi, first_page = (f"10.33093/jiwe.2024.3.2.{index}", "") if index % 2 else ("", index * 12 + 1)
+            writer.writerow([doi, first_page, f"article{index}.pdf", url, f"{url}/pdf"])
+    return directory / "articleset.xml", manifest
+
+
+TOC_PATH = "/index.php/jiwe/issue/view/42"
+
+
+def make_toc_page(count):
+    """Issue TOC in the OJS default theme's markup: title link, pages, DOI (odd articles) and galleys.
+
+    The sidebar links one more article, which is not part of the issue.
+    """
+    summaries = []
+    for index in range(1, count + 1):
+        path = article_path(index)
+        doi = f"10.33093/jiwe.2024.3.2.{index}"
+        doi_line = f'<div class="doi">DOI: <a href="https://doi.org/{doi}">https://doi.org/{doi}</a></div>' if index % 2 else ""
+        summaries.append(f"""<li>
+<div class="obj_article_summary">
+<div class="cover"><a href="{path}" class="file"><img src="/public/cover{index}.png" alt=""></a></div>
+<h3 class="title"><a id="article-{1000 + index}" href="{path}">Synthetic Article {index}</a></h3>
+<div class="meta"><div class="authors">Author0 Surname{index}x0, Author1 Surname{index}x1</div>
+<div class="pages">{index * 12 + 1}-{index * 12 + 12}</div>{doi_line}</div>
+<ul class="galleys_links">
+<li><a class="obj_galley_link file" href="{path}/{700 + index}">HTML</a></li>
+<li><a class="obj_galley_link pdf" href="{path}/pdf">PDF</a></li>
+</ul>
+</div>
+</li>""")
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Vol. 3 No. 2 (2024) | {JOURNAL_TITLE}</title></head>
+<body>
+<div class="pkp_structure_main">
+<div class="obj_issue_toc">
+<div class="heading"><div class="published"><span class="label">Published:</span> 2024-06-14</div></div>
+<div class="sections"><div class="section"><h2>Articles</h2>
+<ul class="cmp_article_list articles">
+{"".join(summaries)}
+</ul>
+</div></div>
+</div>
+</div>
+<div class="pkp_structure_sidebar">
+<div class="pkp_block block_popular"><h2>Most Read</h2><ul><li><a href="{article_path(count + 1)}">An older article</a></li></ul></div>
+</div>
+</body>
+</html>
+"""
+
+
+def issue_pages(count):
+    pages = {article_path(index): make_article_page(index) for index in range(1, count + 1)}
+    pages[TOC_PATH] = make_toc_page(count)
+    return pages
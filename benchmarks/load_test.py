@@ -0,0 +1,128 @@
+"""Load test for the job queue: many sessions submit Generate XML at once and poll until done.
+
+    python -m benchmarks.load_test --sessions 32 --workers 4 --latency 0.2
+
+Each simulated session submits one article (distinct PDF, XML and article page served with
+--latency seconds of delay), then polls its job every --poll seconds as the app's status
+fragment does. Reported per session: submit latency (how long the script run is held),
+poll latency, and end-to-end time until the result is ready. The baseline runs the same
+work inline in every session's script thread, as the app did before the queue, where the
+script run is held for the whole job.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.fixtures import article_path, history_line, issue_pages, make_input_xml, make_pdf, serve_pages
+from jatsgen.jobs import JobQueue
+from jatsgen.pipeline import generate_article
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": values[-1]}
+
+
+def report(name, values):
+    stats = percentiles(values)
+    print(f"  {name:<14}" + "".join(f" {key} {value * 1000:>8.1f} ms" for key, value in stats.items()))
+
+
+def run_job(job, pdf_data, xml_data, article_url):
+    return generate_article(pdf_data, xml_data, article_url, "", warn=job.warn, error=job.fail, progress=job.progress)
+
+
+def queued_session(queue, inputs, poll, timings, results, index):
+    started = time.perf_counter()
+    job_id = queue.submit(run_job, *inputs, labels={"step": "process"})
+    timings["submit"].append(time.perf_counter() - started)
+    while True:
+        time.sleep(poll)
+        polled = time.perf_counter()
+        job = queue.get(job_id)
+        queue.position(job_id)  # The status fragment also shows the queue position
+        timings["poll"].append(time.perf_counter() - polled)
+        if job.done:
+            break
+    timings["end_to_end"].append(time.perf_counter() - started)
+    results[index] = queue.pop(job_id)
+
+
+def inline_session(inputs, timings, results, index):
+    started = time.perf_counter()
+    results[index] = generate_article(*inputs, "")
+    timings["submit"].append(time.perf_counter() - started)
+    timings["end_to_end"].append(time.perf_counter() - started)
+
+
+def run_sessions(target, session_args):
+    threads = [threading.Thread(target=target, args=args) for args in session_args]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def make_inputs(directory, base_url, indexes):
+    inputs = []
+    for index in indexes:
+        pdf_path = os.path.join(directory, f"{index}.pdf")
+        make_pdf(pdf_path, line=history_line(index))
+        with open(pdf_path, "rb") as f:
+            pdf_data = f.read()
+        inputs.append((pdf_data, make_input_xml(index).encode("utf-8"), base_url + article_path(index)))
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4, help="Job queue threads")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stand-in journal site delay per request (s)")
+    parser.add_argument("--poll", type=float, default=0.5, help="Seconds between status polls")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(args.sessions * 2), args.latency) as base_url:
+        os.chdir(tmp)  # Fresh HTTP cache; the two runs use different articles so neither warms the other
+        try:
+            inline_inputs = make_inputs(tmp, base_url, range(1, args.sessions + 1))
+            queued_inputs = make_inputs(tmp, base_url, range(args.sessions + 1, args.sessions * 2 + 1))
+
+            inline_timings = {"submit": [], "end_to_end": []}
+            inline_results = [None] * args.sessions
+            inline_seconds = run_sessions(inline_session, [
+                (inputs, inline_timings, inline_results, index) for index, inputs in enumerate(inline_inputs)
+            ])
+
+            queue = JobQueue(workers=args.workers)
+            queued_timings = {"submit": [], "poll": [], "end_to_end": []}
+            queued_results = [None] * args.sessions
+            queued_seconds = run_sessions(queued_session, [
+                (queue, inputs, args.poll, queued_timings, queued_results, index) for index, inputs in enumerate(queued_inputs)
+            ])
+        finally:
+            os.chdir(cwd)
+
+    print(f"sessions={args.sessions} workers={args.workers} latency={args.latency}s poll={args.poll}s")
+    print(f"inline (script thread held for the whole job): wall {inline_seconds:.2f}s")
+    for name, values in inline_timings.items():
+        report(name, values)
+    print(f"queued: wall {queued_seconds:.2f}s")
+    for name, values in queued_timings.items():
+        report(name, values)
+
+    failed = [index + args.sessions + 1 for index, job in enumerate(queued_results) if job is None or job.error is not None]
+    own_doi = all(f"10.33093/jiwe.2024.3.2.{index + args.sessions + 1}<" in (job.result["processed_xml"] or "")
+                  for index, job in enumerate(queued_results) if job is not None and job.error is None)
+    print(f"failed jobs={failed or 'none'} own-doi={own_doi}")
+    return 1 if failed or not own_doi else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+"""Per-stage benchmark suite over offline synthetic fixtures, reported as JSON.
+
+    python -m benchmarks.suite --articles 20 --out bench.json
+    python -m benchmarks.suite --baseline bench.json --tolerance 0.25   # exit 1 on a regression
+
+Each stage runs over every article of a synthetic issue (PDFs with the history line on
+varying pages, an issue ArticleSet, article pages from a local stand-in server, a large
+Vertopal-style template) with the result and HTTP caches off. Seconds are the best of
+--repeat runs; peak_mb is the Python heap peak of a separate tracemalloc run (PyMuPDF's
+own C allocations are not included).
+"""
+import xml.etree.ElementTree as ET
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.fixtures import article_path, history_line, issue_pages, make_articleset, make_pdf, make_template, serve_pages
+from jatsgen.articleset import article_document, iter_articles
+from jatsgen.fetch import PageFetcher
+from jatsgen.pipeline import combine_template, extract_history_from_pdf, find_article, generate_filename, process_article
+from jatsgen.scrape import prefetch_pages
+from jatsgen.validate import validate_document
+
+# Differences below these are noise on a shared machine, whatever the tolerance
+MIN_DELTA = {"seconds": 0.005, "peak_mb": 0.25}
+STAGES = ["articleset", "scrape", "generate_filename", "extract_history_from_pdf", "process_files",
+          "combine_with_template", "validate"]
+
+
+def history_layout(index, pages):
+    """Spread the history line over the layouts the scanner meets: header, page 2, last page, footer, mid, none"""
+    layouts = [
+        dict(history_page=0),
+        dict(history_page=1),
+        dict(history_page=pages - 1),
+        dict(history_page=0, footer=True),
+        dict(history_page=pages // 2),
+        dict(history_page=None),
+    ]
+    return layouts[index % len(layouts)]
+
+
+def make_fixtures(directory, base_url, count, pdf_pages, template_refs):
+    directory = Path(directory)
+    make_articleset(directory / "articleset.xml", count)
+    make_template(directory / "template.xml", references=template_refs)
+    pdfs = []
+    for index in range(1, count + 1):
+        path = directory / f"article{index}.pdf"
+        make_pdf(path, pages=pdf_pages, line=history_line(index), **history_layout(index, pdf_pages))
+        pdfs.append(path.read_bytes())
+    return {
+        "articleset": directory / "articleset.xml",
+        "template": (directory / "template.xml").read_bytes(),
+        "pdfs": pdfs,
+        "urls": [base_url + article_path(index) for index in range(1, count + 1)],
+    }
+
+
+class Stages:
+    """Stage runners; each returns the number of items it processed. Later stages reuse earlier outputs."""
+
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.documents = []
+        self.pages = {}
+        self.dates = []
+        self.processed = []
+        self.combined = []
+
+    def articleset(self):
+        self.documents = [article_document(article) for article in iter_articles(self.fixtures["articleset"])]
+        return len(self.documents)
+
+    def scrape(self):
+        self.pages = prefetch_pages(self.fixtures["urls"], PageFetcher(cache_dir=None))
+        return len(self.pages)
+
+    def _fetcher(self):
+        # Seeded with the scrape stage's pages so later stages time their own work, not the network
+        return PageFetcher(cache_dir=None, pages=dict(self.pages))
+
+    def generate_filename(self):
+        fetcher = self._fetcher()
+        for document, url in zip(self.documents, self.fixtures["urls"]):
+            generate_filename(url, ET.fromstring(document), fetcher=fetcher)
+        return len(self.documents)
+
+    def extract_history_from_pdf(self):
+        self.dates = [extract_history_from_pdf(pdf) for pdf in self.fixtures["pdfs"]]
+        return len(self.dates)
+
+    def process_files(self):
+        fetcher = self._fetcher()
+        self.processed = [
+            process_article(find_article(ET.fromstring(document)), url, url + "/pdf", dates, fetcher=fetcher)
+            for document, url, dates in zip(self.documents, self.fixtures["urls"], self.dates)
+        ]
+        return len(self.processed)
+
+    def combine_with_template(self):
+        self.combined = []
+        for processed_xml in self.processed:
+            out = io.BytesIO()
+            combine_template(self.fixtures["template"], processed_xml, out)
+            self.combined.append(out.getvalue())
+        return len(self.combined)
+
+    def validate(self):
+        for document in self.combined:
+            validate_document(document)
+        return len(self.combined)
+
+
+def measure(stages, name, repeat):
+    run = getattr(stages, name)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "items": items,
+        "seconds": round(best, 4),
+        "items_per_second": round(items / best, 2) if best else None,
+        "peak_mb": round(peak / (1024 * 1024), 3),
+    }
+
+
+def run_suite(articles=20, pdf_pages=12, template_refs=5000, latency=0.02, repeat=3):
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(issue_pages(articles), latency) as base_url:
+        fixtures = make_fixtures(tmp, base_url, articles, pdf_pages, template_refs)
+        stages = Stages(fixtures)
+        results = {name: measure(stages, name, repeat) for name in STAGES}
+        template_mb = len(fixtures["template"]) / (1024 * 1024)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "articles": articles,
+            "pdf_pages": pdf_pages,
+            "template_mb": round(template_mb, 2),
+            "latency": latency,
+            "repeat": repeat,
+        },
+        "stages": results,
+    }
+
+
+def regressions(report, baseline, tolerance):
+    """Stages slower, or with a higher memory peak, than baseline by more than tolerance"""
+    found = []
+    for name, stage in report["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            continue
+        for metric in ["seconds", "peak_mb"]:
+            if old[metric] and stage[metric] > max(old[metric] * (1 + tolerance), old[metric] + MIN_DELTA[metric]):
+                found.append(f"{name} {metric}: {old[metric]} -> {stage[metric]}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--pdf-pages", type=int, default=12)
+    parser.add_argument("--template-refs", type=int, default=5000, help="References in the template (5000 is ~1.7 MB)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated article page latency (s)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="Earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / memory growth (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    report = run_suite(args.articles, args.pdf_pages, args.template_refs, args.latency, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        found = regressions(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for line in found:
+            print(f"regression: {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
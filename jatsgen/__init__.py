@@ -0,0 +1 @@
+"""Journal Article XML Generator pipeline, usable without the Streamlit UI."""
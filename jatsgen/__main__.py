@@ -0,0 +1,207 @@
+import argparse
+import csv
+import logging
+import os
+import sys
+
+from jatsgen.archive import run_archive
+from jatsgen.article_page import ArticlePage
+from jatsgen.batch import read_manifest, run_batch, run_issue, write_report
+from jatsgen.metrics import METRICS_LOG, configure_log
+from jatsgen.rebuild import WATCH_INTERVAL, rebuild, watch
+from jatsgen.scrape import PER_HOST, save_snapshot
+from jatsgen.toc import TOC_FIELDS, discover_rows, save_toc_snapshot
+from jatsgen.validate import validate_files
+
+
+def add_run_options(command):
+    command.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    command.add_argument("--out", default="output", help="Directory for generated XML files")
+    command.add_argument("--report", default=None, help="Status report path (default: <out>/batch_report.csv)")
+    command.add_argument("--per-host", type=int, default=PER_HOST, help="Concurrent article page requests per host")
+    command.add_argument("--rate", type=float, default=None, help="Max article page requests per second per host")
+    command.add_argument("--no-prefetch", action="store_true", help="Scrape article pages one at a time inside each row")
+    command.add_argument("--no-cache", action="store_true", help="Recompute everything instead of using the result cache")
+    command.add_argument("--metrics", default=None, help="Write per-stage totals here in the Prometheus text format")
+    command.add_argument("--metrics-log", default=None, help="Append one JSON line of metrics per article here (- for stderr)")
+    command.add_argument("--no-validate", action="store_true", help="Skip the structure/schema check of each output")
+    command.add_argument("--offline", metavar="SNAPSHOT_DIR", default=None,
+                         help="Read article pages from a snapshot directory instead of the network")
+
+
+def validate(args):
+    reports = validate_files(args.files, workers=args.workers)
+    invalid = [report for report in reports if not report["valid"]]
+    for report in invalid:
+        print(f"{report['output']}: {report['problems']}", file=sys.stderr)
+    print(f"{len(reports) - len(invalid)}/{len(reports)} documents valid")
+    return 1 if invalid else 0
+
+
+def snapshot(args):
+    if args.toc:
+        pages = save_toc_snapshot(args.toc, args.out, per_host=args.per_host, rate=args.rate)
+    elif args.manifest:
+        rows = read_manifest(args.manifest, required=["article_url"])
+        pages = save_snapshot([row["article_url"] for row in rows], args.out, per_host=args.per_host, rate=args.rate)
+    else:
+        print("Give a manifest or --toc", file=sys.stderr)
+        return 2
+    failed = {url: page for url, page in pages.items() if not isinstance(page, ArticlePage)}
+    for url, error in failed.items():
+        print(f"{url}: {error}", file=sys.stderr)
+    print(f"{len(pages) - len(failed)}/{len(pages)} article pages saved in {args.out}")
+    return 1 if failed else 0
+
+
+def discover(args):
+    rows, _ = discover_rows(args.toc, per_host=args.per_host, rate=args.rate, cache=not args.no_cache,
+                            snapshot_dir=args.offline)
+    with open(args.out, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TOC_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    missing = [row for row in rows if not row["pdf_link"] or "page" not in row]
+    for row in missing:
+        problem = "no PDF galley link" if not row["pdf_link"] else "article page could not be fetched"
+        print(f"{row['article_url']}: {problem}", file=sys.stderr)
+    print(f"{len(rows)} articles listed in {args.out}")
+    return 1 if missing else 0
+
+
+def archive(args, options):
+    # The upload is read whole and processed in memory, as in the web app
+    with open(args.archive, "rb") as f:
+        data = f.read()
+    csv_data = None
+    if args.csv:
+        with open(args.csv, "rb") as f:
+            csv_data = f.read()
+    report_path = options.pop("report_path")
+    os.makedirs(args.out, exist_ok=True)
+    part_path = os.path.join(args.out, ".archive.zip.part")
+    try:
+        with open(part_path, "wb") as out:
+            results, unpaired, name = run_archive(data, out, csv_data=csv_data, toc_url=args.toc, **options)
+        os.replace(part_path, os.path.join(args.out, name))
+    finally:
+        if os.path.exists(part_path):
+            os.unlink(part_path)
+    for line in unpaired:
+        print(f"{line['source']}: {line['messages']}", file=sys.stderr)
+    if report_path:
+        write_report(results, report_path)
+    return report_results(results, os.path.join(args.out, name))
+
+
+def report_rebuild(results, out_dir):
+    unchanged = sum(result["status"] == "unchanged" for result in results)
+    code = report_results([result for result in results if result["status"] != "unchanged"], out_dir)
+    print(f"{unchanged} unchanged", flush=True)
+    return code
+
+
+def report_results(results, out_dir):
+    failed = [result for result in results if result["status"] != "ok"]
+    for result in failed:
+        print(f"row {result['row']}: {result['messages']}", file=sys.stderr)
+    invalid = [result for result in results if result["valid"] is False]
+    for result in invalid:
+        print(f"row {result['row']} failed validation: {result['problems']}", file=sys.stderr)
+    print(f"{len(results) - len(failed)}/{len(results)} articles generated in {out_dir}"
+          + (f", {len(invalid)} failed validation" if invalid else ""))
+    return 1 if failed else 0
+
+
+def add_article_set_option(command):
+    command.add_argument("--article-set", default=None,
+                         help="Also write every article's Journal-meta/article-meta, in page order, to this ArticleSet XML")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m jatsgen", description="Journal Article XML Generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Generate XML for every row of a manifest CSV")
+    batch.add_argument("manifest", help="CSV with pdf, xml, article_url, pdf_link, template columns")
+    add_run_options(batch)
+    add_article_set_option(batch)
+
+    issue = commands.add_parser("issue", help="Generate XML for every <Article> of an issue-wide ArticleSet")
+    issue.add_argument("articleset", help="ArticleSet XML covering the whole issue")
+    issue.add_argument("manifest", help="CSV with doi or first_page plus pdf, article_url, pdf_link, template columns")
+    issue.add_argument("--template", default="", help="Template for rows without their own template")
+    add_run_options(issue)
+    add_article_set_option(issue)
+
+    incremental = commands.add_parser("rebuild", help="Regenerate only the manifest rows whose inputs changed")
+    incremental.add_argument("manifest", help="CSV with pdf, xml, article_url, pdf_link, template columns")
+    add_run_options(incremental)
+    incremental.add_argument("--watch", action="store_true", help="Keep running and rebuild whenever input files change")
+    incremental.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="Seconds between checks in --watch mode")
+
+    bulk = commands.add_parser("archive", help="Generate XML for every article in a zip or tar of PDFs, XMLs and templates")
+    bulk.add_argument("archive", help="Zip or tar (optionally compressed) with the input XMLs, PDFs and templates")
+    urls = bulk.add_mutually_exclusive_group()
+    urls.add_argument("--csv", default=None, help="CSV with article_url and pdf_link (default: the one inside the archive)")
+    urls.add_argument("--toc", default=None, help="Issue table of contents URL to discover the article URLs from")
+    add_run_options(bulk)
+
+    find = commands.add_parser("discover", help="List every article URL and PDF link on an issue's table of contents")
+    find.add_argument("toc", help="Issue table of contents URL")
+    find.add_argument("--out", default="urls.csv", help="CSV to write (doi, first_page, article_url, pdf_link, title)")
+    find.add_argument("--per-host", type=int, default=PER_HOST, help="Concurrent article page requests per host")
+    find.add_argument("--rate", type=float, default=None, help="Max article page requests per second per host")
+    find.add_argument("--no-cache", action="store_true", help="Re-parse article pages instead of using the result cache")
+    find.add_argument("--offline", metavar="SNAPSHOT_DIR", default=None,
+                      help="Read the TOC and article pages from a snapshot directory instead of the network")
+
+    snap = commands.add_parser("snapshot", help="Save the article pages of a manifest for --offline runs")
+    snap.add_argument("manifest", nargs="?", help="Batch or issue manifest CSV (only article_url is read)")
+    snap.add_argument("--toc", default=None, help="Save an issue's table of contents and its article pages instead")
+    snap.add_argument("--out", default="snapshot", help="Snapshot directory")
+    snap.add_argument("--per-host", type=int, default=PER_HOST, help="Concurrent article page requests per host")
+    snap.add_argument("--rate", type=float, default=None, help="Max article page requests per second per host")
+
+    check = commands.add_parser("validate", help="Check generated XML files (rules, plus JATSGEN_SCHEMA if set)")
+    check.add_argument("files", nargs="+", help="Generated XML files")
+    check.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    if args.command == "snapshot":
+        return snapshot(args)
+    if args.command == "validate":
+        return validate(args)
+    if args.command == "discover":
+        return discover(args)
+    configure_log(args.metrics_log or METRICS_LOG)
+
+    options = dict(
+        workers=args.workers, report_path=args.report,
+        prefetch=not args.no_prefetch, per_host=args.per_host, rate=args.rate, cache=not args.no_cache,
+        metrics_path=args.metrics, snapshot_dir=args.offline, validate=not args.no_validate,
+    )
+    if args.command == "rebuild":
+        # Without prefetch, pages of unchanged rows aren't re-checked
+        options["check_pages"] = options.pop("prefetch")
+        if not args.watch:
+            return report_rebuild(rebuild(args.manifest, args.out, **options), args.out)
+        try:
+            for results in watch(args.manifest, args.out, interval=args.interval, **options):
+                report_rebuild(results, args.out)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == "archive":
+        return archive(args, options)
+    if args.command == "issue":
+        results = run_issue(args.articleset, args.manifest, args.out, template=args.template,
+                            article_set=args.article_set, **options)
+    else:
+        results = run_batch(args.manifest, args.out, article_set=args.article_set, **options)
+    return report_results(results, args.out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""Bulk uploads: one zip or tar of PDFs, input XMLs and templates plus a CSV of URLs, read in memory.
+
+Each <Article> of the archive's input XMLs is paired with a CSV row (by the row's xml/pdf
+column, its doi, or its first_page) and with a PDF and template named like the XML or its DOI.
+Nothing is extracted to disk: members are decompressed one at a time as their article is
+submitted, and each output is added to a single zip as soon as its worker finishes. The zip
+also carries the issue-level ArticleSet, added last in page order.
+"""
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import multiprocessing
+import os
+import posixpath
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from jatsgen.articleset import ArticleSpool, article_doi, article_document, index_rows, iter_articles, match_row
+from jatsgen.batch import REPORT_FIELDS, attach_pages, iter_results, publish_metrics, read_rows, spool_articles
+from jatsgen.pipeline import parse_pages
+from jatsgen.scrape import PER_HOST
+from jatsgen.toc import discover_rows
+
+ARCHIVE_TYPES = ["zip", "tar", "tgz", "gz", "bz2", "xz"]
+HEAD_BYTES = 64 * 1024  # Enough of an XML member to tell a template from an input ArticleSet
+TEMPLATE_SUFFIXES = ["_template", "-template", ".template"]
+ARCHIVE_REPORT = "batch_report.csv"
+ARCHIVE_REPORT_FIELDS = ["row", "source"] + REPORT_FIELDS[1:]
+DEFAULT_ARCHIVE_NAME = "articles.zip"
+ARTICLE_SET_SUFFIX = "_ArticleSet.xml"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _decompress(data):
+    # A compressed tar is inflated once up front: tarfile seeks between members, which
+    # restarts a compressed stream from the beginning every time
+    view = memoryview(data)
+    if view[:2] == b"\x1f\x8b":
+        return gzip.decompress(view)
+    if view[:3] == b"BZh":
+        return bz2.decompress(view)
+    if view[:6] == b"\xfd7zXZ\x00":
+        return lzma.decompress(view)
+    return data
+
+
+def _stem(name):
+    return posixpath.splitext(posixpath.basename(name))[0].lower()
+
+
+def _template_stem(name):
+    stem = _stem(name)
+    for suffix in TEMPLATE_SUFFIXES:
+        if stem.endswith(suffix):
+            return stem[:-len(suffix)]
+    return stem
+
+
+class Archive:
+    """Read-only view of an uploaded zip or tar (bytes) that never touches the filesystem"""
+
+    def __init__(self, data):
+        buffer = io.BytesIO(data)
+        if zipfile.is_zipfile(buffer):
+            self._zip = zipfile.ZipFile(buffer)
+            self._tar = None
+            names = [info.filename for info in self._zip.infolist() if not info.is_dir()]
+        else:
+            try:
+                self._zip = None
+                self._tar = tarfile.open(fileobj=io.BytesIO(_decompress(data)), mode="r:")
+            except (tarfile.TarError, OSError, EOFError, lzma.LZMAError) as e:
+                raise ValueError(f"Upload is not a zip or tar archive: {e}")
+            self._members = {member.name: member for member in self._tar.getmembers() if member.isfile()}
+            names = list(self._members)
+        # Skip macOS resource forks and other hidden files
+        self.names = [name for name in names
+                      if not name.startswith("__MACOSX/") and not posixpath.basename(name).startswith(".")]
+
+    def read(self, name, size=-1):
+        if self._zip is not None:
+            with self._zip.open(name) as f:
+                return f.read(size)
+        return self._tar.extractfile(self._members[name]).read(size)
+
+
+def classify(archive):
+    """Member names by kind: pdf, xml (input ArticleSets), template and csv; anything else is ignored"""
+    kinds = {"pdf": [], "xml": [], "template": [], "csv": []}
+    for name in archive.names:
+        extension = posixpath.splitext(name)[1].lower()
+        if extension == ".pdf":
+            kinds["pdf"].append(name)
+        elif extension == ".csv":
+            kinds["csv"].append(name)
+        elif extension == ".xml":
+            head = archive.read(name, HEAD_BYTES)
+            if b"<front" in head:
+                kinds["template"].append(name)
+            elif b"<Article" in head:
+                kinds["xml"].append(name)
+    return kinds
+
+
+def file_keys(doi, xml_name=""):
+    """Lower-case file stems a PDF or template of this article may have: the XML's own, the DOI or its suffix"""
+    keys = {_stem(xml_name)} if xml_name else set()
+    if doi:
+        doi = doi.lower()
+        keys.update([doi.replace("/", "_"), doi.split("/", 1)[-1]])
+    return keys
+
+
+class Pairing:
+    """Look-up tables from the CSV rows and the archive's members to each article's inputs"""
+
+    def __init__(self, kinds, rows):
+        self.by_doi, self.by_page = index_rows(rows)
+        self.by_xml = {_stem(row["xml"]): row for row in rows if row["xml"]}
+        self.by_pdf = {_stem(row["pdf"]): row for row in rows if row["pdf"]}
+        self.members = {name: name for kind in kinds.values() for name in kind}
+        # Rows may give members by path or by bare file name
+        for name in list(self.members):
+            self.members.setdefault(posixpath.basename(name), name)
+        self.pdfs = {}
+        for name in kinds["pdf"]:
+            self.pdfs.setdefault(_stem(name), name)
+        self.templates = {}
+        for name in kinds["template"]:
+            self.templates.setdefault(_template_stem(name), name)
+        # A lone template serves every article without one of its own
+        self.default_template = kinds["template"][0] if len(kinds["template"]) == 1 else ""
+
+    def row(self, article, keys):
+        row = match_row(article, self.by_doi, self.by_page)
+        if row is not None:
+            return row
+        for key in keys:
+            row = self.by_xml.get(key) or self.by_pdf.get(key)
+            if row is not None:
+                return row
+        return None
+
+    def member(self, name, kind):
+        if name not in self.members:
+            raise ValueError(f"{kind} {name} named in the CSV is not in the archive")
+        return self.members[name]
+
+    def pdf(self, row, keys):
+        if row["pdf"]:
+            return self.member(row["pdf"], "PDF")
+        for key in keys:
+            if key in self.pdfs:
+                return self.pdfs[key]
+        raise ValueError(f"No PDF named like {' or '.join(sorted(keys)) or 'this article'}")
+
+    def template(self, row, keys):
+        if row["template"]:
+            return self.member(row["template"], "Template")
+        for key in keys:
+            if key in self.templates:
+                return self.templates[key]
+        return self.default_template
+
+
+def plan_jobs(archive, kinds, rows):
+    """One job per <Article> in the archive's input XMLs; PDFs and templates are named, not yet read.
+
+    Also returns the report lines of CSV rows and PDFs no article was paired with.
+    """
+    pairing = Pairing(kinds, rows)
+    jobs, used_rows, used_pdfs = [], set(), set()
+    for xml_name in kinds["xml"]:
+        articles = list(iter_articles(io.BytesIO(archive.read(xml_name))))
+        for position, article in enumerate(articles, start=1):
+            doi = article_doi(article)
+            # Only a single-article XML lends its file name to the pairing
+            keys = file_keys(doi, xml_name if len(articles) == 1 else "")
+            source = xml_name if len(articles) == 1 else f"{xml_name}#{position}"
+            job = {"row": len(jobs) + 1, "source": source}
+            row = pairing.row(article, keys)
+            try:
+                if row is None:
+                    fp, _, _ = parse_pages(article)
+                    raise ValueError(f"No CSV row matches DOI {doi or '-'}, first page {fp or '-'} or file {xml_name}")
+                job.update(row, row=len(jobs) + 1, xml="", xml_data=article_document(article))
+                job["pdf"] = pairing.pdf(row, keys)
+                job["template"] = pairing.template(row, keys)
+                used_rows.add(id(row))
+                used_pdfs.add(job["pdf"])
+            except ValueError as e:
+                job["error"] = str(e)
+            jobs.append(job)
+
+    unpaired = [_report_line(f"CSV row {row['row']}", "No article in the archive matches this row")
+                for row in rows if id(row) not in used_rows]
+    unpaired += [_report_line(name, "No input XML is paired with this PDF")
+                 for name in kinds["pdf"] if name not in used_pdfs]
+    return jobs, unpaired
+
+
+def _report_line(source, message):
+    return {"row": "", "source": source, "status": "unpaired", "output": "", "seconds": 0, "messages": message,
+            "valid": "", "problems": ""}
+
+
+def load_jobs(archive, jobs):
+    """Jobs with their PDF and template bytes, read from the archive only as each one is submitted"""
+    templates = {}  # One shared template is decompressed once
+    for job in jobs:
+        if job.get("error"):
+            yield job
+            continue
+        # A copy, so the planned job doesn't keep the PDF alive once its result is in
+        loaded = dict(job, pdf_data=archive.read(job["pdf"]))
+        if job["template"]:
+            if job["template"] not in templates:
+                templates[job["template"]] = archive.read(job["template"])
+            loaded["template_data"] = templates[job["template"]]
+        yield loaded
+
+
+def unique_name(name, taken):
+    """name, or name with a counter when another article already produced it"""
+    stem, extension = posixpath.splitext(name)
+    candidate, n = name, 2
+    while candidate in taken:
+        candidate = f"{stem}_{n}{extension}"
+        n += 1
+    taken.add(candidate)
+    return candidate
+
+
+def archive_name(filenames):
+    """Zip name from the Vol/No/year part generate_filename gave every article (e.g. Vol.3_No.2_2024.zip)"""
+    tails = {filename.partition("_Vol.")[2] for filename in filenames}
+    if len(tails) == 1 and "" not in tails:
+        return "Vol." + posixpath.splitext(tails.pop())[0] + ".zip"
+    return DEFAULT_ARCHIVE_NAME
+
+
+def write_report_lines(results, bundle):
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=ARCHIVE_REPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(results)
+    bundle.writestr(ARCHIVE_REPORT, text.getvalue())
+
+
+def read_url_rows(archive, kinds, csv_data=None):
+    if csv_data is None:
+        if len(kinds["csv"]) != 1:
+            raise ValueError("Upload a CSV of article URLs, or include exactly one in the archive")
+        csv_data = archive.read(kinds["csv"][0])
+    return read_rows(io.StringIO(bytes(csv_data).decode("utf-8-sig"), newline=""), required=["article_url"])
+
+
+def bulk_pool(workers=None):
+    """Worker processes shared by every upload in this process (workers, default CPU count), started once"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded process (the Streamlit server) is not safe, and would copy it into each worker
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def run_archive(data, out, csv_data=None, toc_url=None, workers=None, prefetch=True, per_host=PER_HOST, rate=None,
+                cache=True, metrics_path=None, snapshot_dir=None, validate=True, progress=None, pool=None):
+    """Generate every article of an uploaded archive into one zip written to the binary sink out.
+
+    The zip holds one output per article, named by generate_filename, the issue ArticleSet
+    (<zip name>_ArticleSet.xml) and batch_report.csv.
+    With toc_url the URL rows are discovered from the issue's TOC page instead of a CSV.
+    progress(done, total) is called as articles finish. With pool (see bulk_pool) the articles run
+    there, `workers` at a time, instead of in a pool started for this archive. Returns the article
+    results, the report lines of CSV rows and PDFs left unpaired, and the zip's name.
+    """
+    archive = Archive(data)
+    kinds = classify(archive)
+    if toc_url:
+        # Discovery already scraped every article page
+        rows, record = discover_rows(toc_url, per_host=per_host, rate=rate, cache=cache, snapshot_dir=snapshot_dir)
+        records = [record]
+    else:
+        rows = read_url_rows(archive, kinds, csv_data)
+        records = [attach_pages(rows, per_host=per_host, rate=rate, cache=cache, snapshot_dir=snapshot_dir)] if prefetch else []
+    for row in rows:
+        row["cache"] = cache
+        row["snapshot_dir"] = snapshot_dir
+        row["validate"] = validate
+    jobs, unpaired = plan_jobs(archive, kinds, rows)
+    for job in jobs:
+        job["assemble"] = True
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+
+    results, filenames, taken = [], [], {ARCHIVE_REPORT}
+    # A zip is written one entry at a time, so the ArticleSet is spooled alongside and added last
+    with ArticleSpool() as spool, zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for result in spool_articles(iter_results(load_jobs(archive, jobs), None, workers, pool=pool), spool):
+            output = result.pop("data", None)
+            if output is not None:
+                filenames.append(result["output"])
+                name = unique_name(result["output"], taken)
+                if name != result["output"]:
+                    note = f"Renamed from {result['output']}: another article has the same filename"
+                    result["messages"] = f"{result['messages']} | {note}" if result["messages"] else note
+                    result["output"] = name
+                bundle.writestr(name, output)
+            results.append(result)
+            if progress is not None:
+                progress(len(results), len(jobs))
+        results.sort(key=lambda result: result["row"])
+        sources = {job["row"]: job["source"] for job in jobs}
+        for result in results:
+            result["source"] = sources[result["row"]]
+        name = archive_name(filenames)
+        with bundle.open(unique_name(posixpath.splitext(name)[0] + ARTICLE_SET_SUFFIX, taken), "w") as entry:
+            spool.write(entry)
+        write_report_lines(results + unpaired, bundle)
+
+    publish_metrics(records + [result["metrics"] for result in results], metrics_path)
+    return results, unpaired, name
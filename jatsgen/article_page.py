@@ -0,0 +1,131 @@
+"""Article page extraction: the published date and citation_keywords, without building a page tree."""
+import os
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+
+from jatsgen.dates import NULL_DATE, parse_date
+
+# "fast" scans <head> and the date element only; "soup" is the full BeautifulSoup parse
+PAGE_PARSER = os.environ.get("JATSGEN_PAGE_PARSER", "fast")
+
+# What the pipeline needs from an article page: the published date and citation_keywords
+ArticlePage = namedtuple("ArticlePage", ["published", "keywords"])
+
+DATE_CLASS = "list-group-item date-published"
+HEAD_END_RE = re.compile(r"</head\s*>", re.IGNORECASE)
+DATE_DIV_RE = re.compile(r"<div\b[^>]*\bdate-published\b", re.IGNORECASE)
+CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([A-Za-z0-9._-]+)""", re.IGNORECASE)
+
+
+def split_keywords(contents):
+    keywords = []
+    for keywords_content in contents:
+        for kw in re.split(r'[;,]\s*', keywords_content):
+            kw = kw.strip()
+            if kw:
+                keywords.append(kw)
+    return keywords
+
+
+def published_date(text):
+    return parse_date(text.replace("Published:", "").strip())
+
+
+def soup_article_page(content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+
+    published = NULL_DATE
+    published_div = soup.find("div", class_=DATE_CLASS)
+    if published_div:
+        published = published_date(published_div.get_text(strip=True))
+
+    contents = [meta.get("content", "") for meta in soup.find_all("meta", {"name": "citation_keywords"})]
+    return ArticlePage(published, split_keywords(contents))
+
+
+class _DateFound(Exception):
+    pass
+
+
+class _PageScanner(HTMLParser):
+    """Collects citation_keywords contents and the text of the first date-published div"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.keywords = []
+        self.date_strings = None
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            if attrs.get("name") == "citation_keywords":
+                self.keywords.append(attrs.get("content") or "")
+        elif tag == "div":
+            if self._depth:
+                self._depth += 1
+            elif self.date_strings is None and " ".join((dict(attrs).get("class") or "").split()) == DATE_CLASS:
+                self._depth = 1
+                self.date_strings = []
+
+    def handle_endtag(self, tag):
+        if tag == "div" and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                raise _DateFound  # Nothing after the date element is needed
+
+    def handle_data(self, data):
+        if self._depth:
+            self.date_strings.append(data)
+
+
+def decode_html(content):
+    if isinstance(content, str):
+        return content
+    match = CHARSET_RE.search(bytes(content[:2048]))
+    encoding = match.group(1).decode("ascii") if match else "utf-8"
+    return bytes(content).decode(encoding)
+
+
+def _feed(scanner, text):
+    try:
+        scanner.feed(text)
+        scanner.close()
+    except _DateFound:
+        pass
+
+
+def scan_article_page(content):
+    """Tokenize only <head> (for citation_keywords) and the date element (from its opening tag on)"""
+    text = decode_html(content)
+    head_end = HEAD_END_RE.search(text)
+
+    head = _PageScanner()
+    _feed(head, text[:head_end.end()] if head_end else text)
+    keywords = head.keywords
+
+    date_strings = head.date_strings
+    if date_strings is None:
+        start = DATE_DIV_RE.search(text, head_end.end() if head_end else len(text))
+        if start:
+            body = _PageScanner()
+            _feed(body, text[start.start():])
+            date_strings = body.date_strings
+
+    published = NULL_DATE
+    if date_strings is not None:
+        # Same text as BeautifulSoup's get_text(strip=True)
+        published = published_date("".join(s.strip() for s in date_strings if s.strip()))
+    return ArticlePage(published, split_keywords(keywords))
+
+
+def parse_article_page(content, engine=None):
+    if (engine or PAGE_PARSER) == "fast":
+        try:
+            return scan_article_page(content)
+        except (UnicodeDecodeError, LookupError):
+            pass  # BeautifulSoup's encoding detection copes with pages we can't decode
+    return soup_article_page(content)
@@ -0,0 +1,85 @@
+"""Issue-wide ArticleSets: stream each input <Article> and pair it with its manifest row, and write the issue output."""
+import xml.etree.ElementTree as ET
+import tempfile
+
+from jatsgen.pipeline import parse_pages
+
+ARTICLE_SET_HEADER = b'<?xml version="1.0" encoding="UTF-8"?>\n<ArticleSet>\n'
+ARTICLE_SET_FOOTER = b"</ArticleSet>\n"
+SPOOL_BYTES = 1024 * 1024  # Article blocks kept in memory before the spool moves to a temporary file
+
+
+def iter_articles(source):
+    """Yield each <Article> as soon as it is parsed; it is dropped from the tree once the caller moves on"""
+    parents = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == "Article":
+            yield elem
+            if parents:
+                parents[-1].remove(elem)
+
+
+def article_document(article):
+    """Standalone ArticleSet document holding a single Article, as the per-article pipeline expects"""
+    return b"<ArticleSet>" + ET.tostring(article, encoding="utf-8") + b"</ArticleSet>"
+
+
+def article_doi(article):
+    doi_elem = article.find(".//ELocationID[@EIdType='doi']")
+    return doi_elem.text.strip() if doi_elem is not None and doi_elem.text else ""
+
+
+def index_rows(rows):
+    """Look-up tables from DOI (case-insensitive) and first page to manifest row"""
+    by_doi = {row["doi"].lower(): row for row in rows if row.get("doi")}
+    by_page = {row["first_page"]: row for row in rows if row.get("first_page")}
+    return by_doi, by_page
+
+
+def match_row(article, by_doi, by_page):
+    """Manifest row for article, matched by DOI first and then by first page"""
+    doi = article_doi(article)
+    if doi and doi.lower() in by_doi:
+        return by_doi[doi.lower()]
+    fp, _, _ = parse_pages(article)
+    return by_page.get(str(fp)) if fp else None
+
+
+class ArticleSpool:
+    """The issue-level ArticleSet, from article blocks (pipeline.article_block) added in any order.
+
+    Blocks go to a temporary file (in memory up to SPOOL_BYTES) as they arrive; only their page,
+    position and place in the file are kept. write() puts them out by FirstPage, position
+    breaking ties and unknown pages (0) last.
+    """
+
+    def __init__(self):
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        self._index = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, block, first_page, position):
+        data = block.encode("utf-8")
+        self._file.seek(0, 2)
+        self._index.append((first_page == 0, first_page, position, self._file.tell(), len(data)))
+        self._file.write(data)
+
+    def write(self, out):
+        """Write the ArticleSet to the binary sink out, one block at a time"""
+        out.write(ARTICLE_SET_HEADER)
+        for _, _, _, offset, length in sorted(self._index):
+            self._file.seek(offset)
+            out.write(b"  " + self._file.read(length) + b"\n")
+        out.write(ARTICLE_SET_FOOTER)
+
+    def close(self):
+        self._file.close()
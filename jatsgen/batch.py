@@ -0,0 +1,340 @@
+"""Headless issue runs: one manifest row per article, spread across a process pool."""
+import xml.etree.ElementTree as ET
+import csv
+import io
+import mmap
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from jatsgen.article_page import ArticlePage
+from jatsgen.articleset import (
+    ArticleSpool,
+    article_doi,
+    article_document,
+    index_rows,
+    iter_articles,
+    match_row,
+)
+from jatsgen.fetch import PageFetcher
+from jatsgen.cache import content_hash, get_result_cache
+from jatsgen.client import get_client
+from jatsgen.dates import normalize_dates
+from jatsgen.metrics import Registry, count, log_metrics, timed, track
+from jatsgen.pipeline import (
+    article_block,
+    combine_template,
+    dates_missing,
+    extract_history_from_pdf,
+    find_article,
+    generate_filename,
+    parse_pages,
+    process_article,
+)
+from jatsgen.scrape import PER_HOST, prefetch_pages
+from jatsgen.validate import validate_document
+
+MANIFEST_FIELDS = ["pdf", "xml", "article_url", "pdf_link", "template", "received", "accepted", "doi", "first_page"]
+REQUIRED_FIELDS = ["pdf", "xml", "article_url"]
+# In issue mode the XML comes from the ArticleSet and rows are matched by DOI or first page
+ISSUE_REQUIRED_FIELDS = ["pdf", "article_url"]
+REPORT_FIELDS = ["row", "status", "output", "seconds", "messages", "valid", "problems"]
+
+
+def read_rows(f, required=REQUIRED_FIELDS):
+    """Manifest rows from an open CSV file, file columns as written"""
+    reader = csv.DictReader(f)
+    missing = [field for field in required if field not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Manifest is missing columns: {', '.join(missing)}")
+
+    jobs = []
+    for index, row in enumerate(reader, start=1):
+        job = {field: (row.get(field) or "").strip() for field in MANIFEST_FIELDS}
+        job["row"] = index
+        jobs.append(job)
+    return jobs
+
+
+def read_manifest(manifest_path, required=REQUIRED_FIELDS):
+    """Read manifest rows; file paths are resolved relative to the manifest"""
+    base = Path(manifest_path).resolve().parent
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        jobs = read_rows(f, required)
+    for job in jobs:
+        for field in ("pdf", "xml", "template"):
+            if job[field]:
+                job[field] = str(base / job[field])
+    return jobs
+
+
+@contextmanager
+def mapped(path):
+    """Read-only memory map of a file, exposed as a buffer the pipeline can parse directly"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""  # Empty files cannot be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            view = memoryview(m)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+def job_data(job, field):
+    """A row's input as a buffer: the <field>_data it carries (archive uploads, ArticleSets) or its file mapped"""
+    data = job.get(field + "_data")
+    return nullcontext(data) if data is not None else mapped(job[field])
+
+
+def write_document(job, processed_xml, out, cache):
+    if job["template"]:
+        with job_data(job, "template") as template_data:
+            combine_template(template_data, processed_xml, out, cache=cache)
+    else:
+        out.write(processed_xml.encode("utf-8"))
+    count("output_bytes", out.tell())
+
+
+def run_job(job, out_dir):
+    """Run generate_article + combine_with_template for one manifest row and write the result.
+
+    With out_dir None the document is returned in result["data"] instead of written to a file.
+    """
+    started = time.perf_counter()
+    messages = []
+    result = {"row": job["row"], "status": "ok", "output": "", "valid": "", "problems": ""}
+    with track(row=job["row"], article_url=job.get("article_url", "")) as metrics:
+        try:
+            if job.get("error"):
+                raise ValueError(job["error"])
+            cache = get_result_cache() if job.get("cache", True) else None
+            with timed("parse_xml"), job_data(job, "xml") as xml_data:
+                root = ET.fromstring(xml_data)
+                source_hash = content_hash(xml_data)
+
+            # One fetcher per row: the article page is downloaded and parsed once for both steps
+            fetcher = PageFetcher(pages={job["article_url"]: job["page"]} if job.get("page") else None, results=cache,
+                                  client=get_client(job.get("snapshot_dir")))
+            filename = generate_filename(job["article_url"], root, fetcher=fetcher, warn=messages.append)
+            article = find_article(root)
+
+            with job_data(job, "pdf") as pdf_data:
+                dates = extract_history_from_pdf(pdf_data, warn=messages.append, cache=cache)
+            if dates_missing(dates):
+                # No interactive fallback here: the manifest has to carry the dates
+                if not (job["received"] and job["accepted"]):
+                    raise ValueError("Could not extract history dates from PDF; fill in the received/accepted columns")
+                dates = tuple(normalize_dates([job["received"], job["accepted"]]))
+
+            processed_xml = process_article(
+                article, job["article_url"], job["pdf_link"], dates, fetcher=fetcher, warn=messages.append,
+                cache=cache, source_hash=source_hash,
+            )
+            if job.get("assemble"):
+                # For the issue-level ArticleSet, which the parent puts in page order
+                result["block"] = article_block(processed_xml)
+                result["first_page"], _, _ = parse_pages(article)
+
+            if out_dir is None:
+                out = io.BytesIO()
+                write_document(job, processed_xml, out, cache)
+                result["output"] = filename
+                result["data"] = out.getvalue()
+            else:
+                out_path = Path(out_dir) / filename
+                part_path = out_path.with_name(out_path.name + ".part")
+                try:
+                    with open(part_path, "wb") as out:
+                        write_document(job, processed_xml, out, cache)
+                    os.replace(part_path, out_path)
+                finally:
+                    if part_path.exists():
+                        part_path.unlink()
+                result["output"] = str(out_path)
+
+            if job.get("validate", True):
+                # Runs in the worker, so a batch is validated in parallel with the rules compiled once per process
+                with (nullcontext(result["data"]) if out_dir is None else mapped(out_path)) as output:
+                    validation = validate_document(output)
+                result["valid"] = validation.valid
+                result["problems"] = "; ".join(validation.problems)
+        except Exception as e:
+            result["status"] = "error"
+            messages.append(str(e))
+
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    result["messages"] = " | ".join(messages)
+    result["metrics"] = dict(metrics.to_dict(), status=result["status"])
+    return result
+
+
+def write_report(results, report_path):
+    with open(report_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def attach_pages(jobs, per_host=PER_HOST, rate=None, cache=True, snapshot_dir=None):
+    """Scrape all article pages up front; rows whose page failed re-fetch it in their worker.
+
+    Returns the metrics record of the scrape.
+    """
+    with track(step="prefetch") as metrics:
+        fetcher = PageFetcher(results=get_result_cache() if cache else None, client=get_client(snapshot_dir))
+        with timed("scrape"):
+            pages = prefetch_pages([job["article_url"] for job in jobs], fetcher, per_host=per_host, rate=rate)
+    for job in jobs:
+        page = pages.get(job["article_url"])
+        if isinstance(page, ArticlePage):
+            job["page"] = page
+    return metrics.to_dict()
+
+
+def iter_results(jobs, out_dir, workers, pool=None):
+    """Run jobs, consumed lazily, with at most two per worker in flight; yields results as they finish.
+
+    With pool (an executor shared with other runs) the jobs go there instead of to a pool of their
+    own, even one at a time.
+    """
+    if workers == 1 and pool is None:
+        # Skip pool start-up entirely for serial runs
+        for job in jobs:
+            yield run_job(job, out_dir)
+        return
+
+    with (nullcontext(pool) if pool is not None else ProcessPoolExecutor(max_workers=workers)) as pool:
+        pending = set()
+        for job in jobs:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(run_job, job, out_dir))
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def run_jobs(jobs, out_dir, workers):
+    """iter_results collected in row order"""
+    return sorted(iter_results(jobs, out_dir, workers), key=lambda result: result["row"])
+
+
+def spool_articles(results, spool):
+    """Pass results through while adding each one's article block to the ArticleSpool"""
+    for result in results:
+        block = result.pop("block", None)
+        first_page = result.pop("first_page", 0)
+        if block is not None:
+            spool.add(block, first_page, result["row"])
+        yield result
+
+
+def run_assembled(jobs, out_dir, workers, article_set_path):
+    """run_jobs, also writing every generated article to the issue ArticleSet at article_set_path in page order"""
+    jobs = (dict(job, assemble=True) for job in jobs)
+    part_path = Path(str(article_set_path) + ".part")
+    with ArticleSpool() as spool:
+        results = sorted(spool_articles(iter_results(jobs, out_dir, workers), spool), key=lambda result: result["row"])
+        try:
+            with open(part_path, "wb") as out:
+                spool.write(out)
+            os.replace(part_path, article_set_path)
+        finally:
+            if part_path.exists():
+                part_path.unlink()
+    return results
+
+
+def publish_metrics(records, metrics_path=None):
+    """Log each metrics record as a JSON line and, with metrics_path, write the run totals for Prometheus"""
+    registry = Registry()
+    for record in records:
+        log_metrics(record)
+        registry.merge(record)
+    if metrics_path:
+        registry.write(metrics_path)
+
+
+def flag_overwrites(results):
+    # Two rows resolving to the same filename silently overwrite each other
+    seen = {}
+    for result in results:
+        if not result["output"]:
+            continue
+        if result["output"] in seen:
+            note = f"Output overwrites row {seen[result['output']]}"
+            result["messages"] = f"{result['messages']} | {note}" if result["messages"] else note
+        seen[result["output"]] = result["row"]
+
+
+def run_batch(manifest_path, out_dir, workers=None, report_path=None, prefetch=True, per_host=PER_HOST, rate=None,
+              cache=True, metrics_path=None, snapshot_dir=None, validate=True, article_set=None):
+    """Process every manifest row and write one output per row plus a status report.
+
+    With article_set, every article's Journal-meta/article-meta also goes into that one issue-level file.
+    """
+    jobs = read_manifest(manifest_path)
+    for job in jobs:
+        job["cache"] = cache
+        job["snapshot_dir"] = snapshot_dir
+        job["validate"] = validate
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    records = [attach_pages(jobs, per_host=per_host, rate=rate, cache=cache, snapshot_dir=snapshot_dir)] if prefetch else []
+
+    if article_set:
+        results = run_assembled(jobs, out_dir, workers, article_set)
+    else:
+        results = run_jobs(jobs, out_dir, workers)
+    flag_overwrites(results)
+    write_report(results, report_path or Path(out_dir) / "batch_report.csv")
+    publish_metrics(records + [result["metrics"] for result in results], metrics_path)
+    return results
+
+
+def issue_jobs(articleset_path, rows, template=""):
+    """One job per <Article> of the ArticleSet, parsed incrementally; "row" is the Article's position"""
+    by_doi, by_page = index_rows(rows)
+    for index, article in enumerate(iter_articles(articleset_path), start=1):
+        row = match_row(article, by_doi, by_page)
+        if row is None:
+            fp, _, _ = parse_pages(article)
+            yield {"row": index, "error": f"No manifest row matches DOI {article_doi(article) or '-'} or first page {fp}"}
+            continue
+        job = dict(row, row=index, xml="", xml_data=article_document(article))
+        job["template"] = job["template"] or template
+        yield job
+
+
+def run_issue(articleset_path, manifest_path, out_dir, workers=None, template="", report_path=None,
+              prefetch=True, per_host=PER_HOST, rate=None, cache=True, metrics_path=None, snapshot_dir=None,
+              validate=True, article_set=None):
+    """Process every <Article> of an issue-wide ArticleSet with bounded memory (see run_batch for article_set)"""
+    rows = read_manifest(manifest_path, required=ISSUE_REQUIRED_FIELDS)
+    for row in rows:
+        row["cache"] = cache
+        row["snapshot_dir"] = snapshot_dir
+        row["validate"] = validate
+    if not any(row["doi"] or row["first_page"] for row in rows):
+        raise ValueError("Manifest needs a doi or first_page column to match articles")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    records = [attach_pages(rows, per_host=per_host, rate=rate, cache=cache, snapshot_dir=snapshot_dir)] if prefetch else []
+
+    jobs = issue_jobs(articleset_path, rows, template)
+    if article_set:
+        results = run_assembled(jobs, out_dir, workers, article_set)
+    else:
+        results = run_jobs(jobs, out_dir, workers)
+    flag_overwrites(results)
+    write_report(results, report_path or Path(out_dir) / "batch_report.csv")
+    publish_metrics(records + [result["metrics"] for result in results], metrics_path)
+    return results
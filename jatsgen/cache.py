@@ -0,0 +1,130 @@
+"""Content-addressed result cache shared by every process on the host (SQLite)."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from jatsgen.metrics import count
+
+log = logging.getLogger(__name__)
+
+RESULT_CACHE_PATH = os.environ.get("JATSGEN_RESULT_CACHE", os.path.join(".jatsgen_cache", "results.sqlite3"))
+RESULT_CACHE_MB = float(os.environ.get("JATSGEN_RESULT_CACHE_MB", "512"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+def content_hash(data):
+    """sha256 of a buffer, or of a file when given a path"""
+    digest = hashlib.sha256()
+    if isinstance(data, (str, os.PathLike)):
+        with open(data, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    else:
+        digest.update(memoryview(data))
+    return digest.hexdigest()
+
+
+def cache_key(kind, *parts):
+    """Key over the kind and the input hashes / values it was derived from"""
+    digest = hashlib.sha256(kind.encode("utf-8"))
+    for part in parts:
+        data = part if isinstance(part, bytes) else json.dumps(part, sort_keys=True).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return f"{kind}:{digest.hexdigest()}"
+
+
+class ResultCache:
+    """Key/value store with least-recently-used eviction once it grows past max_bytes"""
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_mb=RESULT_CACHE_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite3 connections can't cross threads (Streamlit sessions) or forks (batch workers)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        # A broken or locked cache costs a recompute, never a failed article
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                count("result_cache_misses")
+                return None
+            count("result_cache_hits")
+            with conn:
+                conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            return bytes(row[0])
+        except (sqlite3.Error, OSError) as e:
+            log.warning(f"Result cache read failed: {e}")
+            return None
+
+    def put(self, key, value):
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, kind, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, key.split(":", 1)[0], value, len(value), time.time()),
+                )
+                self._evict(conn)
+        except (sqlite3.Error, OSError) as e:
+            log.warning(f"Result cache write failed: {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def get_json(self, key):
+        value = self.get(key)
+        return None if value is None else json.loads(value)
+
+    def put_json(self, key, value):
+        self.put(key, json.dumps(value).encode("utf-8"))
+
+
+_result_cache = None
+
+
+def get_result_cache():
+    """Process-wide cache, or None when JATSGEN_RESULT_CACHE is set to an empty string"""
+    global _result_cache
+    if _result_cache is None and RESULT_CACHE_PATH:
+        _result_cache = ResultCache()
+    return _result_cache
@@ -0,0 +1,216 @@
+"""Shared HTTP client for article pages: timeouts, bounded retries, a per-host circuit breaker and offline snapshots.
+
+requests is imported on first use so the app starts without loading it.
+"""
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from jatsgen.metrics import count
+
+CONNECT_TIMEOUT = float(os.environ.get("JATSGEN_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("JATSGEN_READ_TIMEOUT", "30"))
+RETRIES = int(os.environ.get("JATSGEN_HTTP_RETRIES", "2"))  # Extra attempts after the first
+BACKOFF = 0.5  # Seconds before the first retry, doubled for each one after
+MAX_BACKOFF = 10.0  # Also caps a server's Retry-After
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Consecutive failures that open a host's circuit, and how long it stays open before a trial request
+BREAKER_FAILURES = int(os.environ.get("JATSGEN_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("JATSGEN_BREAKER_COOLDOWN", "60"))
+# Read article pages from this directory instead of the network (see `python -m jatsgen snapshot`)
+SNAPSHOT_DIR = os.environ.get("JATSGEN_SNAPSHOT_DIR", "")
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide requests.Session so every fetch reuses pooled connections"""
+    global _session, _session_pid
+    with _session_lock:
+        # A forked batch worker must not share the parent's pooled sockets
+        if _session is None or _session_pid != os.getpid():
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session_pid = os.getpid()
+        return _session
+
+
+class HostUnavailable(Exception):
+    """Raised without a request while a host's circuit is open"""
+
+
+class CircuitBreaker:
+    """Fails requests to one host fast once it has failed `threshold` times in a row.
+
+    After `cooldown` seconds a single trial request is let through: success closes the
+    circuit, failure opens it for another cooldown.
+    """
+
+    def __init__(self, host, threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def check(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if not self._trial and self.clock() - self.opened_at >= self.cooldown:
+                self._trial = True
+                return
+        count("circuit_rejections")
+        raise HostUnavailable(f"{self.host} is unavailable after {self.failures} failed requests; not retrying yet")
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.threshold:
+                self.opened_at = self.clock()
+
+
+class HttpClient:
+    """GETs with connect/read timeouts, retried with exponential backoff on network errors and 429/5xx"""
+
+    def __init__(self, session=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES, backoff=BACKOFF,
+                 failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.session = session or get_session()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.failures = failures
+        self.cooldown = cooldown
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(host, self.failures, self.cooldown)
+            return self._breakers[host]
+
+    def _delay(self, attempt, response):
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF)
+        # Jittered so rows that failed together don't retry in lockstep
+        return min(self.backoff * 2 ** attempt, MAX_BACKOFF) * random.uniform(0.5, 1.0)
+
+    def get(self, url, headers=None):
+        """Response for url; the last 429/5xx response is returned once retries run out, network errors are raised"""
+        import requests
+
+        breaker = self.breaker(urlsplit(url).netloc)
+        for attempt in range(self.retries + 1):
+            breaker.check()
+            response = error = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if error is None and response.status_code not in RETRY_STATUSES:
+                breaker.success()  # 4xx included: the host answered
+                return response
+            breaker.failure()
+            if attempt < self.retries:
+                count("http_retries")
+                time.sleep(self._delay(attempt, response))
+        if error is not None:
+            raise error
+        return response
+
+
+# Just enough of requests.Response for PageFetcher
+SnapshotResponse = namedtuple("SnapshotResponse", ["status_code", "headers", "content"])
+
+
+def snapshot_path(snapshot_dir, url):
+    """<snapshot_dir>/<host>/<path with / as _>.html, readable enough to edit or add pages by hand"""
+    parts = urlsplit(url)
+    name = parts.path.strip("/").replace("/", "_") or "index"
+    if parts.query:
+        name += "_" + hashlib.sha256(parts.query.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(snapshot_dir, parts.netloc.replace(":", "_"), name + ".html")
+
+
+class SnapshotClient:
+    """Offline client: pages come from a snapshot directory and a missing page is an error"""
+
+    def __init__(self, snapshot_dir):
+        self.snapshot_dir = snapshot_dir
+
+    def get(self, url, headers=None):
+        path = snapshot_path(self.snapshot_dir, url)
+        try:
+            with open(path, "rb") as f:
+                return SnapshotResponse(200, {}, f.read())
+        except FileNotFoundError:
+            raise LookupError(f"No snapshot of {url} in {self.snapshot_dir}") from None
+
+
+class RecordingClient:
+    """Wraps a live client and saves every 200 response into a snapshot directory"""
+
+    def __init__(self, client, snapshot_dir):
+        self.client = client
+        self.snapshot_dir = snapshot_dir
+
+    def get(self, url, headers=None):
+        response = self.client.get(url)  # Unconditional: a 304 has no body to save
+        if response.status_code == 200:
+            path = snapshot_path(self.snapshot_dir, url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(response.content)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return response
+
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def get_client(snapshot_dir=None):
+    """Process-wide client: the snapshot reader for snapshot_dir (or JATSGEN_SNAPSHOT_DIR), else the live one.
+
+    Sharing one live client means a host's circuit breaker covers every fetch in the process.
+    """
+    global _clients_pid
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            # Clients made before a fork hold the parent's session; workers start their own
+            _clients.clear()
+            _clients_pid = os.getpid()
+        if snapshot_dir not in _clients:
+            _clients[snapshot_dir] = SnapshotClient(snapshot_dir) if snapshot_dir else HttpClient()
+        return _clients[snapshot_dir]
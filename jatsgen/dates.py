@@ -0,0 +1,96 @@
+"""Date normalization for scraped and PDF dates: ("YYYY", "MM", "DD") or NULL_DATE."""
+import re
+from datetime import date
+from functools import lru_cache
+
+NULL_DATE = ("null", "null", "null")
+
+MONTH_NAMES = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+]
+MONTHS = {name: number for number, name in enumerate(MONTH_NAMES, start=1)}
+MONTHS.update({name[:3]: number for name, number in list(MONTHS.items())})
+MONTHS["sept"] = 9
+WEEKDAYS = {"monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+            "mon", "tue", "tues", "wed", "thu", "thur", "thurs", "fri", "sat", "sun"}
+
+# Numbers (with an optional ordinal suffix) and words; anything else must be separator punctuation
+TOKEN_RE = re.compile(r"(\d+)(?:st|nd|rd|th)?|([A-Za-z]+)", re.IGNORECASE)
+SEPARATORS = " \t\r\n\xa0,.-/"
+
+DATE_CACHE_SIZE = 4096
+# Part of the result-cache keys of anything holding normalized dates; bump when normalization changes
+DATES_VERSION = 2
+
+
+def tokenize(text):
+    """Digit strings for numbers and ints for month names, or None when text holds anything else"""
+    tokens = []
+    end = 0
+    for match in TOKEN_RE.finditer(text):
+        if text[end:match.start()].strip(SEPARATORS):
+            return None
+        end = match.end()
+        number, word = match.groups()
+        if number is not None:
+            tokens.append(number)
+            continue
+        word = word.lower()
+        if word in WEEKDAYS:
+            continue
+        if word not in MONTHS:
+            return None
+        tokens.append(MONTHS[word])
+    if text[end:].strip(SEPARATORS):
+        return None
+    return tokens
+
+
+def _day(token):
+    return int(token) if isinstance(token, str) and len(token) <= 2 else None
+
+
+def _year(token):
+    return int(token) if isinstance(token, str) and len(token) == 4 else None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def normalize_date(text):
+    """Normalize "14 June 2024", "June 14, 2024", "Sept. 3, 2024", "3rd March 2024", "2024-03-03"...
+
+    Month names are matched case-insensitively in full, as three-letter abbreviations or "Sept";
+    a leading weekday, ordinal suffixes and stray whitespace or punctuation are ignored.
+    """
+    if not isinstance(text, str):
+        return NULL_DATE
+    tokens = tokenize(text)
+    if not tokens or len(tokens) != 3:
+        return NULL_DATE
+
+    first, second, third = tokens
+    if isinstance(second, int):  # 14 June 2024
+        year, month, day = _year(third), second, _day(first)
+    elif isinstance(first, int):  # June 14, 2024
+        year, month, day = _year(third), first, _day(second)
+    elif len(first) == 4 and len(second) <= 2 and len(third) <= 2:  # 2024-06-14
+        year, month, day = int(first), int(second), int(third)
+    else:
+        return NULL_DATE
+    if year is None or day is None:
+        return NULL_DATE
+
+    try:
+        date(year, month, day)
+    except ValueError:
+        return NULL_DATE
+    return str(year), f"{month:02d}", f"{day:02d}"
+
+
+def normalize_dates(texts):
+    """normalize_date over many strings (e.g. every history line of an issue), each distinct one parsed once"""
+    return [normalize_date(text) for text in texts]
+
+
+def parse_date(date_str):
+    return normalize_date(date_str)
@@ -0,0 +1,136 @@
+"""Article page fetching: an on-disk HTTP cache and one parse per page per run."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from jatsgen.article_page import ArticlePage, parse_article_page
+from jatsgen.cache import cache_key, content_hash
+from jatsgen.client import RETRY_STATUSES, get_client
+from jatsgen.dates import DATES_VERSION
+from jatsgen.metrics import count, timed_stage
+
+CACHE_DIR = os.environ.get("JATSGEN_CACHE_DIR", ".jatsgen_cache")
+
+
+class HttpCache:
+    """Response bodies on disk, revalidated with ETag / Last-Modified"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".body"
+
+    def load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def store(self, url, response):
+        validators = {
+            name: response.headers[header]
+            for name, header in [("etag", "ETag"), ("last_modified", "Last-Modified")]
+            if header in response.headers
+        }
+        if not validators:
+            return  # Nothing to revalidate against later
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        # Write-then-rename so concurrent batch workers never see half a file
+        self._write(body_path, response.content)
+        self._write(meta_path, json.dumps(dict(validators, url=url)).encode("utf-8"))
+
+    def _write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class PageFetcher:
+    """Fetch and parse each article page at most once for the lifetime of this object (one run)"""
+
+    def __init__(self, cache_dir=CACHE_DIR, client=None, pages=None, results=None):
+        self.client = client or get_client()
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.results = results
+        self._pages = dict(pages or {})
+        self._lock = threading.Lock()
+
+    @timed_stage("fetch")
+    def fetch(self, url):
+        meta, body = self.cache.load(url) if self.cache else (None, None)
+        headers = {}
+        if meta:
+            if "etag" in meta:
+                headers["If-None-Match"] = meta["etag"]
+            if "last_modified" in meta:
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = self.client.get(url, headers=headers)
+        except Exception:
+            if body is None:
+                raise
+            count("http_stale")
+            return body  # Site down or circuit open: the last copy beats a page of "null"s
+        count("http_requests")
+        count("bytes_fetched", len(response.content))
+        if response.status_code in RETRY_STATUSES and body is not None:
+            count("http_stale")
+            return body  # Retries ran out on 429/5xx: same as a site that is down
+        if response.status_code == 304 and body is not None:
+            count("http_not_modified")
+            return body
+        if self.cache and response.status_code == 200:
+            try:
+                self.cache.store(url, response)
+            except OSError:
+                pass  # A read-only cache dir must not break generation
+        return response.content
+
+    @timed_stage("parse_page")
+    def parse(self, content):
+        """parse_article_page, served from the result cache when this exact page was parsed before"""
+        if self.results is None:
+            return parse_article_page(content)
+        key = cache_key("page", content_hash(content), DATES_VERSION)
+        cached = self.results.get_json(key)
+        if cached is not None:
+            return ArticlePage(tuple(cached["published"]), cached["keywords"])
+        page = parse_article_page(content)
+        self.results.put_json(key, page._asdict())
+        return page
+
+    def article_page(self, url):
+        """Parsed page for url; a failed fetch is remembered and re-raised rather than retried"""
+        with self._lock:
+            if url in self._pages:
+                count("page_reuses")
+            else:
+                try:
+                    self._pages[url] = self.parse(self.fetch(url))
+                except Exception as e:
+                    self._pages[url] = e
+            page = self._pages[url]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    def remember(self, url, page):
+        """Seed the run with a page scraped elsewhere (e.g. the concurrent scrape stage)"""
+        with self._lock:
+            self._pages[url] = page
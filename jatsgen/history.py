@@ -0,0 +1,236 @@
+"""Received/Accepted history-line scanner for article PDFs."""
+import multiprocessing
+import os
+import logging
+import re
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from jatsgen.metrics import count
+
+log = logging.getLogger(__name__)
+
+# "June 14, 2024" / "14 June 2024", plus "Sept. 3, 2024", "3rd March 2024" and "2024-03-03"
+combined_date = (r"(?:[A-Za-z]{3,9}\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s*\d{4}"
+                 r"|\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]{3,9}\.?,?\s*\d{4}|\d{4}-\d{1,2}-\d{1,2})")
+
+# The five history-line layouts we see, tried as one alternation so each page is matched in a
+# single pass. Alternatives keep their old priority when several match at the same position.
+HISTORY_PATTERNS = [
+    rf"Received\s*[:\-]?\s*({combined_date}),\s*Accepted\s*[:\-]?\s*({combined_date})",
+    rf"Received\s+({combined_date})\s+Accepted\s+({combined_date})",
+    rf"Received\s+on\s+({combined_date})\s*;\s*Accepted\s+on\s+({combined_date})",
+    rf"Received[:\-]?\s*({combined_date})\s*\|\s*(?:Revised[:\-]?\s*{combined_date}\s*\|\s*)?Accepted[:\-]?\s*({combined_date})",
+    rf"Received\s*[:\-]?\s*({combined_date})\s*;\s*Accepted\s*[:\-]?\s*({combined_date})",
+]
+HISTORY_RE = re.compile("(?i)" + "|".join(f"(?:{pattern})" for pattern in HISTORY_PATTERNS))
+
+# History lines sit in the first-page header block or a footer note far more often than mid-article
+FIRST_PAGES = 2
+LAST_PAGES = 2
+CLIP_BANDS = ((0.0, 0.4), (0.75, 1.0))  # Fractions of the page height: header block, footer block
+
+# Optional parallel scan of long PDFs: pages after the first/last ones are split into ranges of
+# PARALLEL_RANGE pages and scanned by PDF_WORKERS processes (0 or 1 keeps the serial scan).
+# Below PARALLEL_MIN_PAGES the serial scan wins because worker start-up is not free.
+PDF_WORKERS = int(os.environ.get("JATSGEN_PDF_WORKERS", "0"))
+PARALLEL_MIN_PAGES = int(os.environ.get("JATSGEN_PARALLEL_MIN_PAGES", "80"))
+PARALLEL_RANGE = 16
+
+HistoryScan = namedtuple("HistoryScan", ["received", "accepted", "page", "pages_scanned"])
+
+
+def match_history(text):
+    """Return the (received, accepted) date strings of the first history line in text, or None"""
+    match = HISTORY_RE.search(text)
+    if not match:
+        return None
+    received, accepted = [group for group in match.groups() if group is not None]
+    return received.strip(), accepted.strip()
+
+
+def page_order(page_count, first_pages=FIRST_PAGES, last_pages=LAST_PAGES):
+    """First pages, then last pages, then everything in between"""
+    head = list(range(min(first_pages, page_count)))
+    tail = [n for n in range(max(page_count - last_pages, 0), page_count) if n not in head]
+    seen = set(head + tail)
+    return head + tail + [n for n in range(page_count) if n not in seen]
+
+
+def _bands(page):
+    import fitz  # PyMuPDF
+
+    rect = page.rect
+    return [fitz.Rect(rect.x0, rect.y0 + rect.height * top, rect.x1, rect.y0 + rect.height * bottom)
+            for top, bottom in CLIP_BANDS]
+
+
+def scan_history(doc, first_pages=FIRST_PAGES, last_pages=LAST_PAGES, clip=False, workers=0, source=None):
+    """Scan pages in priority order and stop at the first history line.
+
+    With clip=True the header/footer bands of the first and last pages are extracted first;
+    pages are read in full only when none of those bands holds a history line.
+
+    With workers > 1 and the document's source (path or buffer), documents of at least
+    PARALLEL_MIN_PAGES pages have their remaining pages scanned in parallel. The result is
+    the same as the serial scan's: the match on the earliest of those pages.
+    """
+    order = page_order(doc.page_count, first_pages, last_pages)
+    head = order[:first_pages + last_pages]
+    parallel = workers > 1 and source is not None and doc.page_count >= PARALLEL_MIN_PAGES
+    touched = set()  # A head page read clipped and then in full counts once
+    attempts = 0
+    passes = [(True, head)] if clip else []
+    passes.append((False, head if parallel else order))
+    for clipped, numbers in passes:
+        found, scanned, tried = _scan_pages(doc, numbers, clipped)
+        touched.update(numbers[:scanned])
+        attempts += tried
+        if found:
+            break
+    pages_scanned = len(touched)
+
+    if parallel and not found:
+        rest = order[len(head):]
+        try:
+            found, scanned = scan_pages_parallel(source, rest, workers)
+            tried = scanned  # Workers match each whole page once
+        except Exception as e:
+            log.warning(f"Parallel PDF scan failed, scanning serially: {e}")
+            found, scanned, tried = _scan_pages(doc, rest, False)
+        pages_scanned += scanned
+        attempts += tried
+
+    count("pdf_pages_scanned", pages_scanned)
+    count("regex_attempts", attempts)
+    if found:
+        return HistoryScan(found[1], found[2], found[0], pages_scanned)
+    return HistoryScan(None, None, None, pages_scanned)
+
+
+def _scan_pages(doc, numbers, clipped):
+    """((page, received, accepted) of the first match or None, pages scanned, texts matched against)"""
+    scanned = attempts = 0
+    for number in numbers:
+        page = doc[number]
+        scanned += 1
+        regions = _bands(page) if clipped else [None]
+        for region in regions:
+            found = match_history(page.get_text(clip=region))
+            attempts += 1
+            if found:
+                return (number, found[0], found[1]), scanned, attempts
+    return None, scanned, attempts
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Process pool kept for the life of the process so only the first long PDF pays for start-up"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a threaded process (the Streamlit server) is not safe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _stopped(run_dir, index):
+    """True once a range before this one has matched or the scan has been abandoned"""
+    try:
+        with open(os.path.join(run_dir, "stop"), "r", encoding="ascii") as f:
+            return int(f.read()) < index
+    except FileNotFoundError:
+        return not os.path.isdir(run_dir)
+    except (OSError, ValueError):
+        return False
+
+
+def _scan_range(path, run_dir, index, numbers):
+    """Worker: ((page, received, accepted) or None, pages scanned) for one range of pages"""
+    import fitz  # PyMuPDF
+
+    scanned = 0
+    try:
+        doc = fitz.open(path)
+    except Exception:
+        if _stopped(run_dir, index):
+            return None, 0  # The parent already cleaned up
+        raise
+    with doc:
+        for number in numbers:
+            if _stopped(run_dir, index):
+                break
+            scanned += 1
+            found = match_history(doc[number].get_text())
+            if found:
+                _signal_stop(run_dir, index)
+                return (number, found[0], found[1]), scanned
+    return None, scanned
+
+
+def _signal_stop(run_dir, index):
+    # Ranges after index can stop; a racing later range may overwrite this with a higher index,
+    # which only costs a little extra work since the parent still waits for every earlier range
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=run_dir)
+        with os.fdopen(fd, "w", encoding="ascii") as f:
+            f.write(str(index))
+        os.replace(tmp_path, os.path.join(run_dir, "stop"))
+    except OSError:
+        pass
+
+
+def scan_pages_parallel(source, numbers, workers):
+    """Scan pages numbers (ascending) of the PDF at source across a process pool.
+
+    Returns ((page, received, accepted) of the earliest matching page or None, pages scanned).
+    Ranges after a match are cancelled or stop at their next page.
+    """
+    if not numbers:
+        return None, 0
+    ranges = [numbers[start:start + PARALLEL_RANGE] for start in range(0, len(numbers), PARALLEL_RANGE)]
+    run_dir = tempfile.mkdtemp(prefix="jatsgen-scan-")
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+        else:
+            # Workers open their own copy of an in-memory upload; the unique run dir keeps sessions apart
+            path = os.path.join(run_dir, "source.pdf")
+            with open(path, "wb") as f:
+                f.write(memoryview(source))
+
+        pool = get_pool(workers)
+        futures = {pool.submit(_scan_range, path, run_dir, index, numbers): index for index, numbers in enumerate(ranges)}
+        results = {}
+        best = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                index = futures[future]
+                results[index] = future.result()
+                if results[index][0] and (best is None or index < best):
+                    best = index
+                    _signal_stop(run_dir, index)
+                    for other in pending:
+                        if futures[other] > index:
+                            other.cancel()
+            if best is not None and all(futures[future] > best for future in pending):
+                break  # Every earlier range is done; later ones are stopping on their own
+
+        scanned = sum(result[1] for result in results.values())
+        return (results[best][0] if best is not None else None), scanned
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
@@ -0,0 +1,141 @@
+"""Local background job queue, so the web app's script threads never wait on scraping or PDF scans."""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from jatsgen.metrics import track
+
+JOB_WORKERS = int(os.environ.get("JATSGEN_JOB_WORKERS", "4"))
+JOB_TTL = 60 * 60  # Finished jobs nobody collected are dropped after this many seconds
+CANCEL_TIMEOUT = 30.0  # Longest cancel() waits for a job to reach its next stage or item
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "error"
+
+
+class JobCancelled(Exception):
+    """Raised in a cancelled job at its next stage or item"""
+
+
+class Job:
+    """One queued call: its status, current stage and result, updated by the worker and read by pollers"""
+
+    def __init__(self, job_id, labels):
+        self.id = job_id
+        self.labels = labels
+        self.status = QUEUED
+        self.stage = None
+        self.stages = []  # (stage, seconds) of the stages already finished
+        self.messages = []  # (level, text) reported while running, e.g. ("warning", ...)
+        self.items = None  # (done, total) for jobs made of many items, e.g. the articles of an archive
+        self.result = None
+        self.error = None
+        self.metrics = None
+        self.submitted = time.time()
+        self.finished = None
+        self.cancelled = False
+        self._stage_started = None
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED)
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled("Cancelled")
+
+    def wait(self, timeout=None):
+        """True once the job has finished, waiting up to timeout seconds"""
+        return self._finished.wait(timeout)
+
+    def progress(self, stage):
+        """Mark the start of stage (None ends the current one)"""
+        if stage is not None:
+            self.check()
+        now = time.perf_counter()
+        with self._lock:
+            if self.stage is not None:
+                self.stages.append((self.stage, now - self._stage_started))
+            self.stage = stage
+            self._stage_started = now
+
+    def advance(self, done, total):
+        self.check()
+        with self._lock:
+            self.items = (done, total)
+
+    def warn(self, text):
+        with self._lock:
+            self.messages.append(("warning", text))
+
+    def fail(self, text):
+        with self._lock:
+            self.messages.append(("error", text))
+
+
+class JobQueue:
+    """Jobs run on a thread pool; submit returns at once and callers poll get(job_id)"""
+
+    def __init__(self, workers=JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jatsgen-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, labels=None, **kwargs):
+        """Queue fn(job, *args, **kwargs) and return the job id; labels go on the job's metrics record"""
+        self._purge()
+        job = Job(uuid.uuid4().hex, labels or {})
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        result = error = None
+        with track(**job.labels) as metrics:
+            try:
+                result = fn(job, *args, **kwargs)
+            except Exception as e:
+                error = str(e)
+        job.progress(None)
+        job.result, job.error, job.metrics = result, error, metrics
+        job.finished = time.time()
+        job.status = FAILED if error is not None else DONE  # Set last: pollers read the fields above once done
+        job._finished.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pop(self, job_id):
+        """Remove a job once its result has been collected"""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def cancel(self, job_id, timeout=CANCEL_TIMEOUT):
+        """Remove a job, stopping it at its next stage or item; True once it is no longer running"""
+        job = self.pop(job_id)
+        if job is None:
+            return True
+        job.cancelled = True
+        if job.status == QUEUED:
+            return True  # Fails at its first stage without doing anything
+        return job.wait(timeout)
+
+    def position(self, job_id):
+        """Queued jobs submitted before job_id (0 once it is running)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return 0
+            return sum(other.status == QUEUED and other.submitted < job.submitted for other in self._jobs.values())
+
+    def _purge(self):
+        cutoff = time.time() - JOB_TTL
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished < cutoff]:
+                del self._jobs[job_id]
@@ -0,0 +1,147 @@
+"""DOI parse records and the journal registry that supplies each journal's Journal-meta block."""
+import xml.etree.ElementTree as ET
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+from jatsgen.cache import cache_key, content_hash
+
+PUBLISHER_NAME = "MMU Press, Multimedia University"
+# Bump when PUBLISHER_NAME or build_journal_meta change the Journal-meta of non-preloaded journals
+REGISTRY_VERSION = 1
+# Optional JSON list of {"issn", "title", "shortcode"[, "publisher"]} preloaded into the registry
+JOURNALS_FILE = os.environ.get("JATSGEN_JOURNALS", "")
+
+# Everything the pipeline derives from an article's DOI. volume and issue are None when the DOI
+# has no "YYYY.V.I" run; number is "" when the DOI doesn't end in digits.
+DoiRecord = namedtuple("DoiRecord", ["doi", "shortcode", "volume", "issue", "number"])
+Journal = namedtuple("Journal", ["issn", "title", "shortcode", "publisher", "journal_meta"])
+
+
+def _year_position(parts):
+    for i, part in enumerate(parts):
+        if len(part) == 4 and part.isdigit():
+            return i
+    return -1
+
+
+@lru_cache(maxsize=4096)
+def parse_doi(text):
+    """DoiRecord for the raw ELocationID text (None or "" give the "null" shortcode and no parts)"""
+    if not text:
+        return DoiRecord("", "null", None, None, "")
+
+    # Shortcode: the part before the first four-digit year, splitting on both '/' and '.'
+    shortcode = "null"
+    slash_parts = re.split(r'[/.]', text)
+    for i, part in enumerate(slash_parts):
+        if part.isdigit() and len(part) == 4 and i > 0:
+            shortcode = slash_parts[i - 1].upper()
+            break
+
+    # Volume and issue follow the year in the dotted DOI (10.xxx/xxx.YYYY.V.I...); the last part numbers the article
+    doi = text.strip()
+    parts = doi.split(".")
+    volume = issue = None
+    year_pos = _year_position(parts)
+    if year_pos != -1 and len(parts) > year_pos + 2:
+        volume, issue = parts[year_pos + 1], parts[year_pos + 2]
+    number = parts[-1] if parts[-1].isdigit() else ""
+    return DoiRecord(doi, shortcode, volume, issue, number)
+
+
+def doi_record(root):
+    """DoiRecord of the first doi ELocationID under root, or None when there is none"""
+    doi_elem = root.find(".//ELocationID[@EIdType='doi']")
+    return None if doi_elem is None else parse_doi(doi_elem.text)
+
+
+def registry_fingerprint(data=b""):
+    """Key over what every Journal-meta depends on: REGISTRY_VERSION and the JATSGEN_JOURNALS file contents"""
+    return cache_key("journals", REGISTRY_VERSION, content_hash(data))
+
+
+def build_journal_meta(issn, title, shortcode, publisher=PUBLISHER_NAME):
+    journal_meta = ET.Element("Journal-meta")
+    for id_type, val in [("pmc", shortcode.lower()), ("pubmed", title), ("publisher", shortcode)]:
+        ET.SubElement(journal_meta, "journal-id", {"journal-id-type": id_type}).text = val
+    ET.SubElement(journal_meta, "Issn").text = issn
+    publisher_elem = ET.SubElement(journal_meta, "Publisher")
+    ET.SubElement(publisher_elem, "PublisherName").text = publisher
+    ET.SubElement(journal_meta, "JournalTitle").text = title
+    return journal_meta
+
+
+class JournalRegistry:
+    """Journals with their Journal-meta element, each built once per process.
+
+    Preloaded journals are found by ISSN or shortcode and are authoritative. Journals first
+    seen in an article are registered under that article's exact (ISSN, title, shortcode),
+    so their Journal-meta is what the article alone would give. The elements are shared by
+    every Article that uses them and must be treated as read-only.
+    """
+
+    def __init__(self, journals=(), fingerprint=None):
+        self.fingerprint = fingerprint or registry_fingerprint()
+        self._by_issn = {}
+        self._by_shortcode = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+        for entry in journals:
+            journal = self._make(entry["issn"], entry["title"], entry["shortcode"], entry.get("publisher", PUBLISHER_NAME))
+            self._by_issn[journal.issn] = journal
+            self._by_shortcode[journal.shortcode] = journal
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        return cls(json.loads(data.decode("utf-8")), fingerprint=registry_fingerprint(data))
+
+    def _make(self, issn, title, shortcode, publisher=PUBLISHER_NAME):
+        return Journal(issn, title, shortcode, publisher, build_journal_meta(issn, title, shortcode, publisher))
+
+    def lookup(self, issn=None, shortcode=None):
+        """Preloaded journal for issn, else for shortcode (never for the "null" shortcode)"""
+        journal = self._by_issn.get(issn)
+        if journal is None and shortcode != "null":
+            journal = self._by_shortcode.get(shortcode)
+        return journal
+
+    def journal(self, issn, title, shortcode):
+        """The journal an article belongs to, registered from the article's own values if not preloaded"""
+        journal = self.lookup(issn, shortcode)
+        if journal is not None:
+            return journal
+        key = (issn, title, shortcode)
+        with self._lock:
+            if key not in self._seen:
+                self._seen[key] = self._make(issn, title, shortcode)
+            return self._seen[key]
+
+
+_registry = None
+_registry_stamp = None
+_registry_lock = threading.Lock()
+
+
+def _journals_stamp():
+    # Size and mtime of JATSGEN_JOURNALS, so long-running processes (the app, rebuild --watch) see edits
+    if not JOURNALS_FILE:
+        return None
+    stat = os.stat(JOURNALS_FILE)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def get_registry():
+    """Process-wide registry, preloaded from JATSGEN_JOURNALS when set and reloaded when that file changes"""
+    global _registry, _registry_stamp
+    stamp = _journals_stamp()
+    with _registry_lock:
+        if _registry is None or stamp != _registry_stamp:
+            _registry = JournalRegistry.from_file(JOURNALS_FILE) if JOURNALS_FILE else JournalRegistry()
+            _registry_stamp = stamp
+        return _registry
@@ -0,0 +1,180 @@
+"""Per-stage wall time and counters for each article, as JSON log lines and Prometheus text.
+
+Stages nest and are inclusive: a page fetch triggered by generate_filename counts towards both
+"fetch" and "generate_filename". Outside a track() block the hooks do nothing.
+"""
+import contextvars
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+log = logging.getLogger(__name__)
+
+METRICS_FILE = os.environ.get("JATSGEN_METRICS_FILE", "")
+METRICS_LOG = os.environ.get("JATSGEN_METRICS_LOG", "")
+
+_current = contextvars.ContextVar("jatsgen_metrics", default=None)
+
+
+class Metrics:
+    """Stage timings and counters collected while one article (or one step of it) is generated"""
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()  # The scrape stage records from several threads at once
+
+    def add_time(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def add(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def to_dict(self):
+        return dict(
+            self.labels,
+            stages={name: {"seconds": round(seconds, 6), "calls": calls} for name, (seconds, calls) in self.stages.items()},
+            counters=dict(self.counters),
+        )
+
+
+@contextmanager
+def track(**labels):
+    """Collect the stages and counters of the enclosed work; the total is recorded as stage "total" """
+    metrics = Metrics(**labels)
+    token = _current.set(metrics)
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.add_time("total", time.perf_counter() - started)
+        _current.reset(token)
+
+
+@contextmanager
+def timed(stage):
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(stage, time.perf_counter() - started)
+
+
+def timed_stage(stage):
+    """Decorator form of timed()"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(counter, value=1):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add(counter, value)
+
+
+def log_metrics(record):
+    """One JSON line per record on the jatsgen.metrics logger"""
+    log.info(json.dumps(record, sort_keys=True))
+
+
+def configure_log(path):
+    """Send the JSON lines to path ("-" for stderr) with nothing but the JSON on each line"""
+    if not path or getattr(log, "_jatsgen_target", None) == path:
+        return
+    handler = logging.StreamHandler(sys.stderr) if path == "-" else logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    log._jatsgen_target = path
+
+
+class Registry:
+    """Process-wide totals over merged records, rendered in the Prometheus text format.
+
+    Records with a "status" label count as articles; others (e.g. the batch prefetch) add only time and counters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.articles = {}
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.counters = {}
+
+    def merge(self, record):
+        with self._lock:
+            if "status" in record:
+                self.articles[record["status"]] = self.articles.get(record["status"], 0) + 1
+            for name, stage in record["stages"].items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + stage["seconds"]
+                self.stage_calls[name] = self.stage_calls.get(name, 0) + stage["calls"]
+            for name, value in record["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def prometheus_text(self):
+        with self._lock:
+            lines = [
+                "# HELP jatsgen_articles_total Article generation steps recorded, by status.",
+                "# TYPE jatsgen_articles_total counter",
+            ]
+            lines += [f'jatsgen_articles_total{{status="{status}"}} {value}' for status, value in sorted(self.articles.items())]
+            lines += [
+                "# HELP jatsgen_stage_seconds_total Wall time spent in each pipeline stage.",
+                "# TYPE jatsgen_stage_seconds_total counter",
+            ]
+            lines += [f'jatsgen_stage_seconds_total{{stage="{name}"}} {value:.6f}' for name, value in sorted(self.stage_seconds.items())]
+            lines += [
+                "# HELP jatsgen_stage_calls_total Times each pipeline stage ran.",
+                "# TYPE jatsgen_stage_calls_total counter",
+            ]
+            lines += [f'jatsgen_stage_calls_total{{stage="{name}"}} {value}' for name, value in sorted(self.stage_calls.items())]
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE jatsgen_{name}_total counter", f"jatsgen_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics file atomically (suits node_exporter's textfile collector)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".prom.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+REGISTRY = Registry()
+
+
+def publish(record, metrics_path=METRICS_FILE):
+    """Log a record, add it to the process totals and refresh the metrics file when one is configured"""
+    log_metrics(record)
+    REGISTRY.merge(record)
+    if metrics_path:
+        try:
+            REGISTRY.write(metrics_path)
+        except OSError as e:
+            log.warning(f"Could not write metrics file: {e}")
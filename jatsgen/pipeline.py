@@ -0,0 +1,481 @@
+"""Streamlit-free generation pipeline shared by the web app and the batch CLI."""
+import xml.etree.ElementTree as ET
+import codecs
+import io
+import itertools
+import logging
+import os
+import re
+
+from jatsgen.cache import cache_key, content_hash
+from jatsgen.dates import DATES_VERSION, NULL_DATE, normalize_dates
+from jatsgen.fetch import PageFetcher
+from jatsgen.history import FIRST_PAGES, LAST_PAGES, PDF_WORKERS, scan_history
+from jatsgen.journals import doi_record, get_registry, parse_doi
+from jatsgen.metrics import timed, timed_stage
+from jatsgen.writer import write_article_block, write_front, write_xml
+
+log = logging.getLogger(__name__)
+
+# Bump when build_article, the XML writer or the template splice change their output, so cached
+# article-meta and combined documents from older code are not served
+PIPELINE_VERSION = 1
+
+
+def _log_warning(message):
+    log.warning(message)
+
+
+def open_pdf(source):
+    """Open a PDF from a path or straight from an in-memory buffer (bytes, upload buffer, mmap view)"""
+    import fitz  # PyMuPDF, loaded on first use to keep app start-up light
+
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    return fitz.open(stream=memoryview(source), filetype="pdf")
+
+
+@timed_stage("extract_history")
+def extract_history_from_pdf(pdf, warn=_log_warning, first_pages=FIRST_PAGES, last_pages=LAST_PAGES, clip=False,
+                             cache=None, workers=PDF_WORKERS):
+    try:
+        key = None
+        if cache is not None:
+            key = cache_key("history", content_hash(pdf), first_pages, last_pages, clip, DATES_VERSION)
+            cached = cache.get_json(key)
+            if cached is not None:
+                return None if cached["dates"] is None else tuple(tuple(date) for date in cached["dates"])
+
+        with timed("pdf_scan"), open_pdf(pdf) as doc:
+            scan = scan_history(doc, first_pages=first_pages, last_pages=last_pages, clip=clip, workers=workers, source=pdf)
+        dates = None  # Return None when dates aren't found
+        if scan.received is not None:
+            dates = tuple(normalize_dates([scan.received, scan.accepted]))
+        if key:
+            cache.put_json(key, {"dates": dates})
+        return dates
+    except Exception as e:
+        warn(f"Error processing PDF: {str(e)}")
+        return None
+
+
+def dates_missing(dates):
+    """True when the history dates still have to be entered by hand"""
+    return dates is None or dates == (NULL_DATE, NULL_DATE)
+
+
+@timed_stage("generate_filename")
+def generate_filename(article_url, root, fetcher=None, warn=_log_warning):
+    fetcher = fetcher or PageFetcher()
+    try:
+        # DOI components, parsed once per article and shared with build_article
+        record = doi_record(root)
+        last_doi_digit = record.number if record else ""
+
+        # Extract number from URL
+        numbers = re.findall(r'\d+', article_url)
+        last_url_num = numbers[-1] if numbers else "-"
+
+        # Initialize volume and issue
+        volume = root.findtext(".//Volume", "").strip()
+        issue = root.findtext(".//Issue", "").strip()
+
+        # If not found in standard tags, try to extract from DOI
+        if (not volume or not issue) and record and record.volume is not None:
+            volume = volume or record.volume
+            issue = issue or record.issue
+
+        # Set defaults if still not found
+        vol_num = volume if volume else "-"
+        issue_num = issue if issue else "-"
+
+        # Extract year
+        year = "null"
+        try:
+            year, _, _ = fetcher.article_page(article_url).published
+        except Exception as e:
+            warn(f"Could not extract year from article URL: {str(e)}")
+            pub_date = root.find(".//PubDate[@PubStatus='pub']")
+            if pub_date is not None:
+                year_elem = pub_date.find("Year")
+                if year_elem is not None and year_elem.text:
+                    year = year_elem.text.strip()
+
+        # Construct filename parts
+        parts = [
+            last_doi_digit,
+            last_url_num,
+            f"Vol.{vol_num}",
+            f"No.{issue_num}",
+            year
+        ]
+        return "_".join(filter(None, parts)) + ".xml"  # filter removes empty parts
+    except Exception as e:
+        warn(f"Could not generate filename: {str(e)}")
+        return "formatted_article_set.xml"
+
+
+def find_article(root):
+    article = root.find(".//Article")
+    if article is None:
+        raise ValueError("No Article element found in the input XML")
+    return article
+
+
+def parse_pages(article):
+    """First page, last page and page count of an input Article"""
+    fp = 0
+    lp = 0
+    try:
+        fp_text = article.findtext(".//FirstPage", "0").strip()
+        lp_text = article.findtext(".//LastPage", "0").strip()
+
+        # Extract first page number (split on en dash '–' or hyphen '-')
+        if fp_text and '–' in fp_text:
+            fp = int(fp_text.split('–')[0])
+        elif fp_text and '-' in fp_text:
+            fp = int(fp_text.split('-')[0])
+        else:
+            fp = int(fp_text) if fp_text.isdigit() else 0
+
+        # Extract last page number (split on en dash '–' or hyphen '-')
+        if lp_text and '–' in lp_text:
+            lp = int(lp_text.split('–')[1])
+        elif lp_text and '-' in lp_text:
+            lp = int(lp_text.split('-')[1])
+        else:
+            lp = int(lp_text) if lp_text.isdigit() else 0
+
+        # Calculate page count (ensure lp >= fp to avoid negative values)
+        page_count = str(max(0, lp - fp + 1)) if lp >= fp else "0"
+    except:
+        page_count = "null"
+
+    return fp, lp, page_count
+
+
+def build_history(dates):
+    """History element for ((received y, m, d), (accepted y, m, d)); None gives "null" placeholders"""
+    (r_year, r_month, r_day), (a_year, a_month, a_day) = dates or (NULL_DATE, NULL_DATE)
+    history_elem = ET.Element("History")
+    for status, y, m, d in [("received", r_year, r_month, r_day), ("accepted", a_year, a_month, a_day)]:
+        pubdate = ET.SubElement(history_elem, "PubDate", {"PubStatus": status})
+        ET.SubElement(pubdate, "Year").text = y
+        ET.SubElement(pubdate, "Month").text = m
+        ET.SubElement(pubdate, "Day").text = d
+    return history_elem
+
+
+def set_history(article_out, dates):
+    """Swap the History of an already built Article, leaving everything else untouched"""
+    article_meta = article_out.find("article-meta")
+    old = article_meta.find("History")
+    new = build_history(dates)
+    new.tail = old.tail
+    article_meta[list(article_meta).index(old)] = new
+
+
+@timed_stage("build_article")
+def build_article(article, article_url, pdf_link, dates, fetcher=None, warn=_log_warning):
+    """Build the output Article element (Journal-meta + article-meta) for one input Article"""
+    fetcher = fetcher or PageFetcher()
+    # Journal metadata processing
+    journal = article.find("Journal")
+    jt_elem = journal.find("JournalTitle") if journal is not None else None
+    issn_elem = journal.find("Issn") if journal is not None else None
+    record = doi_record(article)
+    doi = record.doi if record else "null"
+    record = record or parse_doi(None)
+
+    if jt_elem is None or issn_elem is None:
+        raise ValueError("Journal title or ISSN not found")
+
+    # Journal-meta is built once per journal and shared (the writer never modifies it)
+    shortcode = record.shortcode
+    journal_info = get_registry().journal(issn_elem.text.strip(), jt_elem.text.strip(), shortcode)
+
+    # Create XML structure
+    article_out = ET.Element("Article")
+    article_out.append(journal_info.journal_meta)
+
+    # Article metadata
+    article_meta = ET.SubElement(article_out, "article-meta")
+
+    # DOI and custom ID
+    ET.SubElement(article_meta, "article-id", {"pub-id-type": "doi"}).text = doi
+
+    volume = article.findtext(".//Volume", "").strip()
+    issue = article.findtext(".//Issue", "").strip()
+
+    # If not found, take the parts after the year in the DOI (10.xxx/xxx.YYYY.V.I...)
+    if (not volume or not issue) and record.volume is not None:
+        volume, issue = record.volume, record.issue
+
+    # For handle page number
+    fp, lp, page_count = parse_pages(article)
+
+    custom_id = f"{shortcode[0].lower()}{shortcode}.v{volume}.i{issue}.pg{str(fp)}"
+    ET.SubElement(article_meta, "article-id", {"pub-id-type": "other"}).text = custom_id
+
+    # Title
+    title_elem = article.find("ArticleTitle")
+    ET.SubElement(article_meta, "ArticleTitle").text = title_elem.text.strip() if title_elem is not None else "null"
+
+    # Authors
+    author_list = article.find("AuthorList")
+    if author_list is not None:
+        article_meta.append(author_list)
+    else:
+        ET.SubElement(article_meta, "AuthorList")
+
+    # Publication dates from webpage
+    try:
+        page = fetcher.article_page(article_url)
+        year, month, day = page.published
+
+        # Add publication dates
+        epublish_date = article.find(".//PubDate[@PubStatus='epublish']")
+        if epublish_date is not None:
+            article_meta.append(epublish_date)
+
+        for pub_type in ['pub', 'cover']:
+            pd_elem = ET.Element("PubDate", {"PubStatus": pub_type})
+            for tag, val in zip(["Year", "Month", "Day"], [year, month, day]):
+                ET.SubElement(pd_elem, tag).text = val
+            article_meta.append(pd_elem)
+
+        # Keywords
+        keywords_elem = ET.SubElement(article_meta, "Keywords")
+        for kw in page.keywords:
+            kw_elem = ET.SubElement(keywords_elem, "Keyword")
+            ET.SubElement(kw_elem, "italic").text = kw
+    except Exception as e:
+        warn(f"Could not scrape article URL: {str(e)}")
+
+    # Volume/Issue/Pages
+    ET.SubElement(article_meta, "Volume").text = volume
+    ET.SubElement(article_meta, "Issue").text = issue
+
+    # Create tagging for first page, last page and page count
+    ET.SubElement(article_meta, "FirstPage").text = str(fp)
+    ET.SubElement(article_meta, "LastPage").text = str(lp)
+    ET.SubElement(article_meta, "PageCount").text = page_count
+
+    # Add dates to XML
+    article_meta.append(build_history(dates))
+
+    # Abstract
+    abstract = article.find("Abstract")
+    abs_elem = ET.SubElement(article_meta, "abstract")
+    p_elem = ET.SubElement(abs_elem, "p")
+    p_elem.text = abstract.text.strip() if abstract is not None else "null"
+
+    # Links and language
+    ET.SubElement(article_meta, "pdf-link").text = pdf_link if pdf_link else "null"
+    ET.SubElement(article_meta, "full_text_url").text = article_url if article_url else "null"
+    ET.SubElement(article_meta, "Language").text = "eng"
+
+    return article_out
+
+
+@timed_stage("serialize")
+def serialize_article(article_out):
+    """Indented XML for the output Article, written in one pass over the tree"""
+    parts = []
+    write_xml(article_out, parts.append)
+    return "".join(parts)
+
+
+@timed_stage("process_article")
+def process_article(article, article_url, pdf_link, dates, fetcher=None, warn=_log_warning,
+                    cache=None, source_hash=None):
+    """build_article + serialize_article, cached on the input XML hash, links, dates, page data and journal registry"""
+    fetcher = fetcher or PageFetcher()
+    key = None
+    if cache is not None and source_hash:
+        try:
+            page = fetcher.article_page(article_url)
+        except Exception:
+            page = None  # build_article reports the scrape failure; that output isn't cached
+        if page is not None:
+            key = cache_key("article-meta", source_hash, article_url, pdf_link, dates, page, get_registry().fingerprint,
+                            PIPELINE_VERSION)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached.decode("utf-8")
+
+    xml_str = serialize_article(build_article(article, article_url, pdf_link, dates, fetcher=fetcher, warn=warn))
+    if key:
+        cache.put(key, xml_str.encode("utf-8"))
+    return xml_str
+
+
+def generate_article(pdf_data, xml_data, article_url, pdf_link, warn=_log_warning, error=_log_warning, progress=None,
+                     cache=None):
+    """The app's Generate XML step for one upload, without the UI (it runs on the job queue).
+
+    Returns {"filename", "dates", "processed_xml", "pending_article"}. When the PDF has no usable
+    history dates, processed_xml is None and pending_article is the Article built with placeholder
+    History, waiting for dates picked by hand. progress(stage) is called as each stage starts.
+    """
+    progress = progress or (lambda stage: None)
+    progress("parse_xml")
+    with timed("parse_xml"):
+        root = ET.fromstring(xml_data)
+
+    # Shared by the filename and metadata steps so the article page is fetched once
+    fetcher = PageFetcher(results=cache)
+    progress("generate_filename")
+    filename = generate_filename(article_url, root, fetcher=fetcher, warn=warn)
+    article = find_article(root)
+
+    progress("extract_history")
+    dates = extract_history_from_pdf(pdf_data, warn=error, cache=cache)
+
+    result = {"filename": filename, "dates": dates, "processed_xml": None, "pending_article": None}
+    progress("process_article")
+    if dates_missing(dates):
+        # Keep the fully built article (journal meta, scraped data) with placeholder History so
+        # picking the dates later only swaps History and re-serializes
+        result["pending_article"] = build_article(article, article_url, pdf_link, None, fetcher=fetcher, warn=warn)
+    else:
+        result["processed_xml"] = process_article(
+            article, article_url, pdf_link, dates, fetcher=fetcher, warn=warn,
+            cache=cache, source_hash=content_hash(xml_data),
+        )
+    return result
+
+
+def build_front(processed):
+    """<front> block ready for the template, from the processed XML string or the built Article"""
+    article_out = ET.fromstring(processed) if isinstance(processed, str) else processed
+    parts = []
+    write_front(article_out, parts.append)
+    return "".join(parts)
+
+
+def article_block(processed):
+    """<Article> entry of the issue-level ArticleSet, from the processed XML string or the built Article"""
+    article_out = ET.fromstring(processed) if isinstance(processed, str) else processed
+    parts = []
+    write_article_block(article_out, parts.append)
+    return "".join(parts)
+
+
+TEMPLATE_CHUNK_SIZE = 64 * 1024
+COMBINED_CACHE_BYTES = 8 * 1024 * 1024
+FRONT_START_RE = re.compile(r"<front(?:\s[^>]*)?>")
+FRONT_END_RE = re.compile(r"</front\s*>")
+XML_ENCODING_RE = re.compile(rb"\s*<\?xml[^>]*?encoding\s*=\s*[\"']([A-Za-z0-9._-]+)[\"']")
+
+
+def sniff_encoding(head):
+    """Template encoding from its BOM or XML declaration (UTF-8 when neither says otherwise)"""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    match = XML_ENCODING_RE.match(head)
+    if not match:
+        return "utf-8"
+    encoding = match.group(1).decode("ascii")
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        raise ValueError(f"Template declares unknown encoding {encoding!r}")
+
+
+def _chunks(source, chunk_size):
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+
+
+def _split_tag(text):
+    """Split off a trailing tag that may continue in the next chunk"""
+    start = text.rfind("<")
+    if start == -1 or ">" in text[start:]:
+        return text, ""
+    return text[:start], text[start:]
+
+
+def splice_template(template, front_xml, out, chunk_size=TEMPLATE_CHUNK_SIZE):
+    """Stream template into out with its <front>...</front> replaced by front_xml.
+
+    template is a binary file object or buffer and out a binary file object. Only one chunk
+    is held at a time; bytes outside <front> are copied unchanged, in the template's encoding.
+    Returns that encoding.
+    """
+    chunks = _chunks(template, chunk_size)
+    first = b""
+    for chunk in chunks:
+        first += bytes(chunk)
+        if len(first) >= 1024:  # Enough to see the XML declaration
+            break
+    encoding = sniff_encoding(first)
+    # surrogateescape lets stray bytes a template's declared encoding can't decode pass through as-is
+    decoder = codecs.getincrementaldecoder(encoding)(errors="surrogateescape")
+    encoder = codecs.getincrementalencoder(encoding)(errors="surrogateescape")
+
+    state = "prefix"
+    carry = ""
+    for chunk in itertools.chain([first], chunks):
+        text = carry + decoder.decode(chunk)
+        carry = ""
+        if state == "prefix":
+            match = FRONT_START_RE.search(text)
+            if not match:
+                text, carry = _split_tag(text)
+                out.write(encoder.encode(text))
+                continue
+            out.write(encoder.encode(text[:match.start()]))
+            encoder.errors = "xmlcharrefreplace"
+            out.write(encoder.encode(front_xml))
+            encoder.errors = "surrogateescape"
+            text = text[match.end():]
+            state = "front"
+        if state == "front":
+            match = FRONT_END_RE.search(text)
+            if not match:
+                _, carry = _split_tag(text)
+                continue
+            text = text[match.end():]
+            state = "suffix"
+        out.write(encoder.encode(text))
+
+    tail = carry + decoder.decode(b"", final=True)
+    if state != "suffix":
+        raise ValueError("Template does not contain <front> tags")
+    out.write(encoder.encode(tail, final=True))
+    return encoding
+
+
+@timed_stage("combine")
+def combine_template(template, processed_xml, out, cache=None):
+    """build_front + splice_template for a template buffer, serving earlier output from the cache.
+
+    Only templates up to COMBINED_CACHE_BYTES are cached, so big ones still stream in flat memory.
+    """
+    key = None
+    if cache is not None and memoryview(template).nbytes <= COMBINED_CACHE_BYTES:
+        key = cache_key("combined", content_hash(processed_xml.encode("utf-8")), content_hash(template), PIPELINE_VERSION)
+        cached = cache.get(key)
+        if cached is not None:
+            out.write(cached)
+            return sniff_encoding(cached[:1024])
+
+    if key is None:
+        return splice_template(template, build_front(processed_xml), out)
+
+    combined = io.BytesIO()
+    encoding = splice_template(template, build_front(processed_xml), combined)
+    cache.put(key, combined.getvalue())
+    out.write(combined.getbuffer())
+    return encoding
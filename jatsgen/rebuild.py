@@ -0,0 +1,192 @@
+"""Incremental issue rebuilds: regenerate only the rows whose inputs changed since the last build.
+
+The build state (<out>/.jatsgen_build.json) records, per manifest row, the hashes of its PDF,
+XML and template, of its other manifest fields, of the scraped page data and of the journal
+registry, and the output it produced. File hashes are reused while a file's size and modification time are unchanged.
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from jatsgen.batch import attach_pages, flag_overwrites, publish_metrics, read_manifest, run_jobs, write_report
+from jatsgen.cache import cache_key, content_hash
+from jatsgen.dates import DATES_VERSION
+from jatsgen.journals import get_registry
+from jatsgen.pipeline import PIPELINE_VERSION
+from jatsgen.scrape import PER_HOST
+
+STATE_FILE = ".jatsgen_build.json"
+STATE_VERSION = 1
+INPUT_FILES = ["pdf", "xml", "template"]
+ROW_FIELDS = ["article_url", "pdf_link", "received", "accepted"]
+WATCH_INTERVAL = 1.0
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": STATE_VERSION, "files": {}, "rows": {}}
+
+
+def save_state(state, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def file_hash(path, files):
+    """content_hash of a file, reusing the recorded hash while its size and mtime are unchanged"""
+    stat = os.stat(path)
+    entry = files.get(path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["hash"]
+    digest = content_hash(path)
+    files[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+    return digest
+
+
+def row_key(job):
+    return f"{job['xml']}|{job['article_url']}"
+
+
+def row_inputs(job, files, previous):
+    """Everything a row's output depends on; None for an input file that can't be read (always rebuilt)"""
+    inputs = {"row": cache_key("row", [job[field] for field in ROW_FIELDS], DATES_VERSION, PIPELINE_VERSION),
+              "journals": get_registry().fingerprint}
+    for field in INPUT_FILES:
+        if job[field]:
+            try:
+                inputs[field] = file_hash(job[field], files)
+            except OSError:
+                inputs[field] = None
+    page = job.get("page")
+    # Pages not re-scraped this run keep their recorded hash; the worker re-fetches failed ones anyway
+    inputs["page"] = cache_key("page", page._asdict()) if page is not None else (previous.get("inputs") or {}).get("page")
+    return inputs
+
+
+def is_dirty(inputs, previous):
+    if not previous or previous.get("inputs") != inputs or None in inputs.values():
+        return True
+    return not (previous.get("output") and os.path.exists(previous["output"]))
+
+
+def remove_output(path, keep):
+    if path and path not in keep:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def rebuild(manifest_path, out_dir, workers=None, report_path=None, check_pages=True, per_host=PER_HOST, rate=None,
+            cache=True, metrics_path=None, snapshot_dir=None, validate=True, state_path=None):
+    """run_batch for only the rows whose inputs changed; the others are reported as "unchanged".
+
+    With check_pages every article page is re-scraped first (conditionally, through the HTTP
+    cache) so a changed published date or keyword list also triggers a rebuild.
+    """
+    jobs = read_manifest(manifest_path)
+    for job in jobs:
+        job["cache"] = cache
+        job["snapshot_dir"] = snapshot_dir
+        job["validate"] = validate
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = state_path or Path(out_dir) / STATE_FILE
+    state = load_state(state_path)
+
+    records = [attach_pages(jobs, per_host=per_host, rate=rate, cache=cache, snapshot_dir=snapshot_dir)] if check_pages else []
+
+    dirty, unchanged, inputs = [], [], {}
+    for job in jobs:
+        key = row_key(job)
+        previous = state["rows"].get(key, {})
+        inputs[job["row"]] = row_inputs(job, state["files"], previous)
+        if is_dirty(inputs[job["row"]], previous):
+            dirty.append(job)
+        else:
+            unchanged.append({"row": job["row"], "status": "unchanged", "output": previous["output"], "seconds": 0,
+                              "messages": "", "valid": "", "problems": ""})
+
+    workers = min(workers or os.cpu_count() or 1, max(len(dirty), 1))  # One changed row runs without a pool
+    rebuilt = run_jobs(dirty, out_dir, workers)
+
+    keys = {job["row"]: row_key(job) for job in jobs}
+    rows = {key: state["rows"][key] for key in keys.values() if key in state["rows"]}
+    for result in rebuilt:
+        key = keys[result["row"]]
+        previous = rows.get(key, {})
+        if result["status"] == "ok":
+            rows[key] = {"inputs": inputs[result["row"]], "output": result["output"]}
+        else:
+            rows[key] = {"inputs": None, "output": previous.get("output", "")}  # Retried next time
+
+    # Outputs no current row claims any more: renamed articles and rows dropped from the manifest
+    claimed = {row["output"] for row in rows.values()}
+    for key, row in state["rows"].items():
+        if rows.get(key, {}).get("output") != row.get("output"):
+            remove_output(row.get("output"), claimed)
+
+    used_files = {job[field] for job in jobs for field in INPUT_FILES if job[field]}
+    state["files"] = {path: entry for path, entry in state["files"].items() if path in used_files}
+    state["rows"] = rows
+    save_state(state, state_path)
+
+    results = sorted(rebuilt + unchanged, key=lambda result: result["row"])
+    flag_overwrites(results)
+    write_report(results, report_path or Path(out_dir) / "batch_report.csv")
+    publish_metrics(records + [result["metrics"] for result in rebuilt], metrics_path)
+    return results
+
+
+def input_signature(manifest_path):
+    """(size, mtime) of the manifest and every file it names, to notice edits without hashing"""
+    paths = {str(manifest_path)}
+    try:
+        paths.update(job[field] for job in read_manifest(manifest_path) for field in INPUT_FILES if job[field])
+    except (OSError, ValueError):
+        pass  # Manifest mid-edit; its own stat still changes
+    signature = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature[path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature[path] = None
+    return signature
+
+
+def watch(manifest_path, out_dir, interval=WATCH_INTERVAL, **options):
+    """Rebuild now and again whenever the manifest or a file it names changes; yields each run's results.
+
+    Pages are checked on the first pass only (if requested); later passes follow file edits.
+    A change is acted on once the files have stopped changing for one interval.
+    """
+    seen = input_signature(manifest_path)
+    yield rebuild(manifest_path, out_dir, **options)
+    options["check_pages"] = False
+    while True:
+        time.sleep(interval)
+        current = input_signature(manifest_path)
+        if current == seen:
+            continue
+        while True:
+            time.sleep(interval)
+            settled = input_signature(manifest_path)
+            if settled == current:
+                break
+            current = settled
+        seen = current
+        yield rebuild(manifest_path, out_dir, **options)
@@ -0,0 +1,182 @@
+"""Per-session result store: generated documents above SPILL_BYTES live on disk instead of in st.session_state."""
+import codecs
+import io
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+RESULTS_DIR = os.environ.get("JATSGEN_RESULTS_DIR", os.path.join(tempfile.gettempdir(), "jatsgen_results"))
+SPILL_BYTES = int(os.environ.get("JATSGEN_SPILL_BYTES", str(256 * 1024)))
+RESULT_TTL = float(os.environ.get("JATSGEN_RESULT_TTL", str(6 * 60 * 60)))  # Idle sessions' files are removed after this
+PAGE_BYTES = 20000
+
+
+class StoredResult:
+    """A generated document, held inline when small or as a file in a session store"""
+
+    def __init__(self, data=None, path=None, size=0, encoding="utf-8"):
+        self.data = data
+        self.path = path
+        self.size = len(data) if data is not None else size
+        self.encoding = encoding
+
+    @property
+    def on_disk(self):
+        return self.path is not None
+
+    def exists(self):
+        return not self.on_disk or os.path.exists(self.path)
+
+    def read(self, offset=0, length=-1):
+        if not self.on_disk:
+            return self.data[offset:] if length < 0 else self.data[offset:offset + length]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def text(self):
+        return self.read().decode(self.encoding)
+
+    @contextmanager
+    def view(self):
+        """The document as a buffer without copying it into memory (a memory map for stored files)"""
+        if not self.on_disk or not self.size:
+            yield memoryview(self.data or b"")
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            view = memoryview(m)
+            try:
+                yield view
+            finally:
+                view.release()
+
+    def pages(self, page_bytes=PAGE_BYTES):
+        return max(1, -(-self.size // page_bytes))
+
+    def _codec(self):
+        """(codec, bytes before the text) for decoding single pages.
+
+        Pages after the first have no BOM, so UTF-16 is decoded with the byte order page one declares.
+        """
+        codec = codecs.lookup(self.encoding).name
+        if codec != "utf-16":
+            return codec, 0
+        bom = self.read(0, 2)
+        if bom == codecs.BOM_UTF16_LE:
+            return "utf-16-le", 2
+        if bom == codecs.BOM_UTF16_BE:
+            return "utf-16-be", 2
+        return ("utf-16-le" if sys.byteorder == "little" else "utf-16-be"), 0  # What text() assumes
+
+    def _char_start(self, offset, codec="utf-8", skip=0):
+        # Move a page boundary to the start of a character so none is split between pages
+        if offset <= skip or offset >= self.size:
+            return min(max(offset, skip), self.size)
+        if codec in ("utf-16-le", "utf-16-be"):
+            offset -= (offset - skip) % 2  # Whole code units
+            unit = self.read(offset, 2)
+            high = unit[-1] if codec == "utf-16-le" else unit[0]
+            if 0xDC <= high <= 0xDF:
+                offset += 2  # Second half of a surrogate pair
+            return min(offset, self.size)
+        if codec != "utf-8":
+            return offset
+        for byte in self.read(offset, 3):
+            if byte & 0xC0 != 0x80:
+                break
+            offset += 1
+        return offset
+
+    def page(self, number, page_bytes=PAGE_BYTES):
+        """Text of page `number` (from 0); only that page is read"""
+        codec, skip = self._codec()
+        start = self._char_start(number * page_bytes, codec, skip)
+        end = self._char_start((number + 1) * page_bytes, codec, skip)
+        return self.read(start, end - start).decode(codec, errors="replace")
+
+
+class ResultWriter:
+    """Binary sink that keeps output in memory until it passes SPILL_BYTES, then moves it to the store"""
+
+    def __init__(self, path, threshold=SPILL_BYTES):
+        self.path = path
+        self.threshold = threshold
+        self._buffer = io.BytesIO()
+        self._file = None
+        self._size = 0
+
+    def write(self, data):
+        if self._file is None and self._size + len(data) > self.threshold:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path + ".part", "wb")
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._file or self._buffer).write(data)
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def result(self, encoding="utf-8"):
+        if self._file is None:
+            return StoredResult(self._buffer.getvalue(), encoding=encoding)
+        self._file.close()
+        os.replace(self.path + ".part", self.path)
+        return StoredResult(path=self.path, size=self._size, encoding=encoding)
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            os.unlink(self.path + ".part")
+
+
+class SessionStore:
+    """Directory holding one browser session's large results, removed on reset or after RESULT_TTL idle"""
+
+    def __init__(self, session_id, root=RESULTS_DIR, threshold=SPILL_BYTES):
+        self.path = os.path.join(root, session_id)
+        self.threshold = threshold
+
+    def touch(self):
+        """Mark the session active so purge_expired keeps its files"""
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            pass  # Nothing stored yet
+
+    def writer(self, name, suffix=".xml"):
+        return ResultWriter(os.path.join(self.path, name + suffix), self.threshold)
+
+    def put(self, name, data, encoding="utf-8"):
+        if isinstance(data, str):
+            data = data.encode(encoding)
+        writer = self.writer(name)
+        writer.write(data)
+        return writer.result(encoding)
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def purge_expired(root=RESULTS_DIR, ttl=RESULT_TTL):
+    """Remove the stores of sessions idle for longer than ttl seconds"""
+    cutoff = time.time() - ttl
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except FileNotFoundError:
+            pass  # Removed by another session's purge
@@ -0,0 +1,167 @@
+"""Issue discovery: every article URL and PDF link on an issue's table of contents, with the article pages prefetched.
+
+The TOC is read by its OJS link structure rather than one theme's layout: articles link to
+.../article/view/<id>, galleys to .../article/view|download/<id>/<galley>, and the pages and
+DOI printed in an article's summary follow its title link. Only the issue TOC container is
+scanned when the page has one, so sidebar blocks ("Most read") don't add articles.
+"""
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from jatsgen.article_page import ArticlePage, decode_html
+from jatsgen.batch import MANIFEST_FIELDS
+from jatsgen.cache import get_result_cache
+from jatsgen.client import HttpClient, RecordingClient, get_client
+from jatsgen.fetch import PageFetcher
+from jatsgen.metrics import timed, track
+from jatsgen.scrape import PER_HOST, prefetch_pages
+
+ARTICLE_RE = re.compile(r"/article/view/([^/?#]+)/?$")
+GALLEY_RE = re.compile(r"/article/(?:view|download)/([^/?#]+)/([^/?#]+)/?$")
+DOI_RE = re.compile(r"(?:doi\.org/|doi:\s*)(10\.\d{4,9}/[^\s\"'<>]+)", re.IGNORECASE)
+FIRST_PAGE_RE = re.compile(r"^\s*(?:pp?\.?\s*)?(\d+)")
+# obj_issue_toc (default theme), issue-toc (bootstrap3 and others)
+TOC_CLASS_RE = re.compile(r"\b(?:obj_issue_toc|issue[-_]toc)\b")
+TOC_FIELDS = ["doi", "first_page", "article_url", "pdf_link", "title"]
+
+TocEntry = namedtuple("TocEntry", ["article_url", "pdf_link", "title", "first_page", "doi"])
+
+
+class _TocScanner(HTMLParser):
+    """Collects article entries in page order, inside the TOC container only when `in_toc` is set"""
+
+    def __init__(self, base_url, in_toc):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.entries = {}  # Article id -> TocEntry fields, in page order
+        self.current = None
+        self._in_toc = in_toc
+        self._toc = None  # [tag, depth] of the TOC container while inside it
+        self._link = None  # (kind, article id, url, class, text parts) of the <a> being read
+        self._pages = None  # [tag, depth, text parts] of the pages element being read
+
+    def _scanning(self):
+        return not self._in_toc or self._toc is not None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = attrs.get("class") or ""
+        if self._toc is not None and tag == self._toc[0]:
+            self._toc[1] += 1
+        elif self._toc is None and self._in_toc and TOC_CLASS_RE.search(classes):
+            self._toc = [tag, 1]
+        if self._pages is not None and tag == self._pages[0]:
+            self._pages[1] += 1
+        if not self._scanning():
+            return
+
+        if tag == "a" and attrs.get("href"):
+            url = urljoin(self.base_url, attrs["href"].strip())
+            path = urlsplit(url).path
+            galley = GALLEY_RE.search(path)
+            article = ARTICLE_RE.search(path)
+            doi = DOI_RE.search(url)
+            if galley:
+                self._link = ("galley", galley.group(1), url, classes, [])
+            elif article:
+                self._link = ("article", article.group(1), url, classes, [])
+            elif doi and self.current is not None and not self.current["doi"]:
+                self.current["doi"] = doi.group(1)
+        elif self._pages is None and "pages" in classes.split():
+            self._pages = [tag, 1, []]
+
+    def handle_endtag(self, tag):
+        if self._pages is not None and tag == self._pages[0]:
+            self._pages[1] -= 1
+            if not self._pages[1]:
+                match = FIRST_PAGE_RE.match("".join(self._pages[2]))
+                if match and self.current is not None and not self.current["first_page"]:
+                    self.current["first_page"] = match.group(1)
+                self._pages = None
+        if tag == "a" and self._link is not None:
+            self._finish_link()
+        if self._toc is not None and tag == self._toc[0]:
+            self._toc[1] -= 1
+            if not self._toc[1]:
+                self._toc = None
+
+    def handle_data(self, data):
+        if self._link is not None:
+            self._link[4].append(data)
+        if self._pages is not None:
+            self._pages[2].append(data)
+        if self.current is not None and not self.current["doi"] and self._scanning():
+            match = DOI_RE.search(data)
+            if match:
+                self.current["doi"] = match.group(1).rstrip(".,;")
+
+    def _finish_link(self):
+        kind, article_id, url, classes, text = self._link
+        self._link = None
+        text = " ".join("".join(text).split())
+        if kind == "article":
+            if article_id not in self.entries:
+                self.entries[article_id] = {"article_url": url, "pdf_link": "", "title": "", "first_page": "", "doi": ""}
+            self.current = self.entries[article_id]
+            self.current["title"] = self.current["title"] or text  # A cover image link may come first
+        elif article_id in self.entries and not self.entries[article_id]["pdf_link"]:
+            if "pdf" in classes.lower().split() or "pdf" in text.lower():
+                self.entries[article_id]["pdf_link"] = url
+
+
+def _scan(text, base_url, in_toc):
+    scanner = _TocScanner(base_url, in_toc)
+    scanner.feed(text)
+    scanner.close()
+    return [TocEntry(**entry) for entry in scanner.entries.values()]
+
+
+def parse_toc(content, base_url):
+    """TocEntry per article on an issue TOC page, in the order listed"""
+    text = decode_html(content)
+    return _scan(text, base_url, in_toc=True) or _scan(text, base_url, in_toc=False)
+
+
+def discover_issue(toc_url, fetcher=None, per_host=PER_HOST, rate=None):
+    """Entries of the issue at toc_url, and {article_url: ArticlePage or the exception} for every article.
+
+    The article pages are fetched concurrently through the fetcher's pooled session.
+    """
+    fetcher = fetcher or PageFetcher()
+    entries = parse_toc(fetcher.fetch(toc_url), toc_url)
+    if not entries:
+        raise ValueError(f"No article links found on {toc_url}")
+    pages = prefetch_pages([entry.article_url for entry in entries], fetcher, per_host=per_host, rate=rate)
+    return entries, pages
+
+
+def toc_rows(entries, pages):
+    """Manifest-style rows (as read_rows returns) for the entries, carrying the prefetched pages"""
+    rows = []
+    for index, entry in enumerate(entries, start=1):
+        row = {field: "" for field in MANIFEST_FIELDS}
+        row.update(article_url=entry.article_url, pdf_link=entry.pdf_link, doi=entry.doi, first_page=entry.first_page,
+                   title=entry.title, row=index)
+        page = pages.get(entry.article_url)
+        if isinstance(page, ArticlePage):
+            row["page"] = page
+        rows.append(row)
+    return rows
+
+
+def discover_rows(toc_url, per_host=PER_HOST, rate=None, cache=True, snapshot_dir=None):
+    """toc_rows for the issue at toc_url, plus the metrics record of the discovery (like attach_pages)"""
+    with track(step="discover", toc_url=toc_url) as metrics:
+        fetcher = PageFetcher(results=get_result_cache() if cache else None, client=get_client(snapshot_dir))
+        with timed("scrape"):
+            entries, pages = discover_issue(toc_url, fetcher, per_host=per_host, rate=rate)
+    return toc_rows(entries, pages), metrics.to_dict()
+
+
+def save_toc_snapshot(toc_url, snapshot_dir, per_host=PER_HOST, rate=None):
+    """Record the TOC and its article pages into snapshot_dir for offline runs; returns the pages as discover_issue"""
+    fetcher = PageFetcher(cache_dir=None, client=RecordingClient(HttpClient(), snapshot_dir))
+    _, pages = discover_issue(toc_url, fetcher, per_host=per_host, rate=rate)
+    return pages
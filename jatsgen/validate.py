@@ -0,0 +1,186 @@
+"""Checks on generated documents before they go downstream: structure rules, plus a DTD/XSD when configured.
+
+The rule set and the schema are compiled once per process and reused for every document, so
+validating a batch inside its worker processes costs one parse per document. Without a schema
+only the document up to </front> is parsed: everything after it is the template, copied byte for byte.
+"""
+import xml.etree.ElementTree as ET
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+
+from jatsgen.metrics import count, timed_stage
+
+# Optional .dtd or .xsd the output must also satisfy; needs lxml (python3-lxml in packages.txt)
+SCHEMA_FILE = os.environ.get("JATSGEN_SCHEMA", "")
+MAX_PROBLEMS = 20
+FEED_CHUNK = 16 * 1024
+
+Validation = namedtuple("Validation", ["valid", "problems"])
+
+# Paths are relative to the output <Article>
+REQUIRED = [
+    "Journal-meta",
+    "article-meta",
+    "article-meta/article-id[@pub-id-type='doi']",
+    "article-meta/ArticleTitle",
+    "article-meta/History",
+    "article-meta/History/PubDate[@PubStatus='received']",
+    "article-meta/History/PubDate[@PubStatus='accepted']",
+]
+# (path, attribute): at most one element per attribute value (per element when attribute is None)
+UNIQUE = [
+    ("Journal-meta", None),
+    ("article-meta", None),
+    ("article-meta/article-id", "pub-id-type"),
+    ("article-meta/PubDate", "PubStatus"),
+    ("article-meta/History", None),
+    ("article-meta/History/PubDate", "PubStatus"),
+    ("article-meta/Volume", None),
+    ("article-meta/Issue", None),
+]
+# Fields where a "null" placeholder means generation silently failed
+NOT_NULL = [
+    "article-meta/article-id",
+    "article-meta/ArticleTitle",
+    "article-meta/Volume",
+    "article-meta/Issue",
+    "article-meta/FirstPage",
+    "article-meta/LastPage",
+    "article-meta//PubDate/Year",
+    "article-meta//PubDate/Month",
+    "article-meta//PubDate/Day",
+]
+
+
+def _label(elem):
+    attrs = "".join(f"[@{name}='{value}']" for name, value in elem.attrib.items())
+    return f"{elem.tag}{attrs}"
+
+
+def _required(path):
+    def check(article):
+        if article.find(path) is None:
+            yield f"missing {path}"
+    return check
+
+
+def _unique(path, attribute):
+    def check(article):
+        seen = {}
+        for elem in article.findall(path):
+            key = elem.get(attribute) if attribute else None
+            seen[key] = seen.get(key, 0) + 1
+        for key, n in seen.items():
+            if n > 1:
+                yield f"duplicate {path}" + (f"[@{attribute}='{key}']" if attribute else "") + f" x{n}"
+    return check
+
+
+def _not_null(path):
+    def check(article):
+        for elem in article.findall(path):
+            if (elem.text or "").strip() in ("", "null"):
+                yield f"null {elem.tag} in {path}"
+    return check
+
+
+def _dates(article):
+    for pub_date in article.iterfind("article-meta//PubDate"):
+        parts = [(pub_date.findtext(tag) or "").strip() for tag in ("Year", "Month", "Day")]
+        if "null" in parts or "" in parts:
+            continue  # Reported by the null rule
+        try:
+            date(*(int(part) for part in parts))
+        except ValueError:
+            yield f"invalid date {'-'.join(parts)} in {_label(pub_date)}"
+
+
+@lru_cache(maxsize=None)
+def compiled_rules():
+    """Rule checks, built once per process"""
+    return (
+        [_required(path) for path in REQUIRED]
+        + [_unique(path, attribute) for path, attribute in UNIQUE]
+        + [_not_null(path) for path in NOT_NULL]
+        + [_dates]
+    )
+
+
+@lru_cache(maxsize=None)
+def load_schema(path):
+    """Compiled lxml DTD or XMLSchema for path, loaded once per process"""
+    from lxml import etree  # Only needed when a schema is configured
+
+    if path.lower().endswith(".dtd"):
+        return etree.DTD(path)
+    return etree.XMLSchema(etree.parse(path))
+
+
+def parse_front(data):
+    """Root element parsed up to the end of <front> (or of a bare output <Article>)"""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    view = memoryview(data)
+    root = None
+    for offset in range(0, len(view), FEED_CHUNK):
+        parser.feed(bytes(view[offset:offset + FEED_CHUNK]))
+        for event, elem in parser.read_events():
+            if root is None:
+                root = elem
+            elif event == "end" and elem.tag == "front":
+                return root
+    parser.close()  # Raises for a truncated document
+    return root
+
+
+def _find_article(root):
+    if root.tag == "Article":
+        return [root]
+    return root.findall("front/Article")
+
+
+@timed_stage("validate")
+def validate_document(data, schema_path=SCHEMA_FILE):
+    """Validation of a generated document (bytes or buffer), with at most MAX_PROBLEMS problems listed"""
+    problems = []
+    try:
+        if schema_path:
+            from lxml import etree
+
+            schema = load_schema(schema_path)
+            root = etree.fromstring(bytes(data))
+            if not schema.validate(root):
+                problems.extend(f"schema line {error.line}: {error.message}" for error in schema.error_log)
+        else:
+            root = parse_front(data)
+    except ImportError:
+        return Validation(False, ["lxml is required to check JATSGEN_SCHEMA"])
+    except Exception as e:  # lxml and ElementTree raise different parse errors
+        return Validation(False, [f"not well-formed: {e}"])
+
+    articles = _find_article(root)
+    if len(articles) != 1:
+        problems.append(f"expected one front/Article, found {len(articles)}")
+    for article in articles:
+        for rule in compiled_rules():
+            problems.extend(rule(article))
+    count("validation_problems", len(problems))
+    return Validation(not problems, problems[:MAX_PROBLEMS])
+
+
+def validate_file(path, schema_path=SCHEMA_FILE):
+    """Compact report row for one generated file"""
+    with open(path, "rb") as f:
+        validation = validate_document(f.read(), schema_path)
+    return {"output": str(path), "valid": validation.valid, "problems": "; ".join(validation.problems)}
+
+
+def validate_files(paths, workers=None, schema_path=SCHEMA_FILE):
+    """validate_file over many files across worker processes (each compiles the rules and schema once)"""
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2:
+        return [validate_file(path, schema_path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(validate_file, paths, [schema_path] * len(paths), chunksize=4))
@@ -0,0 +1,92 @@
+"""Single-pass indented XML writer for the output Article, the <front> block and issue ArticleSet entries.
+
+Produces the same bytes ElementTree did after indent() (write_xml) and after the old
+copy_element re-indent (mixed=False), without touching or copying the tree.
+"""
+
+INDENT = "  "
+XML_NAMESPACE = "{http://www.w3.org/XML/1998/namespace}"
+
+
+def escape_text(text):
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attrib(text):
+    text = escape_text(text)
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+def qualified_name(name):
+    if name[:1] != "{":
+        return name
+    if name.startswith(XML_NAMESPACE):
+        return "xml:" + name[len(XML_NAMESPACE):]
+    raise ValueError(f"Namespaced name {name} is not supported in the output")
+
+
+def _keep(text, whitespace, mixed):
+    # Whitespace-only text between elements is replaced by indentation; real text stays when mixed
+    if mixed and text and text.strip():
+        return escape_text(text)
+    return whitespace
+
+
+def write_xml(elem, write, level=0, mixed=True):
+    """Write elem indented two spaces per level, passing each piece of markup to write.
+
+    mixed=True keeps non-whitespace text and tails around child elements (as indent() did);
+    mixed=False drops them (as the old <front> rebuild did). Leaf text is always kept. The
+    tail of elem itself is not written.
+    """
+    tag = qualified_name(elem.tag)
+    start = "<" + tag
+    for key, value in elem.attrib.items():
+        start += f' {qualified_name(key)}="{escape_attrib(value)}"'
+
+    if not len(elem):
+        if elem.text:
+            write(f"{start}>{escape_text(elem.text)}</{tag}>")
+        else:
+            write(f"{start} />")
+        return
+
+    inner = "\n" + INDENT * (level + 1)
+    write(start + ">" + _keep(elem.text, inner, mixed))
+    last = len(elem) - 1
+    for i, child in enumerate(elem):
+        write_xml(child, write, level + 1, mixed)
+        write(_keep(child.tail, inner if i < last else "\n" + INDENT * level, mixed))
+    write(f"</{tag}>")
+
+
+def write_article_block(article_out, write):
+    """Write an <Article> holding only the Journal-meta and article-meta of an output Article, one level deep"""
+    write("<Article>\n    ")
+    for name, tail in [("Journal-meta", "\n    "), ("article-meta", "\n  ")]:
+        section = article_out.find(name)
+        if section is not None:
+            write_xml(section, write, level=2, mixed=False)
+            write(tail)
+    write("</Article>")
+
+
+def write_front(article_out, write):
+    """Write the <front> block wrapping the Journal-meta and article-meta of an output Article"""
+    write("<front>\n  ")
+    write_article_block(article_out, write)
+    write("\n</front>")
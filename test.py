@@ -1,27 +1,44 @@
-import xml.etree.ElementTree as ET
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-import fitz  # PyMuPDF
-import re
-import streamlit as st
 import os
-import subprocess
-import sys
-from pathlib import Path
-
-# Ensure packages are installed
-required = {
-    'beautifulsoup4==4.12.3',
-    'soupsieve==2.5'
+import uuid
+import streamlit as st
+
+from jatsgen.archive import ARCHIVE_REPORT_FIELDS, ARCHIVE_TYPES, bulk_pool, run_archive
+from jatsgen.cache import get_result_cache
+from jatsgen.dates import parse_date
+from jatsgen.jobs import JobQueue
+from jatsgen.metrics import METRICS_LOG, configure_log, count, publish, track
+from jatsgen.pipeline import (
+    combine_template,
+    generate_article,
+    serialize_article,
+    set_history,
+)
+from jatsgen.results import PAGE_BYTES, SessionStore, purge_expired
+from jatsgen.validate import validate_document
+
+# Collapsible per-stage timing breakdown under the outputs
+SHOW_TIMINGS = os.environ.get("JATSGEN_TIMING_PANEL", "") == "1"
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+# Seconds between job status checks while the Generate XML step runs in the background
+POLL_SECONDS = 0.5
+JOB_STAGES = {
+    "parse_xml": "Reading input XML",
+    "generate_filename": "Fetching article page",
+    "extract_history": "Scanning PDF for history dates",
+    "process_article": "Building article XML",
 }
-installed = {pkg.key for pkg in __import__('pkg_resources').working_set}
-missing = required - installed
+# Worker processes per archive upload (default: CPU count)
+BULK_WORKERS = int(os.environ.get("JATSGEN_BULK_WORKERS", "0")) or None
 
-if missing:
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', *missing], 
-                         stdout=subprocess.DEVNULL, 
-                         stderr=subprocess.DEVNULL)
+@st.cache_resource(ttl=24 * 60 * 60)
+def date_options():
+    """Selectbox choices, built once per server process instead of on every rerun"""
+    # Static year range that automatically includes current year (refreshed daily)
+    return [""] + list(range(1, 32)), [""] + MONTHS, [""] + list(range(1980, datetime.now().year + 1))
 
 if 'reset_counter' not in st.session_state:
     st.session_state.reset_counter = 0
@@ -37,42 +54,37 @@ if 'show_combine_section' not in st.session_state:
     st.session_state.show_combine_section = False
 if 'final_combined_xml' not in st.session_state:
     st.session_state.final_combined_xml = None
-
-def parse_date(date_str):
-    for fmt in ["%d %B %Y", "%B %d, %Y", "%d %b %Y", "%b %d, %Y"]:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            return str(dt.year), f"{dt.month:02d}", f"{dt.day:02d}"
-        except:
-            continue
-    return "null", "null", "null"
-
-def extract_history_from_pdf(pdf_path):
-    try:
-        doc = fitz.open(pdf_path)
-        combined_date = r"(?:[A-Za-z]{3,9}\s+\d{1,2},?\s*\d{4}|\d{1,2}\s+[A-Za-z]{3,9},?\s*\d{4})"
-
-        patterns = [
-            re.compile(rf"(?i)Received\s*[:\-]?\s*({combined_date}),\s*Accepted\s*[:\-]?\s*({combined_date})"),
-            re.compile(rf"(?i)Received\s+({combined_date})\s+Accepted\s+({combined_date})"),
-            re.compile(rf"(?i)Received\s+on\s+({combined_date})\s*;\s*Accepted\s+on\s+({combined_date})"),
-            re.compile(rf"(?i)Received[:\-]?\s*({combined_date})\s*\|\s*(?:Revised[:\-]?\s*{combined_date}\s*\|\s*)?Accepted[:\-]?\s*({combined_date})"),
-            re.compile(rf"(?i)Received\s*[:\-]?\s*({combined_date})\s*;\s*Accepted\s*[:\-]?\s*({combined_date})"),
-        ]
-
-        for page in doc:
-            text = page.get_text()
-            for pattern in patterns:
-                match = pattern.search(text)
-                if match:
-                    r, a = match.group(1).strip(), match.group(2).strip()
-                    return parse_date(r), parse_date(a)
-        return None  # Return None when dates aren't found
-    except Exception as e:
-        st.error(f"Error processing PDF: {str(e)}")
-        return None
+if 'pending_article' not in st.session_state:
+    st.session_state.pending_article = None
+if 'history_dates' not in st.session_state:
+    st.session_state.history_dates = None
+if 'timings' not in st.session_state:
+    st.session_state.timings = []
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'finished_job' not in st.session_state:
+    st.session_state.finished_job = None
+if 'bulk_job_id' not in st.session_state:
+    st.session_state.bulk_job_id = None
+if 'finished_bulk_job' not in st.session_state:
+    st.session_state.finished_bulk_job = None
+if 'bulk_result' not in st.session_state:
+    st.session_state.bulk_result = None
+if 'store_id' not in st.session_state:
+    # Large results are kept in a per-session directory rather than in session state
+    st.session_state.store_id = uuid.uuid4().hex
+    purge_expired()
+
+configure_log(METRICS_LOG)
+
+def session_store():
+    return SessionStore(st.session_state.store_id)
 
 def clear_form():
+    if st.session_state.bulk_job_id is not None:
+        # The archive job writes into the session store: stop it before the store is removed
+        job_queue().cancel(st.session_state.bulk_job_id)
+    session_store().clear()
     st.session_state.reset_counter += 1
     st.session_state.show_success = True
     st.session_state.xml_data = None
@@ -80,459 +92,310 @@ def clear_form():
     st.session_state.filename = "formatted_article_set.xml"
     st.session_state.show_combine_section = False
     st.session_state.final_combined_xml = None
-
-def extract_journal_abbreviation(doi):
-    """Extract journal abbreviation from DOI"""
-    if not doi:
-        return "null"
+    st.session_state.pending_article = None
+    st.session_state.history_dates = None
+    st.session_state.timings = []
+    # A job still running is left to finish; its result is just never applied
+    st.session_state.job_id = None
+    st.session_state.finished_job = None
+    st.session_state.bulk_job_id = None
+    st.session_state.finished_bulk_job = None
+    st.session_state.bulk_result = None
+
+def finish_step(metrics, ok):
+    # JSON log line, Prometheus totals and the timing panel all get the same record
+    record = dict(metrics.to_dict(), status="ok" if ok else "error")
+    publish(record)
+    st.session_state.timings.append(record)
+
+def show_timings():
+    with st.expander("Timing breakdown"):
+        for record in st.session_state.timings:
+            stages = sorted(record["stages"].items(), key=lambda item: -item[1]["seconds"])
+            st.markdown(f"**{record['step']}** ({record['status']}): {record['stages']['total']['seconds']:.3f} s")
+            st.table([{"stage": name, "seconds": round(stage["seconds"], 4), "calls": stage["calls"]}
+                      for name, stage in stages])
+            if record["counters"]:
+                st.table([{"counter": name, "value": value} for name, value in sorted(record["counters"].items())])
+
+def store_processed_xml(xml_str):
+    st.session_state.processed_xml = session_store().put("processed", xml_str)
+    st.session_state.pop("preview_page_processed_xml", None)  # The new result may have fewer pages
+    count("output_bytes", st.session_state.processed_xml.size)
+    st.session_state.show_combine_section = True
     
-    # Split DOI by both '/' and '.'
-    parts = re.split(r'[/.]', doi)
-    
-    # Find the abbreviation part (usually the part before the year)
-    for i, part in enumerate(parts):
-        if part.isdigit() and len(part) == 4:  # Year found
-            if i > 0:
-                return parts[i-1].upper()  # Return the part before the year
-    return "null"
-
-def generate_filename(article_url, xml_content):
+    # Only show success messages after processing completes
+    st.success("✓ Dates selected successfully")
+    st.success("Initial XML processing complete! You can now combine with template XML.")
+
+@st.fragment
+def show_preview(key, title):
+    """Paginated preview of a stored result; nothing is read until it is switched on, and paging reruns only this"""
+    result = st.session_state[key]
+    if result is None or not st.toggle(title, key=f"preview_{key}"):
+        return
+    pages = result.pages(PAGE_BYTES)
+    number = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"preview_page_{key}") if pages > 1 else 1
+    st.code(result.page(number - 1, PAGE_BYTES), language="xml")
+    st.caption(f"Page {number} of {pages} ({result.size:,} bytes)")
+
+def drop_expired_results():
+    # Files of a session idle past JATSGEN_RESULT_TTL are purged; its handles then point nowhere
+    for key in ("processed_xml", "final_combined_xml"):
+        result = st.session_state[key]
+        if result is not None and not result.exists():
+            st.session_state[key] = None
+            if key == "processed_xml":
+                st.session_state.show_combine_section = False
+            st.info("Earlier results expired; please generate the XML again.")
+    bulk = st.session_state.bulk_result
+    if bulk is not None and not bulk["archive"].exists():
+        st.session_state.bulk_result = None
+        st.info("Earlier archive results expired; please upload the archive again.")
+
+def apply_result(result):
+    """Session state and messages for a finished generate_article result"""
+    st.session_state.filename = result["filename"]
+    if result["pending_article"] is not None:
+        st.session_state.pending_article = result["pending_article"]
+        st.session_state.processed_xml = None
+        st.session_state.show_combine_section = False
+        return
+    st.success("✓ Automatically extracted valid dates from PDF")
+    store_processed_xml(result["processed_xml"])
+
+@st.cache_resource
+def job_queue():
+    """One background queue per server process, shared by every session"""
+    return JobQueue()
+
+def run_generate_job(job, pdf_data, xml_data, article_url, pdf_link):
+    result = generate_article(pdf_data, xml_data, article_url, pdf_link, warn=job.warn, error=job.fail,
+                              progress=job.progress, cache=get_result_cache())
+    if result["processed_xml"] is not None:
+        count("output_bytes", len(result["processed_xml"].encode("utf-8")))  # Counted on the job's own record
+    return result
+
+def submit_job(pdf_file, input_xml, article_url, pdf_link):
+    st.session_state.pending_article = None
+    st.session_state.history_dates = None
+    st.session_state.processed_xml = None
+    st.session_state.show_combine_section = False
+    # Copy the uploads out of the request: the job outlives this script run
+    st.session_state.job_id = job_queue().submit(
+        run_generate_job, pdf_file.getvalue(), input_xml.getvalue(), article_url, pdf_link,
+        labels={"step": "process", "article_url": article_url},
+    )
+
+@st.fragment(run_every=POLL_SECONDS)
+def job_status():
+    """Polls the running job; only this fragment reruns until the job finishes"""
+    job = job_queue().get(st.session_state.job_id)
+    if job is None or job.done:
+        # Hand the job to a full rerun, which applies it and draws the rest of the page
+        st.session_state.finished_job = job_queue().pop(st.session_state.job_id)
+        st.session_state.job_id = None
+        st.rerun()
+    if job.stage is None:
+        st.info(f"Queued: {job_queue().position(job.id)} job(s) ahead")
+        return
+    finished = len(job.stages)
+    st.progress(finished / len(JOB_STAGES), text=f"{JOB_STAGES.get(job.stage, job.stage)}...")
+    for stage, seconds in job.stages:
+        st.caption(f"✓ {JOB_STAGES.get(stage, stage)} ({seconds:.1f} s)")
+
+def apply_job(job):
+    for level, text in job.messages:
+        getattr(st, level)(text)
+    if job.error is not None:
+        st.error(f"An error occurred during processing: {job.error}")
+    else:
+        apply_result(job.result)
+    finish_step(job.metrics, job.error is None)
+
+def run_bulk_job(job, archive_data, csv_data, toc_url, store):
+    job.progress("archive")
+    bundle = store.writer(f"bulk-{job.id}", suffix=".zip")
     try:
-        root = ET.fromstring(xml_content)
+        results, unpaired, name = run_archive(archive_data, bundle, csv_data=csv_data, toc_url=toc_url,
+                                              workers=BULK_WORKERS, progress=job.advance, pool=bulk_pool(BULK_WORKERS))
+    except Exception:
+        bundle.discard()
+        raise
+    count("output_bytes", bundle.tell())
+    rows = [{field: str(result.get(field, "")) for field in ARCHIVE_REPORT_FIELDS} for result in results + unpaired]
+    return {"archive": bundle.result(), "name": name, "rows": rows,
+            "generated": sum(result["status"] == "ok" for result in results), "articles": len(results)}
+
+def submit_bulk_job(archive_file, csv_file, toc_url):
+    st.session_state.bulk_result = None
+    st.session_state.bulk_job_id = job_queue().submit(
+        run_bulk_job, archive_file.getvalue(), csv_file.getvalue() if csv_file is not None else None, toc_url or None,
+        session_store(),
+        labels={"step": "archive", "archive": archive_file.name},
+    )
+
+@st.fragment(run_every=POLL_SECONDS)
+def bulk_status():
+    """Polls the running archive job, like job_status"""
+    job = job_queue().get(st.session_state.bulk_job_id)
+    if job is None or job.done:
+        st.session_state.finished_bulk_job = job_queue().pop(st.session_state.bulk_job_id)
+        st.session_state.bulk_job_id = None
+        st.rerun()
+    if job.stage is None:
+        st.info(f"Queued: {job_queue().position(job.id)} job(s) ahead")
+    elif job.items is None:
+        st.info("Reading archive and fetching the issue's article pages...")
+    else:
+        done, total = job.items
+        st.progress(done / max(total, 1), text=f"{done} of {total} articles generated...")
+
+def apply_bulk_job(job):
+    if job.error is not None:
+        st.error(f"An error occurred during processing: {job.error}")
+    else:
+        st.session_state.bulk_result = job.result
+    finish_step(job.metrics, job.error is None)
+
+def bulk_upload(reset_key):
+    st.markdown("---")
+    st.markdown('<div style="font-size:25px; font-weight:600; margin-bottom:10px;">Bulk Upload</div>', unsafe_allow_html=True)
+    with st.form("bulk_form"):
+        archive_file = st.file_uploader(
+            "Upload Archive",
+            type=ARCHIVE_TYPES,
+            help="Zip or tar of the issue's PDFs, input XMLs and templates, paired by DOI or file name",
+            key=f"archive_uploader_{reset_key}"
+        )
+        csv_file = st.file_uploader(
+            "Upload URL CSV",
+            type=['csv'],
+            help="article_url and pdf_link per article, with a doi, first_page, xml or pdf column to pair it (optional if the archive contains the CSV)",
+            key=f"urls_uploader_{reset_key}"
+        )
+        toc_url = st.text_input(
+            "Or Issue Table of Contents URL",
+            help="Issue page on the journal site; every article URL and PDF link listed there is used instead of a CSV",
+            key=f"toc_url_{reset_key}",
+            value=""
+        ).strip()
+        if st.form_submit_button("Generate All", type="primary"):
+            if archive_file is None:
+                st.warning("Please upload an archive")
+            elif csv_file is not None and toc_url:
+                st.warning("Please give either a URL CSV or an issue TOC URL, not both")
+            elif st.session_state.bulk_job_id is not None:
+                st.warning("An archive is still being processed; please wait for it to finish")
+            else:
+                submit_bulk_job(archive_file, csv_file, toc_url)
+
+    if st.session_state.bulk_job_id is not None:
+        bulk_status()
+    if st.session_state.finished_bulk_job is not None:
+        apply_bulk_job(st.session_state.finished_bulk_job)
+        st.session_state.finished_bulk_job = None
+
+    bulk = st.session_state.bulk_result
+    if bulk is None:
+        return
+    message = f"{bulk['generated']} of {bulk['articles']} articles generated"
+    if bulk["generated"] == bulk["articles"] and bulk["articles"]:
+        st.success(message)
+    else:
+        st.warning(message + "; see the report below")
+    st.dataframe(bulk["rows"], hide_index=True)
+    st.download_button(
+        label="Download All (ZIP)",
+        data=bulk["archive"].read,
+        file_name=bulk["name"],
+        mime="application/zip",
+        key="bulk_download"
+    )
+
+def select_history_dates():
+    # If dates not found in PDF or invalid, show dropdown selectors
+    st.warning("Could not automatically extract valid dates from PDF. Please select them below:")
+    
+    # Date input section with dropdowns
+    with st.container():
+        st.markdown("### Required Date Information")
+        col1, col2 = st.columns(2)
         
-        # Extract DOI components
-        doi_elem = root.find(".//ELocationID[@EIdType='doi']")
-        last_doi_digit = ""
-        if doi_elem is not None and doi_elem.text:
-            doi = doi_elem.text.strip()
-            parts = doi.split(".")
-            last_part = parts[-1]
-            last_doi_digit = last_part if last_part.isdigit() else ""
-
-        # Extract number from URL
-        numbers = re.findall(r'\d+', article_url)
-        last_url_num = numbers[-1] if numbers else "-"
+        days, months, years = date_options()
         
-        # Initialize volume and issue
-        volume = root.findtext(".//Volume", "").strip()
-        issue = root.findtext(".//Issue", "").strip()
-
-        # If not found in standard tags, try to extract from DOI
-        if not volume or not issue:
-            if doi_elem is not None and doi_elem.text:
-                doi = doi_elem.text.strip()
-                parts = doi.split('.')
-                
-                # Find the position of the 4-digit year
-                year_pos = -1
-                for i, part in enumerate(parts):
-                    if len(part) == 4 and part.isdigit():
-                        year_pos = i
-                        break
-                
-                # Extract volume and issue if pattern matches
-                if year_pos != -1 and len(parts) > year_pos + 2:
-                    volume = parts[year_pos + 1] if not volume else volume
-                    issue = parts[year_pos + 2] if not issue else issue
-
-        # Set defaults if still not found
-        vol_num = volume if volume else "-"
-        issue_num = issue if issue else "-"
+        with col1:
+            # Received date dropdowns
+            st.markdown("**Received Date**")
+            r_col1, r_col2, r_col3 = st.columns(3)
+            r_day = r_col1.selectbox("Day", days, index=0, key="received_day")
+            r_month = r_col2.selectbox("Month", months, index=0, key="received_month")
+            r_year = r_col3.selectbox("Year", years, index=0, key="received_year")
         
-        # Extract year
-        year = "null"
-        try:
-            response = requests.get(article_url)
-            soup = BeautifulSoup(response.content, "html.parser")
-            published_div = soup.find("div", class_="list-group-item date-published")
-            if published_div:
-                text = published_div.get_text(strip=True).replace("Published:", "").strip()
-                year, _, _ = parse_date(text)
-        except Exception as e:
-            st.warning(f"Could not extract year from article URL: {str(e)}")
-            pub_date = root.find(".//PubDate[@PubStatus='pub']")
-            if pub_date is not None:
-                year_elem = pub_date.find("Year")
-                if year_elem is not None and year_elem.text:
-                    year = year_elem.text.strip()
+        with col2:
+            # Accepted date dropdowns
+            st.markdown("**Accepted Date**")
+            a_col1, a_col2, a_col3 = st.columns(3)
+            a_day = a_col1.selectbox("Day", days, index=0, key="accepted_day")
+            a_month = a_col2.selectbox("Month", months, index=0, key="accepted_month")
+            a_year = a_col3.selectbox("Year", years, index=0, key="accepted_year")
         
-        # Construct filename parts
-        parts = [
-            last_doi_digit,
-            last_url_num,
-            f"Vol.{vol_num}",
-            f"No.{issue_num}",
-            year
-        ]
-        return "_".join(filter(None, parts)) + ".xml"  # filter removes empty parts
-    except Exception as e:
-        st.warning(f"Could not generate filename: {str(e)}")
-        return "formatted_article_set.xml"
-    
-def indent(elem, level=0):
-    indent_str = "  "
-    newline = "\n"
-    
-    if len(elem):
-        if not elem.text or not elem.text.strip():
-            elem.text = newline + indent_str * (level + 1)
+        # Only proceed if all date fields are selected
+        if not all([r_day, r_month, r_year, a_day, a_month, a_year]):
+            return None
         
-        for i, child in enumerate(elem):
-            indent(child, level + 1)
-            
-            if i < len(elem) - 1:
-                if not child.tail or not child.tail.strip():
-                    child.tail = newline + indent_str * (level + 1)
-            else:
-                if not child.tail or not child.tail.strip():
-                    child.tail = newline + indent_str * level
-    
-    else:
-        if level > 0 and (not elem.tail or not elem.tail.strip()):
-            elem.tail = newline + indent_str * level
-
-def process_files(pdf_file, input_xml, article_url, pdf_link):
-    try:
-        temp_pdf = "temp_uploaded.pdf"
-        temp_xml = "temp_uploaded.xml"
+        # Format the selected dates
+        received_date_str = f"{r_day} {r_month} {r_year}"
+        accepted_date_str = f"{a_day} {a_month} {a_year}"
         
-        with st.spinner("Processing files..."):
-            # Save uploaded files temporarily
-            with open(temp_pdf, "wb") as f:
-                f.write(pdf_file.getbuffer())
-            with open(temp_xml, "wb") as f:
-                f.write(input_xml.getbuffer())
-
-            # Read XML content
-            with open(temp_xml, "r", encoding="utf-8") as f:
-                xml_content = f.read()
-            
-            st.session_state.filename = generate_filename(article_url, xml_content)
-            
-            tree = ET.parse(temp_xml)
-            root = tree.getroot()
-            article = root.find(".//Article")
-            
-            if article is None:
-                raise ValueError("No Article element found in the input XML")
-
-            # Journal metadata processing
-            journal = article.find("Journal")
-            jt_elem = journal.find("JournalTitle") if journal is not None else None
-            issn_elem = journal.find("Issn") if journal is not None else None
-            doi_elem = article.find(".//ELocationID[@EIdType='doi']")
-            
-            if jt_elem is None or issn_elem is None:
-                raise ValueError("Journal title or ISSN not found")
-
-            journal_title = jt_elem.text.strip()
-            shortcode = extract_journal_abbreviation(doi_elem.text if doi_elem is not None else "")
-            pmc_id = shortcode.lower()
-            
-            # Create XML structure
-            article_out = ET.Element("Article")
-            journal_meta = ET.SubElement(article_out, "Journal-meta")
-            
-            # Add journal identifiers
-            for id_type, val in [("pmc", pmc_id), ("pubmed", journal_title), ("publisher", shortcode)]:
-                ET.SubElement(journal_meta, "journal-id", {"journal-id-type": id_type}).text = val
-            
-            ET.SubElement(journal_meta, "Issn").text = issn_elem.text.strip()
-            publisher = ET.SubElement(journal_meta, "Publisher")
-            ET.SubElement(publisher, "PublisherName").text = "MMU Press, Multimedia University"
-            ET.SubElement(journal_meta, "JournalTitle").text = journal_title
-
-            # Article metadata
-            article_meta = ET.SubElement(article_out, "article-meta")
-
-            # DOI and custom ID
-            doi_elem = article.find(".//ELocationID[@EIdType='doi']")
-            ET.SubElement(article_meta, "article-id", {"pub-id-type": "doi"}).text = doi_elem.text.strip() if doi_elem is not None else "null"
-            
-            volume = article.findtext(".//Volume", "").strip()
-            issue = article.findtext(".//Issue", "").strip()
-
-            # If not found, try to extract from DOI
-            if not volume or not issue:
-                doi_elem = article.find(".//ELocationID[@EIdType='doi']")
-                if doi_elem is not None and doi_elem.text:
-                    doi = doi_elem.text.strip()
-                    # Extract the parts after the year (assuming format like 10.xxx/xxx.YYYY.V.I...)
-                    parts = doi.split('.')
-                    
-                    # Find the position of the 4-digit year
-                    year_pos = -1
-                    for i, part in enumerate(parts):
-                        if len(part) == 4 and part.isdigit():
-                            year_pos = i
-                            break
-                    
-                    # If year found and there are at least 2 parts after it
-                    if year_pos != -1 and len(parts) > year_pos + 2:
-                        volume = parts[year_pos + 1]  # Part after year is volume
-                        issue = parts[year_pos + 2]  # Next part is issue
-
-            # For handle page number
-            try:
-                fp_text = article.findtext(".//FirstPage", "0").strip()
-                lp_text = article.findtext(".//LastPage", "0").strip()
-
-                # Initialize default values
-                fp = 0
-                lp = 0
-
-                # Extract first page number (split on en dash '–' or hyphen '-')
-                if fp_text and '–' in fp_text:
-                    fp = int(fp_text.split('–')[0])
-                elif fp_text and '-' in fp_text:
-                    fp = int(fp_text.split('-')[0])
-                else:
-                    fp = int(fp_text) if fp_text.isdigit() else 0
-
-                # Extract last page number (split on en dash '–' or hyphen '-')
-                if lp_text and '–' in lp_text:
-                    lp = int(lp_text.split('–')[1])
-                elif lp_text and '-' in lp_text:
-                    lp = int(lp_text.split('-')[1])
-                else:
-                    lp = int(lp_text) if lp_text.isdigit() else 0
-
-                # Calculate page count (ensure lp >= fp to avoid negative values)
-                page_count = str(max(0, lp - fp + 1)) if lp >= fp else "0"
-            except:
-                page_count = "null"
-
-            custom_id = f"{shortcode[0].lower()}{shortcode}.v{volume}.i{issue}.pg{str(fp)}"
-            ET.SubElement(article_meta, "article-id", {"pub-id-type": "other"}).text = custom_id
-
-            # Title
-            title_elem = article.find("ArticleTitle")
-            ET.SubElement(article_meta, "ArticleTitle").text = title_elem.text.strip() if title_elem is not None else "null"
-
-            # Authors
-            author_list = article.find("AuthorList")
-            if author_list is not None:
-                article_meta.append(author_list)
-            else:
-                ET.SubElement(article_meta, "AuthorList")
-
-            # Publication dates from webpage
-            try:
-                response = requests.get(article_url)
-                soup = BeautifulSoup(response.content, "html.parser")
-                year, month, day = "null", "null", "null"
-                
-                published_div = soup.find("div", class_="list-group-item date-published")
-                if published_div:
-                    text = published_div.get_text(strip=True).replace("Published:", "").strip()
-                    year, month, day = parse_date(text)
-
-                # Add publication dates
-                epublish_date = article.find(".//PubDate[@PubStatus='epublish']")
-                if epublish_date is not None:
-                    article_meta.append(epublish_date)
-
-                for pub_type in ['pub', 'cover']:
-                    pd_elem = ET.Element("PubDate", {"PubStatus": pub_type})
-                    for tag, val in zip(["Year", "Month", "Day"], [year, month, day]):
-                        ET.SubElement(pd_elem, tag).text = val
-                    article_meta.append(pd_elem)
-
-                # Keywords
-                keywords_elem = ET.SubElement(article_meta, "Keywords")
-                for meta in soup.find_all("meta", {"name": "citation_keywords"}):
-                    keywords_content = meta.get("content", "")
-                    for kw in re.split(r'[;,]\s*', keywords_content):
-                        kw = kw.strip()
-                        if kw:
-                            kw_elem = ET.SubElement(keywords_elem, "Keyword")
-                            ET.SubElement(kw_elem, "italic").text = kw
-            except Exception as e:
-                st.warning(f"Could not scrape article URL: {str(e)}")
-
-            # Volume/Issue/Pages
-            ET.SubElement(article_meta, "Volume").text = volume
-            ET.SubElement(article_meta, "Issue").text = issue
-
-            # Create tagging for first page, last page and page count
-            ET.SubElement(article_meta, "FirstPage").text = str(fp)
-            ET.SubElement(article_meta, "LastPage").text = str(lp)
-            ET.SubElement(article_meta, "PageCount").text = page_count
-
-            # Date extraction with strict validation
-            dates = extract_history_from_pdf(temp_pdf)
-            
-            # If dates not found in PDF or invalid, show dropdown selectors
-            if dates is None or dates == (("null", "null", "null"), ("null", "null", "null")):
-                st.warning("Could not automatically extract valid dates from PDF. Please select them below:")
-                
-                # Date input section with dropdowns
-                with st.container():
-                    st.markdown("### Required Date Information")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        # Received date dropdowns
-                        st.markdown("**Received Date**")
-                        r_col1, r_col2, r_col3 = st.columns(3)
-                        r_day = r_col1.selectbox("Day", [""] + list(range(1, 32)), index=0, key="received_day")
-                        r_month = r_col2.selectbox("Month", [""] + [
-                            "January", "February", "March", "April", "May", "June",
-                            "July", "August", "September", "October", "November", "December"
-                        ], index=0, key="received_month")
-                        # Static year range that automatically includes current year
-                        r_year = r_col3.selectbox("Year", [""] + list(range(1980, datetime.now().year + 1)), 
-                                         index=0, key="received_year")
-                    
-                    with col2:
-                        # Accepted date dropdowns
-                        st.markdown("**Accepted Date**")
-                        a_col1, a_col2, a_col3 = st.columns(3)
-                        a_day = a_col1.selectbox("Day", [""] + list(range(1, 32)), index=0, key="accepted_day")
-                        a_month = a_col2.selectbox("Month", [""] + [
-                            "January", "February", "March", "April", "May", "June",
-                            "July", "August", "September", "October", "November", "December"
-                        ], index=0, key="accepted_month")
-                        a_year = a_col3.selectbox("Year", [""] + list(range(1980, datetime.now().year + 1)),
-                                         index=0, key="accepted_year")
-                    
-                    # Only proceed if all date fields are selected
-                    if not all([r_day, r_month, r_year, a_day, a_month, a_year]):
-                        return None
-                    
-                    # Format the selected dates
-                    received_date_str = f"{r_day} {r_month} {r_year}"
-                    accepted_date_str = f"{a_day} {a_month} {a_year}"
-                    
-                    dates = (
-                        parse_date(received_date_str),
-                        parse_date(accepted_date_str)
-                    )
-            else:
-                st.success("✓ Automatically extracted valid dates from PDF")
-
-            # Add dates to XML
-            (r_year, r_month, r_day), (a_year, a_month, a_day) = dates
-            history_elem = ET.Element("History")
-            for status, y, m, d in [("received", r_year, r_month, r_day), ("accepted", a_year, a_month, a_day)]:
-                pubdate = ET.SubElement(history_elem, "PubDate", {"PubStatus": status})
-                ET.SubElement(pubdate, "Year").text = y
-                ET.SubElement(pubdate, "Month").text = m
-                ET.SubElement(pubdate, "Day").text = d
-            article_meta.append(history_elem)
-
-            # Abstract
-            abstract = article.find("Abstract")
-            abs_elem = ET.SubElement(article_meta, "abstract")
-            p_elem = ET.SubElement(abs_elem, "p")
-            p_elem.text = abstract.text.strip() if abstract is not None else "null"
-
-            # Links and language
-            ET.SubElement(article_meta, "pdf-link").text = pdf_link if pdf_link else "null"
-            ET.SubElement(article_meta, "full_text_url").text = article_url if article_url else "null"
-            ET.SubElement(article_meta, "Language").text = "eng"
-
-            # Format and store XML
-            indent(article_out)
-            xml_str = ET.tostring(article_out, encoding='utf-8', method='xml').decode()
-            
-            st.session_state.processed_xml = xml_str
-            st.session_state.show_combine_section = True
-            
-            # Only show success messages after processing completes
-            st.success("✓ Dates selected successfully")
-            st.success("Initial XML processing complete! You can now combine with template XML.")
-            
-            with st.expander("Preview Processed XML Output"):
-                st.code(xml_str[:2000] + "..." if len(xml_str) > 2000 else xml_str, language="xml")
-
-    except Exception as e:
-        st.error(f"An error occurred during processing: {str(e)}")
-    finally:
-        # Clean up temporary files
-        if os.path.exists(temp_pdf):
-            os.remove(temp_pdf)
-        if os.path.exists(temp_xml):
-            os.remove(temp_xml)
+        dates = (
+            parse_date(received_date_str),
+            parse_date(accepted_date_str)
+        )
+    
+    # Reruns that don't change the dates (e.g. combining with a template) keep the stored XML
+    if dates == st.session_state.history_dates:
+        return None
+    
+    article_out = st.session_state.pending_article
+    with track(step="dates") as metrics:
+        set_history(article_out, dates)
+        st.session_state.history_dates = dates
+        st.session_state.final_combined_xml = None
+        store_processed_xml(serialize_article(article_out))
+    finish_step(metrics, True)
 
 def combine_with_template(template_file):
     try:
-        temp_template = "temp_template.xml"
-        
         with st.spinner("Combining with template..."):
-            with open(temp_template, "wb") as f:
-                f.write(template_file.getbuffer())
-            
-            processed_root = ET.fromstring(st.session_state.processed_xml)
-            front = ET.Element("front")
-            front.text = "\n  "
-            article = ET.SubElement(front, "Article")
-            article.text = "\n    "
-            
-            def copy_element(source, target, indent_level):
-                indent = "  " * indent_level
-                for elem in source:
-                    new_elem = ET.SubElement(target, elem.tag)
-                    if elem.text:
-                        new_elem.text = elem.text
-                    if elem.attrib:
-                        new_elem.attrib.update(elem.attrib)
-                    new_elem.tail = f"\n{indent}"
-                    if len(elem) > 0:
-                        new_elem.text = f"\n{indent}  "
-                        copy_element(elem, new_elem, indent_level + 1)
-                        new_elem[-1].tail = f"\n{indent}"
-            
-            journal_meta = processed_root.find("Journal-meta")
-            if journal_meta is not None:
-                new_journal_meta = ET.SubElement(article, "Journal-meta")
-                new_journal_meta.text = "\n      "
-                copy_element(journal_meta, new_journal_meta, 3)
-                new_journal_meta[-1].tail = "\n    "
-                new_journal_meta.tail = "\n    "
-            
-            article_meta = processed_root.find("article-meta")
-            if article_meta is not None:
-                new_article_meta = ET.SubElement(article, "article-meta")
-                new_article_meta.text = "\n      "
-                copy_element(article_meta, new_article_meta, 3)
-                new_article_meta[-1].tail = "\n    "
-                new_article_meta.tail = "\n  "
-            
-            article.tail = "\n"
-            xml_str = ET.tostring(front, encoding='utf-8').decode()
-            
-            with open(temp_template, "r", encoding="utf-8") as f:
-                template_content = f.read()
-            
-            front_start = template_content.find("<front>")
-            front_end = template_content.find("</front>")
-            
-            if front_start == -1 or front_end == -1:
-                st.error("Template does not contain <front> tags")
+            # Template prefix/suffix are streamed chunk by chunk around the generated <front>,
+            # straight into the session's store once the output passes the spill size
+            combined = session_store().writer("combined")
+            try:
+                encoding = combine_template(template_file.getbuffer(), st.session_state.processed_xml.text(), combined,
+                                            cache=get_result_cache())
+            except ValueError as e:
+                combined.discard()
+                st.error(str(e))
                 return
             
-            combined_content = (
-                template_content[:front_start] +
-                xml_str +
-                template_content[front_end + len("</front>"):]
-            )
-            
-            st.session_state.final_combined_xml = combined_content
+            st.session_state.final_combined_xml = combined.result(encoding)
+            st.session_state.pop("preview_page_final_combined_xml", None)
+            count("output_bytes", st.session_state.final_combined_xml.size)
             st.success("XML successfully combined with template!")
-            
-            with st.expander("Preview Combined XML Output"):
-                st.code(combined_content, language="xml")
+            with st.session_state.final_combined_xml.view() as output:
+                for problem in validate_document(output).problems:
+                    st.warning(f"Output check: {problem}")
     except Exception as e:
         st.error(f"Error combining with template: {str(e)}")
-    finally:
-        if os.path.exists(temp_template):
-            os.remove(temp_template)
 
 def main():
     st.title("Journal Article XML Generator")
     st.markdown('<div style="font-size:18px;margin-bottom:10px; font-weight:600">This tool creates JATS XML by merging metadata from the article PDF and web input with back-section content from Vertopal.</div>', unsafe_allow_html=True)
     
+    session_store().touch()
+    drop_expired_results()
+    
     # Main XML Processing Form
     st.markdown("---")
     reset_key = st.session_state.reset_counter
@@ -588,7 +451,18 @@ def main():
             if not all([pdf_file, input_xml, article_url]):
                 st.warning("Please provide all required files and URLs")
             else:
-                process_files(pdf_file, input_xml, article_url, pdf_link)
+                st.session_state.timings = []
+                submit_job(pdf_file, input_xml, article_url, pdf_link)
+    
+    if st.session_state.job_id is not None:
+        job_status()
+    if st.session_state.finished_job is not None:
+        apply_job(st.session_state.finished_job)
+        st.session_state.finished_job = None
+    
+    # Date selectors live outside the form so each change reruns straight into select_history_dates
+    if st.session_state.pending_article is not None:
+        select_history_dates()
     
     if st.session_state.show_combine_section:
         st.markdown("---")
@@ -608,26 +482,37 @@ def main():
                 if template_file is None:
                     st.warning("Please upload a template XML file")
                 else:
-                    combine_with_template(template_file)
+                    previous = st.session_state.final_combined_xml
+                    with track(step="combine") as metrics:
+                        combine_with_template(template_file)
+                    finish_step(metrics, st.session_state.final_combined_xml is not previous)
     
+    # Downloads read the stored file only when clicked
     if st.session_state.processed_xml:
+        show_preview("processed_xml", "Preview Processed XML Output")
         st.download_button(
             label="Download Processed XML",
-            data=st.session_state.processed_xml,
+            data=st.session_state.processed_xml.read,
             file_name=st.session_state.filename,
             mime="application/xml",
             key="processed_download"
         )
     
     if st.session_state.final_combined_xml:
+        show_preview("final_combined_xml", "Preview Combined XML Output")
         st.download_button(
             label="Download Combined XML",
-            data=st.session_state.final_combined_xml,
+            data=st.session_state.final_combined_xml.read,
             file_name=st.session_state.filename,
             mime="application/xml",
             key="combined_download"
         )
     
+    bulk_upload(reset_key)
+    
+    if SHOW_TIMINGS and st.session_state.timings:
+        show_timings()
+    
     if st.session_state.show_success:
         st.success("All inputs have been cleared!")
         st.session_state.show_success = False